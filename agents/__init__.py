@@ -3,5 +3,7 @@ Módulo de agentes AI para processamento de documentos fiscais.
 """
 from .processador_nota_fiscal import ProcessadorDeNotaFiscalTool
 from .agente_processador import AgenteProcessador
+from .extrator_danfe import ExtratorDANFE
+from .fila_processamento import FilaProcessamento
 
-__all__ = ['ProcessadorDeNotaFiscalTool', 'AgenteProcessador']
+__all__ = ['ProcessadorDeNotaFiscalTool', 'AgenteProcessador', 'ExtratorDANFE', 'FilaProcessamento']
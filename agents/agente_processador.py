@@ -1,6 +1,9 @@
 """
 Agente que decide qual ferramenta usar para a tarefa.
 """
+import os
+
+from .extrator_danfe import ExtratorDANFE, CAMPOS
 
 
 class AgenteProcessador:
@@ -8,11 +11,70 @@ class AgenteProcessador:
 
     def __init__(self, ferramentas):
         self.ferramentas = ferramentas
+        # Resumo da última extração: campos lidos localmente e pedidos ao Gemini
+        self.ultima_extracao = None
 
     def executar_tarefa(self, tarefa, dados):
         """Executa a tarefa usando a ferramenta apropriada."""
         if "processar nota fiscal" in tarefa.lower():
             ferramenta = self.ferramentas.get("processador_nf")
+            if os.environ.get('DANFE_EXTRACAO_LOCAL', 'true').lower() == 'true' and dados:
+                return self._processar_nota_fiscal(ferramenta, dados)
             if ferramenta:
                 return ferramenta.executar()
         return None
+
+    def _processar_nota_fiscal(self, ferramenta, texto):
+        """
+        Extrai a nota com o ExtratorDANFE e usa o Gemini apenas para os campos
+        ausentes ou com confiança abaixo de DANFE_CONFIANCA_MINIMA (padrão: 0.8).
+        """
+        confianca_minima = float(os.environ.get('DANFE_CONFIANCA_MINIMA', '0.8'))
+        try:
+            parcial, confianca = ExtratorDANFE(texto).extrair()
+        except Exception as e:
+            # Falha do extrator local não deve derrubar o processamento: prompt completo
+            print(f"Erro na extração local do DANFE, usando o Gemini: {e}")
+            parcial, confianca = {}, {}
+        faltantes = [campo for campo in CAMPOS if confianca.get(campo, 0) < confianca_minima]
+
+        self.ultima_extracao = {
+            'campos_locais': len(CAMPOS) - len(faltantes),
+            'campos_llm': [' / '.join(campo) for campo in faltantes]
+        }
+
+        if not faltantes:
+            print("Nota fiscal extraída localmente (sem chamada ao Gemini)")
+            return parcial
+        if not ferramenta:
+            return None
+        if not confianca:
+            # Layout não reconhecido: prompt completo
+            return ferramenta.executar()
+
+        complemento = ferramenta.completar(parcial, faltantes)
+        if not complemento:
+            return None
+
+        print(f"Nota fiscal: {len(CAMPOS) - len(faltantes)} campos extraídos localmente, "
+              f"{len(faltantes)} completados pelo Gemini")
+        return self._mesclar(parcial, complemento, faltantes)
+
+    @staticmethod
+    def _mesclar(parcial, complemento, campos):
+        """Copia os `campos` do complemento do Gemini para o JSON parcial."""
+        if 'Classificacao Despesa' in complemento and 'Classificacao_Despesa' not in complemento:
+            complemento['Classificacao_Despesa'] = complemento.pop('Classificacao Despesa')
+
+        for caminho in campos:
+            origem = complemento
+            for chave in caminho:
+                origem = origem.get(chave) if isinstance(origem, dict) else None
+            if origem is None:
+                continue
+            destino = parcial
+            for chave in caminho[:-1]:
+                destino = destino.setdefault(chave, {})
+            destino[caminho[-1]] = origem
+
+        return parcial
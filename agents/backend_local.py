@@ -0,0 +1,118 @@
+"""
+Backend LLM local e determinístico, para testes de carga e benchmarks offline.
+
+Selecionado com LLM_BACKEND=local. Não acessa a rede:
+- geração: extração de notas fiscais pelo ExtratorDANFE (campos faltantes com
+  valores derivados do hash do texto) e respostas do RAG a partir de um modelo
+- embeddings: vetores normalizados gerados a partir do hash do texto
+- latência artificial (LLM_LOCAL_LATENCIA_MS ± LLM_LOCAL_JITTER_MS) e taxa de
+  erros transitórios (LLM_LOCAL_TAXA_ERRO) configuráveis
+"""
+import os
+import re
+import json
+import time
+import random
+import hashlib
+from datetime import date, timedelta
+
+import numpy as np
+
+from .cliente_llm import RespostaLLM, ErroLLMTransitorio
+from .extrator_danfe import ExtratorDANFE
+
+RE_PERGUNTA = re.compile(r'PERGUNTA:\s*(.+)')
+MARCADOR_NOTA = 'Texto da nota fiscal:'
+
+
+def _semente(texto):
+    return int(hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16], 16)
+
+
+class BackendLocal:
+    """Implementação offline das chamadas do ClienteLLM."""
+
+    nome = 'local'
+
+    def __init__(self, latencia_ms=None, jitter_ms=None, taxa_erro=None, dimensao=None):
+        """
+        Args:
+            latencia_ms: Latência média de cada chamada (padrão: LLM_LOCAL_LATENCIA_MS ou 0)
+            jitter_ms: Variação máxima da latência (padrão: LLM_LOCAL_JITTER_MS ou 0)
+            taxa_erro: Fração de chamadas que falham com erro transitório (padrão: LLM_LOCAL_TAXA_ERRO ou 0)
+            dimensao: Dimensão dos embeddings (padrão: LLM_LOCAL_DIMENSAO ou 768, a do text-embedding-004)
+        """
+        self.latencia_ms = latencia_ms if latencia_ms is not None else float(os.environ.get('LLM_LOCAL_LATENCIA_MS', '0'))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.environ.get('LLM_LOCAL_JITTER_MS', '0'))
+        self.taxa_erro = taxa_erro if taxa_erro is not None else float(os.environ.get('LLM_LOCAL_TAXA_ERRO', '0'))
+        self.dimensao = dimensao or int(os.environ.get('LLM_LOCAL_DIMENSAO', '768'))
+
+    def _simular(self, timeout):
+        """Aplica a latência artificial e, na proporção configurada, um erro transitório."""
+        latencia = max(0.0, self.latencia_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+        if timeout and latencia > timeout:
+            time.sleep(timeout)
+            raise TimeoutError('Timeout simulado do backend local')
+        if latencia:
+            time.sleep(latencia)
+        if self.taxa_erro and random.random() < self.taxa_erro:
+            raise ErroLLMTransitorio('429 simulado pelo backend local')
+
+    def gerar(self, prompt, modelo, timeout=None, generation_config=None):
+        self._simular(timeout)
+        if MARCADOR_NOTA in prompt:
+            texto = self._extrair_nota(prompt.split(MARCADOR_NOTA, 1)[1].strip())
+        else:
+            texto = self._responder(prompt)
+        return RespostaLLM(texto, len(prompt) // 4, len(texto) // 4)
+
+    def gerar_stream(self, prompt, modelo, timeout=None, generation_config=None):
+        """Mesma resposta de `gerar`, entregue em trechos de algumas palavras."""
+        palavras = self.gerar(prompt, modelo, timeout, generation_config).text.split(' ')
+        for inicio in range(0, len(palavras), 5):
+            trecho = ' '.join(palavras[inicio:inicio + 5])
+            yield trecho if inicio + 5 >= len(palavras) else trecho + ' '
+
+    def _extrair_nota(self, texto_nota):
+        """JSON da nota: campos do ExtratorDANFE e, nos faltantes, valores derivados do hash."""
+        dados, _ = ExtratorDANFE(texto_nota).extrair()
+        semente = _semente(texto_nota)
+        fornecedor = dados.setdefault('Fornecedor', {})
+        faturado = dados.setdefault('Faturado', {})
+
+        fornecedor.setdefault('Razao Social', f"FORNECEDOR LOCAL {semente % 100:02d} LTDA")
+        fornecedor.setdefault('CNPJ', f"{semente % 100:02d}.{semente % 1000:03d}.{semente % 997:03d}/0001-{semente % 89 + 10:02d}")
+        faturado.setdefault('Nome', 'FATURADO LOCAL')
+        faturado.setdefault('CPF', f"{semente % 1000:03d}.{semente % 991:03d}.{semente % 983:03d}-{semente % 89 + 10:02d}")
+        emissao = date(2025, 1, 1) + timedelta(days=semente % 365)
+        dados.setdefault('Nota Fiscal', str(semente % 1000000))
+        dados.setdefault('Data Emissao', emissao.isoformat())
+        dados.setdefault('Data de Validade', (emissao + timedelta(days=30)).isoformat())
+        dados.setdefault('Descricao Produtos', ['PRODUTO LOCAL'])
+        dados.setdefault('Valor Total', round(10 + (semente % 500000) / 100, 2))
+        dados.setdefault('Quantidade de Parcelas', 1)
+        dados.setdefault('Classificacao_Despesa', 'OUTROS')
+        return json.dumps(dados, ensure_ascii=False)
+
+    def _responder(self, prompt):
+        """Resposta do RAG montada a partir da pergunta e do tamanho do contexto."""
+        pergunta = RE_PERGUNTA.search(prompt)
+        return (
+            "Resposta gerada pelo backend local (LLM_BACKEND=local).\n\n"
+            f"- Pergunta: {pergunta.group(1).strip() if pergunta else '-'}\n"
+            f"- Contexto recebido: {len(prompt)} caracteres\n"
+            f"- Identificador: {_semente(prompt) % 100000:05d}"
+        )
+
+    def _vetor(self, texto):
+        vetor = np.random.default_rng(_semente(texto)).standard_normal(self.dimensao)
+        return (vetor / np.linalg.norm(vetor)).tolist()
+
+    def embed(self, conteudo, modelo, task_type=None, timeout=None):
+        self._simular(timeout)
+        if isinstance(conteudo, (list, tuple)):
+            return [self._vetor(texto) for texto in conteudo]
+        return self._vetor(conteudo)
+
+    def testar_chave(self, api_key, modelo):
+        return True
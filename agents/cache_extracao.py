@@ -0,0 +1,215 @@
+"""
+Cache de extração de notas fiscais endereçado por conteúdo.
+
+O mesmo DANFE costuma ser enviado mais de uma vez (e-mails reenviados,
+novas tentativas após timeout). O cache tem dois níveis:
+1. PDF: SHA-256 dos bytes enviados - evita o PyPDF2 e o Gemini
+2. TEXTO: SHA-256 do texto extraído normalizado - pega o mesmo documento
+   gerado novamente (metadados/bytes diferentes, mesmo conteúdo)
+
+Os resultados são gravados junto com o backend do LLM, o modelo e a versão
+do prompt, então trocar qualquer um deles invalida as entradas antigas (as
+notas sintéticas do backend local nunca são servidas com o Gemini).
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.extracao_cache import ExtracaoCache
+from .processador_nota_fiscal import ProcessadorDeNotaFiscalTool
+from .cliente_llm import get_cliente_llm
+
+NIVEL_PDF = 'PDF'
+NIVEL_TEXTO = 'TEXTO'
+
+
+class CacheExtracao:
+    """Consulta e grava resultados de extração no cache persistente."""
+
+    # Contadores de hits/misses do processo (compartilhados entre instâncias)
+    _lock = threading.Lock()
+    _contadores = {NIVEL_PDF: {'hits': 0, 'misses': 0}, NIVEL_TEXTO: {'hits': 0, 'misses': 0}}
+    _gravacoes_desde_limpeza = 0
+
+    def __init__(self, modelo, versao_prompt=None, max_dias=None, max_entradas=None, intervalo_limpeza=None,
+                 backend=None):
+        """
+        Args:
+            modelo: Nome do modelo Gemini usado na extração
+            versao_prompt: Versão do prompt (padrão: ProcessadorDeNotaFiscalTool.VERSAO_PROMPT)
+            max_dias: Idade máxima (dias sem acesso) de uma entrada (padrão: CACHE_EXTRACAO_MAX_DIAS ou 90)
+            max_entradas: Número máximo de entradas (padrão: CACHE_EXTRACAO_MAX_ENTRADAS ou 10000)
+            intervalo_limpeza: Gravações entre duas limpezas automáticas (padrão: CACHE_EXTRACAO_INTERVALO_LIMPEZA ou 100)
+            backend: Nome do backend do LLM (padrão: o do cliente compartilhado, conforme LLM_BACKEND)
+        """
+        # O backend faz parte da chave: 'gemini:gemini-2.0-flash', 'local:gemini-2.0-flash'
+        self.modelo = f"{backend or get_cliente_llm().backend.nome}:{modelo}"
+        self.versao_prompt = versao_prompt or ProcessadorDeNotaFiscalTool.VERSAO_PROMPT
+        self.max_dias = max_dias or int(os.environ.get('CACHE_EXTRACAO_MAX_DIAS', '90'))
+        self.max_entradas = max_entradas or int(os.environ.get('CACHE_EXTRACAO_MAX_ENTRADAS', '10000'))
+        self.intervalo_limpeza = intervalo_limpeza or int(os.environ.get('CACHE_EXTRACAO_INTERVALO_LIMPEZA', '100'))
+
+    @staticmethod
+    def hash_bytes(conteudo):
+        """SHA-256 dos bytes de um PDF."""
+        return hashlib.sha256(conteudo).hexdigest()
+
+    @staticmethod
+    def hash_arquivo(arquivo):
+        """SHA-256 de um arquivo (caminho ou objeto de arquivo), lido em blocos."""
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, 'rb') as origem:
+                return CacheExtracao.hash_arquivo(origem)
+
+        sha = hashlib.sha256()
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            sha.update(bloco)
+        arquivo.seek(0)
+        return sha.hexdigest()
+
+    @staticmethod
+    def normalizar_texto(texto):
+        """Normaliza o texto extraído (Unicode NFKC e espaços colapsados)."""
+        texto = unicodedata.normalize('NFKC', texto or '')
+        return re.sub(r'\s+', ' ', texto).strip()
+
+    @classmethod
+    def hash_texto(cls, texto):
+        """SHA-256 do texto normalizado."""
+        return hashlib.sha256(cls.normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+    def _buscar(self, nivel, chave):
+        entrada = ExtracaoCache.buscar(nivel, chave, self.modelo, self.versao_prompt) if chave else None
+
+        with self._lock:
+            self._contadores[nivel]['hits' if entrada else 'misses'] += 1
+
+        if not entrada:
+            return None
+
+        try:
+            entrada.acessos = (entrada.acessos or 0) + 1
+            entrada.ultimo_acesso = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao atualizar acesso do cache de extração: {e}")
+
+        return entrada.resultado
+
+    def buscar_pdf(self, chave_pdf):
+        """Retorna o resultado em cache para o hash do PDF (ou None)."""
+        return self._buscar(NIVEL_PDF, chave_pdf)
+
+    def buscar_texto(self, texto):
+        """Retorna o resultado em cache para o texto extraído (ou None)."""
+        return self._buscar(NIVEL_TEXTO, self.hash_texto(texto))
+
+    def salvar(self, resultado, chave_pdf=None, texto=None):
+        """
+        Grava o resultado nos níveis disponíveis (hash do PDF e/ou do texto).
+        Falhas são apenas registradas - o cache nunca interrompe o processamento.
+        """
+        if not resultado:
+            return
+
+        chaves = []
+        if chave_pdf:
+            chaves.append((NIVEL_PDF, chave_pdf))
+        if texto:
+            chaves.append((NIVEL_TEXTO, self.hash_texto(texto)))
+
+        tamanho = len(json.dumps(resultado, ensure_ascii=False).encode('utf-8'))
+        for nivel, chave in chaves:
+            try:
+                entrada = ExtracaoCache.buscar(nivel, chave, self.modelo, self.versao_prompt)
+                if entrada:
+                    entrada.resultado = resultado
+                    entrada.tamanho = tamanho
+                    entrada.ultimo_acesso = datetime.utcnow()
+                else:
+                    db.session.add(ExtracaoCache(
+                        nivel=nivel,
+                        chave=chave,
+                        modelo=self.modelo,
+                        versao_prompt=self.versao_prompt,
+                        resultado=resultado,
+                        tamanho=tamanho
+                    ))
+                db.session.commit()
+            except IntegrityError:
+                # Outro worker gravou a mesma chave ao mesmo tempo
+                db.session.rollback()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erro ao gravar cache de extração: {e}")
+
+        with self._lock:
+            CacheExtracao._gravacoes_desde_limpeza += 1
+            limpar = CacheExtracao._gravacoes_desde_limpeza >= self.intervalo_limpeza
+            if limpar:
+                CacheExtracao._gravacoes_desde_limpeza = 0
+        if limpar:
+            self.limpar()
+
+    def limpar(self):
+        """
+        Remove as entradas sem acesso há mais de `max_dias` e, se o cache
+        passar de `max_entradas`, as menos acessadas recentemente.
+
+        Returns:
+            Dicionário com o número de entradas removidas por critério
+        """
+        removidas = {'idade': 0, 'tamanho': 0}
+        try:
+            limite = datetime.utcnow() - timedelta(days=self.max_dias)
+            removidas['idade'] = ExtracaoCache.query.filter(
+                ExtracaoCache.ultimo_acesso < limite
+            ).delete(synchronize_session=False)
+
+            excedente = ExtracaoCache.query.count() - self.max_entradas
+            if excedente > 0:
+                antigas = db.session.query(ExtracaoCache.id).order_by(
+                    ExtracaoCache.ultimo_acesso.asc(), ExtracaoCache.id.asc()
+                ).limit(excedente).subquery()
+                removidas['tamanho'] = ExtracaoCache.query.filter(
+                    ExtracaoCache.id.in_(db.select(antigas.c.id))
+                ).delete(synchronize_session=False)
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao limpar cache de extração: {e}")
+
+        if removidas['idade'] or removidas['tamanho']:
+            print(f"Cache de extração: {removidas['idade']} entradas expiradas e "
+                  f"{removidas['tamanho']} removidas por tamanho")
+        return removidas
+
+    @classmethod
+    def estatisticas(cls):
+        """Contadores de hits/misses do processo e ocupação do cache."""
+        with cls._lock:
+            contadores = {nivel.lower(): dict(valores) for nivel, valores in cls._contadores.items()}
+
+        for valores in contadores.values():
+            consultas = valores['hits'] + valores['misses']
+            valores['hit_ratio'] = round(valores['hits'] / consultas, 4) if consultas else 0.0
+
+        entradas, tamanho = db.session.query(
+            func.count(ExtracaoCache.id), func.coalesce(func.sum(ExtracaoCache.tamanho), 0)
+        ).one()
+
+        return {
+            'entradas': entradas,
+            'tamanho_bytes': int(tamanho),
+            **contadores
+        }
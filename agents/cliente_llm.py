@@ -0,0 +1,468 @@
+"""
+Cliente LLM compartilhado pela aplicação.
+
+Todas as chamadas ao Gemini (geração de texto e embeddings) passam por um único
+ClienteLLM por processo, obtido com `get_cliente_llm()`. O cliente:
+- configura a API uma única vez (as conexões HTTP são reaproveitadas)
+- guarda os GenerativeModel já criados
+- limita a taxa de requisições (token bucket por operação) e as chamadas simultâneas
+- refaz chamadas com erro transitório (429/5xx/timeout) com backoff exponencial e jitter
+- respeita um prazo total por chamada e, opcionalmente, dispara uma segunda
+  tentativa em paralelo quando a primeira demora (hedging)
+- registra latência, erros, tentativas e tokens de cada operação
+
+O backend é escolhido por LLM_BACKEND: 'gemini' (padrão) ou 'local', um backend
+determinístico e offline para testes de carga (ver agents/backend_local.py).
+Também pode ser injetado diretamente, ex.: um backend falso em testes.
+"""
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, TimeoutError as FuturoTimeoutError
+
+import google.generativeai as genai
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    ERROS_TRANSITORIOS_API = (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.InternalServerError,
+        api_exceptions.BadGateway,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.GatewayTimeout,
+        api_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    ERROS_TRANSITORIOS_API = ()
+
+
+class ErroLLMTransitorio(Exception):
+    """Erro temporário do backend (ex.: limite de taxa); a chamada pode ser refeita."""
+
+
+class PrazoLLMExcedido(Exception):
+    """O prazo total da chamada terminou antes de uma resposta."""
+
+
+def erro_transitorio(erro):
+    """Indica se vale a pena refazer a chamada que gerou `erro`."""
+    if isinstance(erro, (ErroLLMTransitorio, TimeoutError, ConnectionError) + ERROS_TRANSITORIOS_API):
+        return True
+    codigo = getattr(erro, 'code', None)
+    return codigo == 429 or (isinstance(codigo, int) and 500 <= codigo < 600)
+
+
+class RespostaLLM:
+    """Resposta de uma geração de texto (compatível com `response.text` do Gemini)."""
+
+    def __init__(self, text, tokens_entrada=0, tokens_saida=0):
+        self.text = text
+        self.tokens_entrada = tokens_entrada
+        self.tokens_saida = tokens_saida
+
+
+class BackendGemini:
+    """Acesso à API do Google Gemini."""
+
+    nome = 'gemini'
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._modelos = {}
+        self._lock = threading.Lock()
+
+    def _modelo(self, nome):
+        with self._lock:
+            if nome not in self._modelos:
+                self._modelos[nome] = genai.GenerativeModel(nome)
+            return self._modelos[nome]
+
+    def gerar(self, prompt, modelo, timeout=None, generation_config=None):
+        """Gera texto e devolve uma RespostaLLM."""
+        response = self._modelo(modelo).generate_content(
+            prompt,
+            generation_config=generation_config,
+            request_options={'timeout': timeout} if timeout else None
+        )
+        uso = getattr(response, 'usage_metadata', None)
+        return RespostaLLM(
+            response.text,
+            getattr(uso, 'prompt_token_count', 0) or 0,
+            getattr(uso, 'candidates_token_count', 0) or 0
+        )
+
+    def gerar_stream(self, prompt, modelo, timeout=None, generation_config=None):
+        """Gera texto em streaming, devolvendo cada trecho assim que chega."""
+        response = self._modelo(modelo).generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True,
+            request_options={'timeout': timeout} if timeout else None
+        )
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+    def embed(self, conteudo, modelo, task_type=None, timeout=None):
+        """Gera o embedding de um texto (ou a lista de embeddings de uma lista de textos)."""
+        result = genai.embed_content(
+            model=modelo,
+            content=conteudo,
+            task_type=task_type,
+            request_options={'timeout': timeout} if timeout else None
+        )
+        return result['embedding']
+
+    def testar_chave(self, api_key, modelo):
+        """
+        Faz uma geração simples com outra chave, sem alterar a configuração
+        global usada pelas demais chamadas.
+        """
+        from google.ai import generativelanguage as glm
+
+        client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+        model_name = modelo if modelo.startswith('models/') else f'models/{modelo}'
+        response = client.generate_content(glm.GenerateContentRequest(
+            model=model_name,
+            contents=[glm.Content(parts=[glm.Part(text="Diga apenas 'OK' se você está funcionando.")])]
+        ))
+        return bool(response.candidates)
+
+
+def criar_backend():
+    """Cria o backend configurado em LLM_BACKEND (gemini ou local)."""
+    if os.environ.get('LLM_BACKEND', 'gemini').lower() == 'local':
+        from .backend_local import BackendLocal
+        return BackendLocal()
+    return BackendGemini(os.environ.get('GEMINI_API_KEY'))
+
+
+class LimitadorTaxa:
+    """Token bucket: até `capacidade` requisições em rajada, repostas a `taxa` por segundo."""
+
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1.0, taxa)
+        self._tokens = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self, limite=None):
+        """
+        Consome um token, esperando se necessário.
+
+        Args:
+            limite: Instante (time.monotonic) até o qual é possível esperar
+
+        Returns:
+            Tempo de espera, em segundos
+        """
+        inicio = time.monotonic()
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+                self._atualizado = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return agora - inicio
+                espera = (1 - self._tokens) / self.taxa
+
+            if limite is not None and time.monotonic() + espera > limite:
+                raise PrazoLLMExcedido('Prazo esgotado aguardando o limite de requisições')
+            time.sleep(espera)
+
+
+class MetricasLLM:
+    """Contadores de chamadas, erros, tokens e latência por operação."""
+
+    def __init__(self, janela=500):
+        self._lock = threading.Lock()
+        self._janela = janela
+        self._operacoes = {}
+
+    def registrar(self, operacao, segundos, erro=False, tokens_entrada=0, tokens_saida=0):
+        with self._lock:
+            op = self._operacao(operacao)
+            op['chamadas'] += 1
+            op['erros'] += 1 if erro else 0
+            op['tokens_entrada'] += tokens_entrada
+            op['tokens_saida'] += tokens_saida
+            op['latencia_total'] += segundos
+            op['latencias'].append(segundos)
+
+    def _operacao(self, operacao):
+        return self._operacoes.setdefault(operacao, {
+            'chamadas': 0, 'erros': 0, 'tokens_entrada': 0, 'tokens_saida': 0,
+            'novas_tentativas': 0, 'hedges': 0, 'espera_limite': 0.0,
+            'latencia_total': 0.0, 'latencias': deque(maxlen=self._janela)
+        })
+
+    def incrementar(self, operacao, contador, valor=1):
+        """Soma `valor` a um contador auxiliar (novas_tentativas, hedges, espera_limite)."""
+        with self._lock:
+            self._operacao(operacao)[contador] += valor
+
+    def resumo(self):
+        with self._lock:
+            resumo = {}
+            for operacao, op in self._operacoes.items():
+                latencias = sorted(op['latencias'])
+                percentil = lambda p: round(latencias[min(len(latencias) - 1, int(p * len(latencias)))], 4) if latencias else 0.0
+                resumo[operacao] = {
+                    'chamadas': op['chamadas'],
+                    'erros': op['erros'],
+                    'tokens_entrada': op['tokens_entrada'],
+                    'tokens_saida': op['tokens_saida'],
+                    'novas_tentativas': op['novas_tentativas'],
+                    'hedges': op['hedges'],
+                    'espera_limite': round(op['espera_limite'], 3),
+                    'latencia_media': round(op['latencia_total'] / op['chamadas'], 4) if op['chamadas'] else 0.0,
+                    'latencia_p50': percentil(0.5),
+                    'latencia_p95': percentil(0.95)
+                }
+            return resumo
+
+
+class ModeloLLM:
+    """Adaptador com a interface `generate_content` do GenerativeModel, usando o ClienteLLM."""
+
+    def __init__(self, cliente, nome):
+        self.cliente = cliente
+        self.model_name = nome
+
+    def generate_content(self, prompt, **kwargs):
+        return self.cliente.gerar(prompt, modelo=self.model_name, generation_config=kwargs.get('generation_config'))
+
+
+class ClienteLLM:
+    """Ponto único de acesso ao LLM: limite de taxa, concorrência, novas tentativas, prazos e métricas."""
+
+    def __init__(self, backend=None, modelo_padrao=None, modelo_embeddings=None, timeout=None,
+                 max_concorrencia=None, requisicoes_por_minuto=None, tentativas=None,
+                 backoff_base=None, backoff_max=None, prazo=None, hedge_segundos=None):
+        """
+        Args:
+            backend: Implementação das chamadas (padrão: criar_backend(), conforme LLM_BACKEND)
+            modelo_padrao: Modelo de geração (padrão: GEMINI_MODEL ou gemini-2.0-flash)
+            modelo_embeddings: Modelo de embeddings (padrão: models/text-embedding-004)
+            timeout: Timeout de cada tentativa, em segundos (padrão: LLM_TIMEOUT_SEGUNDOS ou 60)
+            max_concorrencia: Chamadas simultâneas por processo (padrão: LLM_MAX_CONCORRENCIA ou 8)
+            requisicoes_por_minuto: Taxa máxima por operação (padrão: LLM_REQUISICOES_POR_MINUTO ou 0, sem limite)
+            tentativas: Número máximo de tentativas por chamada (padrão: LLM_TENTATIVAS ou 4)
+            backoff_base: Espera base entre tentativas, em segundos (padrão: LLM_BACKOFF_BASE ou 0.5)
+            backoff_max: Espera máxima entre tentativas (padrão: LLM_BACKOFF_MAX ou 20)
+            prazo: Prazo total da chamada, incluindo esperas (padrão: LLM_PRAZO_SEGUNDOS ou 120)
+            hedge_segundos: Dispara uma segunda tentativa se a primeira não responder nesse
+                tempo (padrão: LLM_HEDGE_SEGUNDOS ou 0, desligado)
+        """
+        self.backend = backend or criar_backend()
+        self.modelo_padrao = modelo_padrao or os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+        self.modelo_embeddings = modelo_embeddings or 'models/text-embedding-004'
+        self.timeout = timeout or float(os.environ.get('LLM_TIMEOUT_SEGUNDOS', '60'))
+        self.max_concorrencia = max_concorrencia or int(os.environ.get('LLM_MAX_CONCORRENCIA', '8'))
+        self.requisicoes_por_minuto = (requisicoes_por_minuto if requisicoes_por_minuto is not None
+                                       else float(os.environ.get('LLM_REQUISICOES_POR_MINUTO', '0')))
+        self.tentativas = tentativas or int(os.environ.get('LLM_TENTATIVAS', '4'))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.environ.get('LLM_BACKOFF_BASE', '0.5'))
+        self.backoff_max = backoff_max if backoff_max is not None else float(os.environ.get('LLM_BACKOFF_MAX', '20'))
+        self.prazo = prazo or float(os.environ.get('LLM_PRAZO_SEGUNDOS', '120'))
+        self.hedge_segundos = (hedge_segundos if hedge_segundos is not None
+                               else float(os.environ.get('LLM_HEDGE_SEGUNDOS', '0')))
+
+        self._semaforo = threading.BoundedSemaphore(self.max_concorrencia)
+        self._limitadores = {}
+        self._limitadores_lock = threading.Lock()
+        self._executor_hedge = None
+        self.metricas = MetricasLLM()
+
+    def modelo(self, nome=None):
+        """Retorna um objeto com `generate_content` para as ferramentas que recebem um modelo."""
+        return ModeloLLM(self, nome or self.modelo_padrao)
+
+    def _limitador(self, operacao):
+        """Token bucket da operação (compartilhado por todas as threads do processo)."""
+        if not self.requisicoes_por_minuto:
+            return None
+        with self._limitadores_lock:
+            if operacao not in self._limitadores:
+                self._limitadores[operacao] = LimitadorTaxa(self.requisicoes_por_minuto / 60.0)
+            return self._limitadores[operacao]
+
+    def _tentativa(self, operacao, chamada, limite):
+        """Uma tentativa: respeita o limite de taxa e de concorrência e o prazo restante."""
+        limitador = self._limitador(operacao)
+        if limitador:
+            self.metricas.incrementar(operacao, 'espera_limite', limitador.adquirir(limite))
+
+        if not self._semaforo.acquire(timeout=max(0.0, limite - time.monotonic())):
+            raise PrazoLLMExcedido('Prazo esgotado aguardando uma vaga de concorrência')
+        try:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise PrazoLLMExcedido('Prazo esgotado antes da chamada')
+            return chamada(min(self.timeout, restante))
+        finally:
+            self._semaforo.release()
+
+    def _get_executor_hedge(self):
+        with self._limitadores_lock:
+            if self._executor_hedge is None:
+                self._executor_hedge = ThreadPoolExecutor(
+                    max_workers=self.max_concorrencia * 2,
+                    thread_name_prefix='llm-hedge'
+                )
+            return self._executor_hedge
+
+    def _tentativa_com_hedge(self, operacao, chamada, limite):
+        """
+        Executa a tentativa e, se ela não responder em `hedge_segundos`, dispara
+        uma segunda em paralelo; vale a primeira que responder com sucesso.
+        """
+        if not self.hedge_segundos:
+            return self._tentativa(operacao, chamada, limite)
+
+        executor = self._get_executor_hedge()
+        primeira = executor.submit(self._tentativa, operacao, chamada, limite)
+        concluidas, _ = wait([primeira], timeout=min(self.hedge_segundos, max(0.0, limite - time.monotonic())))
+        if concluidas:
+            return primeira.result()
+
+        self.metricas.incrementar(operacao, 'hedges')
+        segunda = executor.submit(self._tentativa, operacao, chamada, limite)
+        ultimo_erro = None
+        try:
+            for futuro in as_completed([primeira, segunda], timeout=max(0.0, limite - time.monotonic())):
+                try:
+                    return futuro.result()
+                except Exception as e:
+                    ultimo_erro = e
+        except FuturoTimeoutError:
+            raise PrazoLLMExcedido('Prazo esgotado aguardando a resposta do LLM')
+        raise ultimo_erro
+
+    def _executar(self, operacao, chamada, prazo=None, hedge=True):
+        """
+        Executa `chamada(timeout)` com novas tentativas para erros transitórios
+        (backoff exponencial com jitter), dentro do prazo total.
+        """
+        inicio = time.perf_counter()
+        limite = time.monotonic() + (prazo or self.prazo)
+        tentativa = 0
+
+        while True:
+            tentativa += 1
+            try:
+                if hedge:
+                    resultado = self._tentativa_com_hedge(operacao, chamada, limite)
+                else:
+                    resultado = self._tentativa(operacao, chamada, limite)
+                break
+            except Exception as e:
+                espera = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (tentativa - 1))))
+                if (not erro_transitorio(e) or tentativa >= self.tentativas
+                        or time.monotonic() + espera >= limite):
+                    self.metricas.registrar(operacao, time.perf_counter() - inicio, erro=True)
+                    raise
+                print(f"LLM ({operacao}): erro transitório na tentativa {tentativa}, "
+                      f"nova tentativa em {espera:.2f}s: {e}")
+                self.metricas.incrementar(operacao, 'novas_tentativas')
+                time.sleep(espera)
+
+        tokens = (getattr(resultado, 'tokens_entrada', 0), getattr(resultado, 'tokens_saida', 0))
+        self.metricas.registrar(operacao, time.perf_counter() - inicio, False, *tokens)
+        return resultado
+
+    def gerar(self, prompt, modelo=None, prazo=None, generation_config=None):
+        """
+        Gera texto com o modelo informado (ou o padrão).
+
+        Args:
+            prazo: Prazo total da chamada, em segundos (padrão: self.prazo)
+
+        Returns:
+            RespostaLLM (atributo `text`)
+        """
+        return self._executar('gerar', lambda timeout: self.backend.gerar(
+            prompt, modelo or self.modelo_padrao, timeout, generation_config
+        ), prazo)
+
+    def gerar_stream(self, prompt, modelo=None, prazo=None, generation_config=None):
+        """
+        Gera texto em streaming (gerador de trechos da resposta).
+
+        O limite de taxa, as novas tentativas e o prazo valem até a chegada do
+        primeiro trecho; nas métricas, a latência de 'gerar_stream' é o tempo
+        até esse primeiro trecho. Não há hedging em streaming.
+        """
+        def abrir(timeout):
+            partes = iter(self.backend.gerar_stream(
+                prompt, modelo or self.modelo_padrao, timeout, generation_config
+            ))
+            return next(partes, ''), partes
+
+        primeiro, partes = self._executar('gerar_stream', abrir, prazo, hedge=False)
+        if primeiro:
+            yield primeiro
+        yield from partes
+
+    def embed(self, conteudo, modelo=None, task_type=None, prazo=None):
+        """
+        Gera embeddings para um texto ou uma lista de textos.
+
+        Args:
+            prazo: Prazo total da chamada, em segundos (padrão: self.prazo)
+
+        Returns:
+            Vetor (texto único) ou lista de vetores (lista de textos)
+        """
+        return self._executar('embed', lambda timeout: self.backend.embed(
+            conteudo, modelo or self.modelo_embeddings, task_type, timeout
+        ), prazo)
+
+    def testar_chave(self, api_key, modelo=None):
+        """Valida uma chave API sem alterar a configuração em uso."""
+        return self.backend.testar_chave(api_key, modelo or self.modelo_padrao)
+
+    def get_status(self):
+        """Configuração e métricas do cliente."""
+        return {
+            'backend': self.backend.nome,
+            'modelo': self.modelo_padrao,
+            'modelo_embeddings': self.modelo_embeddings,
+            'timeout': self.timeout,
+            'prazo': self.prazo,
+            'max_concorrencia': self.max_concorrencia,
+            'requisicoes_por_minuto': self.requisicoes_por_minuto,
+            'tentativas': self.tentativas,
+            'hedge_segundos': self.hedge_segundos,
+            'operacoes': self.metricas.resumo()
+        }
+
+
+# Um cliente por processo (recriado após fork)
+_cliente = None
+_cliente_pid = None
+_cliente_lock = threading.Lock()
+
+
+def get_cliente_llm():
+    """Retorna o ClienteLLM do processo, criando-o na primeira chamada."""
+    global _cliente, _cliente_pid
+    with _cliente_lock:
+        if _cliente is None or _cliente_pid != os.getpid():
+            _cliente = ClienteLLM()
+            _cliente_pid = os.getpid()
+        return _cliente
+
+
+def reconfigurar_cliente_llm():
+    """Descarta o cliente atual (ex.: após trocar a GEMINI_API_KEY); o próximo uso cria outro."""
+    global _cliente
+    with _cliente_lock:
+        _cliente = None
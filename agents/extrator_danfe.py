@@ -0,0 +1,184 @@
+"""
+Extração local (sem LLM) dos campos de um DANFE.
+
+A maioria das notas segue o layout padrão do DANFE, em que CNPJ, CPF, número,
+datas, valor total e parcelas podem ser lidos com expressões regulares. O
+extrator gera o mesmo JSON do prompt de ProcessadorDeNotaFiscalTool, com uma
+confiança (0 a 1) por campo; os campos ausentes ou com confiança baixa são
+completados pelo Gemini.
+"""
+import re
+import unicodedata
+from datetime import datetime
+
+# Campos do JSON da nota fiscal, como caminhos de chaves
+CAMPOS = [
+    ('Fornecedor', 'Razao Social'),
+    ('Fornecedor', 'CNPJ'),
+    ('Faturado', 'Nome'),
+    ('Faturado', 'CPF'),
+    ('Nota Fiscal',),
+    ('Data Emissao',),
+    ('Data de Validade',),
+    ('Descricao Produtos',),
+    ('Valor Total',),
+    ('Quantidade de Parcelas',),
+    ('Classificacao_Despesa',),
+]
+
+# Palavras-chave (sem acento, minúsculas) das regras de classificação do prompt
+PALAVRAS_CLASSIFICACAO = {
+    'INSUMOS_AGRICOLAS': ['semente', 'fertilizante', 'adubo', 'defensivo', 'herbicida', 'fungicida',
+                          'inseticida', 'corretivo', 'calcario'],
+    'MANUTENCAO_E_OPERACAO': ['combustivel', 'diesel', 'gasolina', 'lubrificante', 'oleo', 'graxa', 'peca',
+                              'parafuso', 'porca', 'pneu', 'filtro', 'correia', 'rolamento', 'ferramenta',
+                              'utensilio'],
+    'RECURSOS_HUMANOS': ['mao de obra', 'salario', 'encargo'],
+    'SERVICOS_OPERACIONAIS': ['frete', 'transporte', 'colheita', 'secagem', 'armazenagem', 'pulverizacao',
+                              'aplicacao'],
+    'INFRASTRUTURA_E_UTILIDADES': ['energia eletrica', 'arrendamento', 'construcao', 'reforma', 'cimento',
+                                   'tijolo', 'areia'],
+    'ADMINISTRATIVAS': ['honorario', 'despesa bancaria', 'tarifa bancaria', 'despesa financeira'],
+    'SEGUROS_E_PROTECAO': ['seguro'],
+    'IMPOSTOS_E_TAXAS': ['itr', 'iptu', 'ipva', 'incra', 'ccir', 'imposto', 'taxa'],
+    'INVESTIMENTOS': ['trator', 'colheitadeira', 'implemento', 'maquina agricola', 'veiculo', 'imovel'],
+}
+
+RE_CNPJ = re.compile(r'\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b')
+RE_CPF = re.compile(r'\b\d{3}\.\d{3}\.\d{3}-\d{2}\b')
+RE_DATA = re.compile(r'\b(\d{2})/(\d{2})/(\d{4})\b')
+RE_VALOR = r'(\d{1,3}(?:\.\d{3})*,\d{2})'
+RE_NUMERO_NOTA = re.compile(r'\bN[º°o]\.?\s*:?\s*(\d{3}\.\d{3}\.\d{3}|\d{1,9})\b')
+RE_DATA_EMISSAO = re.compile(r'DATA\s+D[AE]\s+EMISS[ÃA]O\D{0,40}(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+RE_VALOR_TOTAL = re.compile(r'VALOR\s+TOTAL\s+DA\s+NOTA\D{0,40}' + RE_VALOR, re.IGNORECASE)
+RE_RECEBEMOS = re.compile(r'RECEBEMOS\s+DE\s+(.+?)\s+OS\s+PRODUTOS', re.IGNORECASE | re.DOTALL)
+RE_NOME_DESTINATARIO = re.compile(r'NOME\s*/\s*RAZ[ÃA]O\s+SOCIAL\s*\n?\s*([^\n]+)', re.IGNORECASE)
+RE_DUPLICATA = re.compile(r'\b\d{3}\s+(\d{2}/\d{2}/\d{4})\s+' + RE_VALOR)
+# Linha de produto: código, descrição, NCM (8 dígitos), CST/CSOSN e CFOP
+RE_PRODUTO = re.compile(r'^\s*\S+\s+(.+?)\s+\d{8}\s+\d{3,4}\s+\d{4}\b', re.MULTILINE)
+
+RE_INICIO_DESTINATARIO = re.compile(r'DESTINAT[ÁA]RIO', re.IGNORECASE)
+RE_INICIO_FATURA = re.compile(r'FATURA|DUPLICATA', re.IGNORECASE)
+RE_INICIO_IMPOSTO = re.compile(r'C[ÁA]LCULO\s+DO\s+IMPOSTO', re.IGNORECASE)
+RE_INICIO_PRODUTOS = re.compile(r'DADOS\s+DOS?\s+PRODUTOS?', re.IGNORECASE)
+RE_FIM_PRODUTOS = re.compile(r'C[ÁA]LCULO\s+DO\s+ISSQN|DADOS\s+ADICIONAIS', re.IGNORECASE)
+
+
+def _sem_acento(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def _data_iso(data_br):
+    """Data dd/mm/aaaa em ISO, ou None se a data não existe (ex.: 31/02 ou 00/00/0000)."""
+    try:
+        return datetime.strptime(data_br, '%d/%m/%Y').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _valor(valor_br):
+    return float(valor_br.replace('.', '').replace(',', '.'))
+
+
+def _secao(texto, inicio, fim=None):
+    """Trecho do texto entre o marcador `inicio` e o próximo marcador `fim` (ou '')."""
+    achado = inicio.search(texto)
+    if not achado:
+        return ''
+    trecho = texto[achado.end():]
+    if fim:
+        final = fim.search(trecho)
+        if final:
+            trecho = trecho[:final.start()]
+    return trecho
+
+
+class ExtratorDANFE:
+    """Extrai os campos de um DANFE com expressões regulares."""
+
+    def __init__(self, texto):
+        self.texto = texto or ''
+        self.dados = {'Fornecedor': {}, 'Faturado': {}}
+        self.confianca = {}
+
+    def _definir(self, caminho, valor, confianca):
+        destino = self.dados
+        for chave in caminho[:-1]:
+            destino = destino.setdefault(chave, {})
+        destino[caminho[-1]] = valor
+        self.confianca[caminho] = confianca
+
+    def extrair(self):
+        """
+        Extrai todos os campos reconhecíveis.
+
+        Returns:
+            Tupla (dados, confianca): o JSON parcial e um dicionário
+            {caminho do campo: confiança} apenas com os campos encontrados
+        """
+        texto = self.texto
+        destinatario = _secao(texto, RE_INICIO_DESTINATARIO, RE_INICIO_FATURA)
+        destinatario = destinatario or _secao(texto, RE_INICIO_DESTINATARIO, RE_INICIO_IMPOSTO)
+        emitente = texto[:RE_INICIO_DESTINATARIO.search(texto).start()] if destinatario else texto
+
+        # Fornecedor (emitente): o canhoto traz a razão social e o primeiro CNPJ é o do emitente
+        recebemos = RE_RECEBEMOS.search(texto)
+        if recebemos:
+            self._definir(('Fornecedor', 'Razao Social'), ' '.join(recebemos.group(1).split()), 0.9)
+        cnpj = RE_CNPJ.search(emitente)
+        if cnpj:
+            self._definir(('Fornecedor', 'CNPJ'), cnpj.group(0), 0.95 if destinatario else 0.7)
+
+        # Faturado (destinatário)
+        if destinatario:
+            nome = RE_NOME_DESTINATARIO.search(destinatario)
+            if nome and not RE_CNPJ.search(nome.group(1)) and not RE_CPF.search(nome.group(1)):
+                self._definir(('Faturado', 'Nome'), nome.group(1).strip(), 0.8)
+            cpf = RE_CPF.search(destinatario) or RE_CNPJ.search(destinatario)
+            if cpf:
+                self._definir(('Faturado', 'CPF'), cpf.group(0), 0.95)
+
+        numero = RE_NUMERO_NOTA.search(texto)
+        if numero:
+            self._definir(('Nota Fiscal',), numero.group(1).replace('.', '').lstrip('0') or '0', 0.9)
+
+        # Datas impossíveis ficam sem valor e são pedidas ao Gemini
+        emissao = RE_DATA_EMISSAO.search(texto)
+        data_emissao = _data_iso(emissao.group(1)) if emissao else None
+        if data_emissao:
+            self._definir(('Data Emissao',), data_emissao, 0.95)
+
+        valor_total = RE_VALOR_TOTAL.search(texto)
+        if valor_total:
+            self._definir(('Valor Total',), _valor(valor_total.group(1)), 0.95)
+
+        # Parcelas: linhas "001 dd/mm/aaaa valor" do bloco de fatura/duplicatas
+        fatura = _secao(texto, RE_INICIO_FATURA, RE_INICIO_IMPOSTO)
+        duplicatas = RE_DUPLICATA.findall(fatura)
+        if duplicatas:
+            self._definir(('Quantidade de Parcelas',), len(duplicatas), 0.9)
+            data_validade = _data_iso(duplicatas[-1][0])
+            if data_validade:
+                self._definir(('Data de Validade',), data_validade, 0.85)
+
+        produtos = [' '.join(descricao.split())
+                    for descricao in RE_PRODUTO.findall(_secao(texto, RE_INICIO_PRODUTOS, RE_FIM_PRODUTOS))]
+        if produtos:
+            self._definir(('Descricao Produtos',), produtos, 0.85)
+            self._classificar(produtos)
+
+        return self.dados, self.confianca
+
+    def _classificar(self, produtos):
+        """Classifica a despesa pelas palavras-chave das regras do prompt."""
+        contagem = {}
+        for produto in map(_sem_acento, produtos):
+            for categoria, palavras in PALAVRAS_CLASSIFICACAO.items():
+                if any(re.search(r'\b' + palavra, produto) for palavra in palavras):
+                    contagem[categoria] = contagem.get(categoria, 0) + 1
+
+        if not contagem:
+            return
+        categoria = max(contagem, key=contagem.get)
+        # Produtos de categorias diferentes: deixar a decisão para o Gemini
+        self._definir(('Classificacao_Despesa',), categoria, 0.9 if len(contagem) == 1 else 0.6)
@@ -0,0 +1,176 @@
+"""
+Extração de texto de arquivos PDF.
+
+Mantido em um módulo leve (sem dependências do Flask) para poder ser
+executado em processos separados na ingestão em lote.
+
+O texto é lido página a página (`iter_paginas_pdf`), com limite de páginas e,
+opcionalmente, parada antecipada assim que os campos essenciais da nota foram
+encontrados (desligada por padrão: as páginas de continuação do DANFE trazem
+mais produtos depois do cabeçalho). Documentos grandes podem ter as páginas
+extraídas em paralelo (processos).
+"""
+import io
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+
+# Campos que precisam aparecer no texto para a extração dos dados
+CAMPOS_ESSENCIAIS = {
+    'cnpj': re.compile(r'\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}'),
+    'data_emissao': re.compile(r'\d{2}/\d{2}/\d{4}'),
+    'valor_total': re.compile(r'valor\s+total', re.IGNORECASE),
+}
+
+
+class DetectorCampos:
+    """Acompanha, página a página, quais campos essenciais já apareceram no texto."""
+
+    def __init__(self, campos=None):
+        self.campos = campos or CAMPOS_ESSENCIAIS
+        self.encontrados = set()
+
+    def registrar(self, texto_pagina):
+        """Registra o texto de uma página e indica se todos os campos já foram vistos."""
+        for nome, padrao in self.campos.items():
+            if nome not in self.encontrados and padrao.search(texto_pagina):
+                self.encontrados.add(nome)
+        return len(self.encontrados) == len(self.campos)
+
+
+# Pool de processos compartilhado pela extração paralela de páginas (um por processo)
+_pool_paginas = None
+_pool_paginas_pid = None
+_pool_paginas_lock = threading.Lock()
+
+
+def _get_pool_paginas(processos):
+    """
+    Retorna o pool de extração de páginas, criando-o na primeira chamada.
+
+    Os processos são iniciados com spawn: o chamador pode ser uma thread de um
+    worker web, e fork com outras threads ativas pode deixar locks herdados
+    travados no filho. Como cada processo leva cerca de 1 s para iniciar, o
+    pool é reaproveitado entre os documentos (com o tamanho da primeira chamada).
+    """
+    global _pool_paginas, _pool_paginas_pid
+    with _pool_paginas_lock:
+        if _pool_paginas is None or _pool_paginas_pid != os.getpid():
+            _pool_paginas = ProcessPoolExecutor(max_workers=processos,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            _pool_paginas_pid = os.getpid()
+        return _pool_paginas
+
+
+def _config_int(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def _abrir_leitor(origem):
+    """Cria o PdfReader a partir de um caminho, bytes ou objeto de arquivo."""
+    if isinstance(origem, (bytes, bytearray)):
+        return PdfReader(io.BytesIO(origem))
+    return PdfReader(origem)
+
+
+def iter_paginas_pdf(origem, max_paginas=None):
+    """
+    Gera o texto de cada página do PDF, sem montar o documento inteiro em memória.
+
+    Args:
+        origem: Caminho do arquivo, bytes ou objeto de arquivo (posicionado no início)
+        max_paginas: Número máximo de páginas lidas (padrão: PDF_MAX_PAGINAS ou 50)
+    """
+    max_paginas = max_paginas or _config_int('PDF_MAX_PAGINAS', '50')
+
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, 'rb') as pdf_file:
+            yield from iter_paginas_pdf(pdf_file, max_paginas)
+        return
+
+    pdf_reader = _abrir_leitor(origem)
+    for numero, page in enumerate(pdf_reader.pages):
+        if numero >= max_paginas:
+            break
+        yield page.extract_text() or ""
+
+
+def _extrair_intervalo(origem, inicio, fim):
+    """Extrai o texto das páginas [inicio, fim) em um processo separado."""
+    pdf_reader = _abrir_leitor(origem)
+    return [(pdf_reader.pages[i].extract_text() or "") for i in range(inicio, fim)]
+
+
+def _iter_paginas_paralelo(origem, total_paginas, processos):
+    """Distribui as páginas em intervalos entre processos, devolvendo-as em ordem."""
+    if not isinstance(origem, (str, os.PathLike, bytes, bytearray)):
+        # Objetos de arquivo não são serializáveis entre processos
+        origem.seek(0)
+        origem = origem.read()
+
+    tamanho = max(1, -(-total_paginas // (processos * 2)))
+    intervalos = [(inicio, min(inicio + tamanho, total_paginas))
+                  for inicio in range(0, total_paginas, tamanho)]
+
+    executor = _get_pool_paginas(processos)
+    futuros = [executor.submit(_extrair_intervalo, origem, inicio, fim) for inicio, fim in intervalos]
+    try:
+        for futuro in futuros:
+            yield from futuro.result()
+    finally:
+        # Parada antecipada: descartar os intervalos que ainda não começaram
+        for futuro in futuros:
+            futuro.cancel()
+
+
+def _contar_paginas(origem):
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, 'rb') as pdf_file:
+            return len(PdfReader(pdf_file).pages)
+    total = len(_abrir_leitor(origem).pages)
+    if hasattr(origem, 'seek'):
+        origem.seek(0)
+    return total
+
+
+def extract_text_from_pdf(pdf_file, max_paginas=None, parada_antecipada=None, processos=1):
+    """
+    Extrai o texto de um PDF.
+
+    Args:
+        pdf_file: Caminho do arquivo, bytes ou objeto de arquivo
+        max_paginas: Número máximo de páginas lidas (padrão: PDF_MAX_PAGINAS ou 50)
+        parada_antecipada: Para de ler quando os campos essenciais já apareceram
+            (padrão: PDF_PARADA_ANTECIPADA ou desligado)
+        processos: Processos para extrair as páginas em paralelo; só é usado em
+            documentos com pelo menos PDF_PARALELO_MIN_PAGINAS páginas (padrão: 20)
+    """
+    max_paginas = max_paginas or _config_int('PDF_MAX_PAGINAS', '50')
+    if parada_antecipada is None:
+        parada_antecipada = os.environ.get('PDF_PARADA_ANTECIPADA', 'false').lower() == 'true'
+
+    try:
+        paginas = None
+        if processos and processos > 1:
+            total_paginas = min(_contar_paginas(pdf_file), max_paginas)
+            if total_paginas >= _config_int('PDF_PARALELO_MIN_PAGINAS', '20'):
+                paginas = _iter_paginas_paralelo(pdf_file, total_paginas, processos)
+        if paginas is None:
+            paginas = iter_paginas_pdf(pdf_file, max_paginas)
+
+        detector = DetectorCampos() if parada_antecipada else None
+        partes = []
+        try:
+            for texto_pagina in paginas:
+                partes.append(texto_pagina)
+                if detector and detector.registrar(texto_pagina):
+                    break
+        finally:
+            paginas.close()
+
+        return "".join(partes)
+    except Exception as e:
+        raise Exception(f"Erro ao extrair texto do PDF: {e}")
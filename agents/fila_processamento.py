@@ -0,0 +1,84 @@
+"""
+Fila de processamento assíncrono de notas fiscais.
+
+Os uploads são registrados como ProcessamentoJob e executados por um pool de
+threads, liberando o worker HTTP assim que o arquivo é recebido. Enquanto um
+job está na fila ou em execução, uma thread sinaliza periodicamente que o
+processo continua vivo (ver ProcessamentoJob.falhar_interrompidos).
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FilaProcessamento:
+    """Pool de workers que executa jobs de processamento dentro do app context."""
+
+    def __init__(self, app, handler, max_workers=None, sinalizar=None, intervalo_sinal=None):
+        """
+        Args:
+            app: Aplicação Flask (para abrir o app context nas threads)
+            handler: Função que recebe o id do job (e os argumentos extras de `enviar`)
+                e executa o pipeline
+            max_workers: Tamanho do pool (padrão: PROCESSAMENTO_WORKERS ou 4)
+            sinalizar: Função opcional chamada periodicamente com os ids dos jobs
+                pendentes ou em execução neste processo
+            intervalo_sinal: Segundos entre os sinais (padrão: PROCESSAMENTO_SINAL_SEGUNDOS ou 60)
+        """
+        self.app = app
+        self.handler = handler
+        self.max_workers = max_workers or int(os.environ.get('PROCESSAMENTO_WORKERS', '4'))
+        self.sinalizar = sinalizar
+        self.intervalo_sinal = intervalo_sinal or int(os.environ.get('PROCESSAMENTO_SINAL_SEGUNDOS', '60'))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._jobs = set()
+
+    def _get_executor(self):
+        """Cria o pool sob demanda (um por processo, pois threads não sobrevivem ao fork)."""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='processamento-nf'
+                )
+                self._pid = os.getpid()
+                self._jobs = set()
+                if self.sinalizar:
+                    threading.Thread(target=self._sinalizar_periodicamente, name='processamento-nf-sinal',
+                                     daemon=True).start()
+            return self._executor
+
+    def enviar(self, job_id, *args):
+        """Agenda a execução de um job."""
+        executor = self._get_executor()
+        with self._lock:
+            self._jobs.add(job_id)
+        return executor.submit(self._executar, job_id, *args)
+
+    def _executar(self, job_id, *args):
+        with self.app.app_context():
+            try:
+                self.handler(job_id, *args)
+            except Exception as e:
+                print(f"Erro inesperado no job {job_id}: {e}")
+            finally:
+                with self._lock:
+                    self._jobs.discard(job_id)
+
+    def _sinalizar_periodicamente(self):
+        """Sinaliza os jobs deste processo a cada intervalo_sinal segundos."""
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.intervalo_sinal)
+            with self._lock:
+                job_ids = list(self._jobs)
+            if not job_ids:
+                continue
+            with self.app.app_context():
+                try:
+                    self.sinalizar(job_ids)
+                except Exception as e:
+                    print(f"Erro ao sinalizar jobs de processamento: {e}")
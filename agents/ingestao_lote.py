@@ -0,0 +1,238 @@
+"""
+Ingestão em lote de notas fiscais (fechamento do mês).
+
+Recebe vários PDFs (ou arquivos .zip com PDFs) e executa o pipeline em três
+fases:
+1. Extração do texto dos PDFs em um pool de processos (PyPDF2 usa a CPU e
+   segura o GIL, então threads não ajudam); com um único processo, o texto é
+   extraído na própria thread, como nos jobs da aplicação web, que não devem
+   criar processos a partir de um worker com várias threads
+2. Extração dos dados com o Gemini com concorrência limitada
+3. Validação dos cadastros de todas as notas (opcional, duas consultas) e
+   gravação das notas no banco em uma única transação
+
+Quando um cache de extração é informado, PDFs (ou textos) já processados
+pulam as fases 1 e 2.
+"""
+import io
+import os
+import time
+import zipfile
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.utils import secure_filename
+
+from .extrator_pdf import extract_text_from_pdf
+from .processador_nota_fiscal import ProcessadorDeNotaFiscalTool
+from .agente_processador import AgenteProcessador
+
+
+def _extrair_texto_seguro(caminho):
+    """Extrai o texto de um PDF, devolvendo (texto, erro) em vez de propagar exceções."""
+    try:
+        return extract_text_from_pdf(caminho), None
+    except Exception as e:
+        return None, str(e)
+
+
+class IngestaoLote:
+    """Executa a ingestão de um lote de PDFs e gera um relatório por arquivo."""
+
+    def __init__(self, model, salvar_em_lote, max_processos=None, max_concorrencia_llm=None, cache=None,
+                 validar_em_lote=None):
+        """
+        Args:
+            model: Modelo Gemini usado na extração dos dados
+            salvar_em_lote: Função que recebe a lista de resultados (JSON) e
+                devolve a lista de ids das notas gravadas (None nas que falharam)
+            max_processos: Processos para extração de texto (padrão: LOTE_PROCESSOS ou nº de CPUs)
+            max_concorrencia_llm: Chamadas simultâneas ao Gemini (padrão: LOTE_LLM_CONCORRENCIA ou 4)
+            cache: CacheExtracao opcional (consultado e gravado na thread principal)
+            validar_em_lote: Função opcional que recebe a lista de resultados e
+                devolve, na mesma ordem, a situação do fornecedor, do faturado e
+                da classificação de cada nota (incluída no relatório em 'validacao')
+        """
+        self.model = model
+        self.salvar_em_lote = salvar_em_lote
+        self.cache = cache
+        self.validar_em_lote = validar_em_lote
+        self.max_processos = max_processos or int(os.environ.get('LOTE_PROCESSOS', os.cpu_count() or 2))
+        self.max_concorrencia_llm = max_concorrencia_llm or int(os.environ.get('LOTE_LLM_CONCORRENCIA', '4'))
+
+    @staticmethod
+    def expandir_arquivos(arquivos, diretorio):
+        """
+        Grava os arquivos recebidos em `diretorio`, descompactando os .zip.
+        Arquivos já gravados em disco (informados pelo caminho) não são copiados.
+
+        Args:
+            arquivos: Lista de tuplas (nome, bytes ou caminho do arquivo)
+            diretorio: Diretório temporário de trabalho
+
+        Returns:
+            Lista de tuplas (nome original, caminho local, SHA-256 do conteúdo, erro)
+            dos PDFs; arquivos .zip (ou PDFs dentro deles) que não puderam ser
+            lidos entram com caminho e SHA-256 None e a mensagem de erro
+        """
+        pdfs = []
+
+        def gravar(nome, conteudo):
+            caminho = os.path.join(diretorio, f"{len(pdfs):05d}_{secure_filename(os.path.basename(nome)) or 'nota.pdf'}")
+            with open(caminho, 'wb') as destino:
+                destino.write(conteudo)
+            pdfs.append((nome, caminho, hashlib.sha256(conteudo).hexdigest(), None))
+
+        for nome, conteudo in arquivos:
+            em_disco = isinstance(conteudo, (str, os.PathLike))
+            if nome.lower().endswith('.zip'):
+                try:
+                    zf = zipfile.ZipFile(conteudo if em_disco else io.BytesIO(conteudo))
+                except Exception as e:
+                    pdfs.append((nome, None, None, f'Arquivo .zip inválido: {e}'))
+                    continue
+                with zf:
+                    for info in zf.infolist():
+                        if not info.is_dir() and info.filename.lower().endswith('.pdf'):
+                            try:
+                                conteudo_pdf = zf.read(info)
+                            except Exception as e:
+                                pdfs.append((info.filename, None, None, f'Erro ao ler o PDF do arquivo {nome}: {e}'))
+                                continue
+                            gravar(info.filename, conteudo_pdf)
+            elif em_disco:
+                sha = hashlib.sha256()
+                with open(conteudo, 'rb') as origem:
+                    for bloco in iter(lambda: origem.read(1024 * 1024), b''):
+                        sha.update(bloco)
+                pdfs.append((nome, os.fspath(conteudo), sha.hexdigest(), None))
+            else:
+                gravar(nome, conteudo)
+
+        return pdfs
+
+    def _extrair_dados(self, texto):
+        """Extrai os dados de uma nota com o Gemini."""
+        processador_nf_tool = ProcessadorDeNotaFiscalTool(texto, self.model)
+        agente = AgenteProcessador({"processador_nf": processador_nf_tool})
+        return agente.executar_tarefa("Processar nota fiscal", texto)
+
+    def processar(self, arquivos, ao_iniciar_etapa=None):
+        """
+        Processa um lote de arquivos.
+
+        Args:
+            arquivos: Lista de tuplas (nome, bytes ou caminho) de PDFs ou .zip
+            ao_iniciar_etapa: Função opcional chamada com o nome de cada fase
+                (extracao_texto, extracao_dados, validacao, gravacao_banco)
+
+        Returns:
+            Dicionário com o relatório do lote (totais, tempos e status por arquivo)
+        """
+        tempos = {}
+        inicio_total = time.perf_counter()
+        ao_iniciar_etapa = ao_iniciar_etapa or (lambda etapa: None)
+
+        with tempfile.TemporaryDirectory(prefix='lote_nf_') as diretorio:
+            pdfs = self.expandir_arquivos(arquivos, diretorio)
+            relatorio = [{'arquivo': nome, 'success': False, 'nota_fiscal_id': None, 'error': erro, 'origem': None,
+                          'validacao': None}
+                         for nome, _, _, erro in pdfs]
+            chaves_pdf = [chave for _, _, chave, _ in pdfs]
+
+            # Cache nível 1: PDFs já processados
+            extraidos = []
+            a_extrair = []
+            for i, (_, caminho, chave, erro) in enumerate(pdfs):
+                if erro:
+                    continue
+                resultado = self.cache.buscar_pdf(chave) if self.cache else None
+                if resultado:
+                    relatorio[i]['origem'] = 'cache_pdf'
+                    extraidos.append((i, resultado))
+                else:
+                    a_extrair.append((i, caminho))
+
+            # 1. Extração de texto em paralelo (processos)
+            ao_iniciar_etapa('extracao_texto')
+            inicio = time.perf_counter()
+            caminhos = [caminho for _, caminho in a_extrair]
+            processos = min(self.max_processos, len(caminhos))
+            if processos <= 1:
+                textos = [_extrair_texto_seguro(caminho) for caminho in caminhos]
+            else:
+                with ProcessPoolExecutor(max_workers=processos) as executor:
+                    textos = list(executor.map(_extrair_texto_seguro, caminhos,
+                                               chunksize=max(1, len(caminhos) // (processos * 4))))
+            tempos['extracao_texto'] = round(time.perf_counter() - inicio, 3)
+
+        pendentes = []
+        for (i, _), (texto, erro) in zip(a_extrair, textos):
+            if erro:
+                relatorio[i]['error'] = erro
+            elif not texto or not texto.strip():
+                relatorio[i]['error'] = 'PDF sem texto extraível'
+            else:
+                # Cache nível 2: mesmo conteúdo em um PDF diferente
+                resultado = self.cache.buscar_texto(texto) if self.cache else None
+                if resultado:
+                    relatorio[i]['origem'] = 'cache_texto'
+                    extraidos.append((i, resultado))
+                    self.cache.salvar(resultado, chave_pdf=chaves_pdf[i])
+                else:
+                    pendentes.append((i, texto))
+
+        # 2. Extração dos dados com concorrência limitada
+        ao_iniciar_etapa('extracao_dados')
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia_llm) as executor:
+            futuros = [(i, texto, executor.submit(self._extrair_dados, texto)) for i, texto in pendentes]
+            for i, texto, futuro in futuros:
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    relatorio[i]['error'] = str(e)
+                    continue
+                if resultado:
+                    relatorio[i]['origem'] = 'llm'
+                    extraidos.append((i, resultado))
+                    if self.cache:
+                        self.cache.salvar(resultado, chave_pdf=chaves_pdf[i], texto=texto)
+                else:
+                    relatorio[i]['error'] = 'O agente falhou ao processar a nota fiscal.'
+        tempos['extracao_dados'] = round(time.perf_counter() - inicio, 3)
+        extraidos.sort(key=lambda item: item[0])
+
+        # 3. Validação dos cadastros e gravação em lote
+        if extraidos and self.validar_em_lote:
+            ao_iniciar_etapa('validacao')
+            inicio = time.perf_counter()
+            validacoes = self.validar_em_lote([resultado for _, resultado in extraidos])
+            for (i, _), validacao in zip(extraidos, validacoes):
+                relatorio[i]['validacao'] = validacao
+            tempos['validacao'] = round(time.perf_counter() - inicio, 3)
+
+        ao_iniciar_etapa('gravacao_banco')
+        inicio = time.perf_counter()
+        if extraidos:
+            ids = self.salvar_em_lote([resultado for _, resultado in extraidos])
+            for (i, _), nota_fiscal_id in zip(extraidos, ids):
+                if nota_fiscal_id:
+                    relatorio[i]['success'] = True
+                    relatorio[i]['nota_fiscal_id'] = nota_fiscal_id
+                else:
+                    relatorio[i]['error'] = 'Erro ao salvar no banco de dados'
+        tempos['gravacao_banco'] = round(time.perf_counter() - inicio, 3)
+        tempos['total'] = round(time.perf_counter() - inicio_total, 3)
+
+        sucesso = sum(1 for item in relatorio if item['success'])
+
+        return {
+            'success': True,
+            'total': len(relatorio),
+            'processados': sucesso,
+            'falhas': len(relatorio) - sucesso,
+            'cache_hits': sum(1 for item in relatorio if item['origem'] in ('cache_pdf', 'cache_texto')),
+            'tempos': tempos,
+            'arquivos': relatorio
+        }
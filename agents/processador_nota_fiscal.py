@@ -4,10 +4,49 @@ Ferramenta para extrair dados de notas fiscais usando a API do Gemini.
 import json
 import google.generativeai as genai
 
+# Categorias e regras de classificação, compartilhadas entre o prompt completo
+# e o prompt de complemento
+REGRAS_CLASSIFICACAO = """Categorias para Classificacao_Despesa:
+- INSUMOS_AGRICOLAS
+- MANUTENCAO_E_OPERACAO
+- RECURSOS_HUMANOS
+- SERVICOS_OPERACIONAIS
+- INFRASTRUTURA_E_UTILIDADES
+- ADMINISTRATIVAS
+- SEGUROS_E_PROTECAO
+- IMPOSTOS_E_TAXAS
+- INVESTIMENTOS
+- OUTROS
+
+Classifique a despesa de acordo com os produtos na nota fiscal:
+- Para itens como 'Sementes', 'Fertilizantes', 'Defensivos Agrícolas', 'Corretivos', classifique como **INSUMOS_AGRICOLAS**.
+- Para itens como 'Combustíveis', 'Lubrificantes', 'Peças', 'Parafusos', 'Manutenção de Máquinas', 'Pneus', 'Filtros', 'Correias', 'Ferramentas', 'Utensílios', classifique como **MANUTENCAO_E_OPERACAO**.
+- Para itens como 'Mão de Obra Temporária', 'Salários', 'Encargos', classifique como **RECURSOS_HUMANOS**.
+- Para itens como 'Frete', 'Transporte', 'Colheita Terceirizada', 'Secagem', 'Armazenagem', 'Pulverização', 'Aplicação', classifique como **SERVICOS_OPERACIONAIS**.
+- Para itens como 'Energia Elétrica', 'Arrendamento de Terras', 'Construções', 'Reformas', 'Materiais de Construção', classifique como **INFRASTRUTURA_E_UTILIDADES**.
+- Para itens como 'Honorários Contábeis', 'Honorários Advocatícios', 'Despesas Bancárias', 'Despesas Financeiras', classifique como **ADMINISTRATIVAS**.
+- Para itens como 'Seguro Agrícola', 'Seguro de Ativos', 'Seguro de Veículos', 'Seguro Prestamista', classifique como **SEGUROS_E_PROTECAO**.
+- Para itens como 'ITR', 'IPTU', 'IPVA', 'INCRA-CCIR', 'Impostos', 'Taxas', classifique como **IMPOSTOS_E_TAXAS**.
+- Para itens como 'Aquisição de Máquinas', 'Implementos', 'Veículos', 'Imóveis', 'Infraestrutura Rural', classifique como **INVESTIMENTOS**.
+- Para todos os outros itens que não se encaixem nas categorias acima, classifique como **OUTROS**."""
+
+
+# Valores de exemplo de cada campo no prompt de complemento
+EXEMPLOS_CAMPOS = {
+    "Data Emissao": "AAAA-MM-DD",
+    "Data de Validade": "AAAA-MM-DD",
+    "Descricao Produtos": ["Produto", "Produto"],
+    "Valor Total": 0.0,
+    "Quantidade de Parcelas": 0,
+}
+
 
 class ProcessadorDeNotaFiscalTool:
     """Ferramenta para extrair dados de notas fiscais usando a API do Gemini."""
 
+    # Incrementar sempre que o prompt mudar, para invalidar o cache de extração
+    VERSAO_PROMPT = '2'
+
     def __init__(self, invoice_text, model):
         self.invoice_text = invoice_text
         self.model = model
@@ -51,30 +90,43 @@ Abaixo está a estrutura do JSON, lembre-se que em 'Descricao Produtos' consider
 
 IMPORTANTE: Use "Classificacao_Despesa" (com underscore) como chave no JSON, não use "Classificacao Despesa".
 
-Categorias para Classificacao_Despesa:
-- INSUMOS_AGRICOLAS
-- MANUTENCAO_E_OPERACAO
-- RECURSOS_HUMANOS
-- SERVICOS_OPERACIONAIS
-- INFRASTRUTURA_E_UTILIDADES
-- ADMINISTRATIVAS
-- SEGUROS_E_PROTECAO
-- IMPOSTOS_E_TAXAS
-- INVESTIMENTOS
-- OUTROS
+{REGRAS_CLASSIFICACAO}
 
-Classifique a despesa de acordo com os produtos na nota fiscal:
-- Para itens como 'Sementes', 'Fertilizantes', 'Defensivos Agrícolas', 'Corretivos', classifique como **INSUMOS_AGRICOLAS**.
-- Para itens como 'Combustíveis', 'Lubrificantes', 'Peças', 'Parafusos', 'Manutenção de Máquinas', 'Pneus', 'Filtros', 'Correias', 'Ferramentas', 'Utensílios', classifique como **MANUTENCAO_E_OPERACAO**.
-- Para itens como 'Mão de Obra Temporária', 'Salários', 'Encargos', classifique como **RECURSOS_HUMANOS**.
-- Para itens como 'Frete', 'Transporte', 'Colheita Terceirizada', 'Secagem', 'Armazenagem', 'Pulverização', 'Aplicação', classifique como **SERVICOS_OPERACIONAIS**.
-- Para itens como 'Energia Elétrica', 'Arrendamento de Terras', 'Construções', 'Reformas', 'Materiais de Construção', classifique como **INFRASTRUTURA_E_UTILIDADES**.
-- Para itens como 'Honorários Contábeis', 'Honorários Advocatícios', 'Despesas Bancárias', 'Despesas Financeiras', classifique como **ADMINISTRATIVAS**.
-- Para itens como 'Seguro Agrícola', 'Seguro de Ativos', 'Seguro de Veículos', 'Seguro Prestamista', classifique como **SEGUROS_E_PROTECAO**.
-- Para itens como 'ITR', 'IPTU', 'IPVA', 'INCRA-CCIR', 'Impostos', 'Taxas', classifique como **IMPOSTOS_E_TAXAS**.
-- Para itens como 'Aquisição de Máquinas', 'Implementos', 'Veículos', 'Imóveis', 'Infraestrutura Rural', classifique como **INVESTIMENTOS**.
-- Para todos os outros itens que não se encaixem nas categorias acima, classifique como **OUTROS**.
+Texto da nota fiscal:
+{self.invoice_text}
+"""
+
+    def completar(self, parcial, campos):
+        """
+        Pede ao Gemini apenas os campos que a extração local não encontrou.
+
+        Args:
+            parcial: JSON já extraído localmente (mesma estrutura do prompt completo)
+            campos: Lista de caminhos dos campos faltantes, ex.: [('Fornecedor', 'Razao Social')]
+
+        Returns:
+            Dicionário com os campos faltantes (mesma estrutura aninhada) ou None
+        """
+        return self._processar_resposta(self._criar_prompt_complemento(parcial, campos))
+
+    def _criar_prompt_complemento(self, parcial, campos):
+        """Cria um prompt curto pedindo somente os campos faltantes."""
+        modelo = {}
+        for caminho in campos:
+            destino = modelo
+            for chave in caminho[:-1]:
+                destino = destino.setdefault(chave, {})
+            destino[caminho[-1]] = EXEMPLOS_CAMPOS.get(caminho[-1], "...")
+
+        regras = ""
+        if ('Classificacao_Despesa',) in campos:
+            regras = f"\nUse \"Classificacao_Despesa\" (com underscore) como chave.\n\n{REGRAS_CLASSIFICACAO}\n"
+
+        return f"""
+Complete os dados da nota fiscal abaixo. Responda apenas com um **objeto JSON** contendo somente estas chaves (decimais com ponto, datas em AAAA-MM-DD; em 'Descricao Produtos' somente a descrição, sem o código):
 
+{json.dumps(modelo, ensure_ascii=False, indent=2)}
+{regras}
 Texto da nota fiscal:
 {self.invoice_text}
 """
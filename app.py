@@ -4,7 +4,6 @@ Aplicação principal Flask para processamento de notas fiscais.
 import os
 from dotenv import load_dotenv
 from flask import Flask, redirect, url_for, request
-import google.generativeai as genai
 
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -21,7 +20,9 @@ GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
 
 
 def check_api_key():
-    """Verifica se a chave API está configurada."""
+    """Verifica se a chave API está configurada (o backend LLM local não precisa de chave)."""
+    if os.environ.get('LLM_BACKEND', 'gemini').lower() == 'local':
+        return True
     api_key = os.environ.get('GEMINI_API_KEY')
     return bool(api_key and api_key not in ['sua_chave_api_aqui', '', 'YOUR_API_KEY_HERE'])
 
@@ -82,15 +83,22 @@ def create_app():
         except Exception as e:
             print(f"⚠️  Aviso ao verificar/popular banco: {e}")
 
+    # Jobs de processamento interrompidos por uma reinicialização anterior
+    with app.app_context():
+        try:
+            from routes.web_routes import falhar_jobs_interrompidos
+            falhar_jobs_interrompidos()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  Aviso ao verificar jobs interrompidos: {e}")
+
     return app
 
 
 # Criação da aplicação
+# (a API Gemini é configurada pelo cliente compartilhado, ver agents/cliente_llm.py)
 app = create_app()
 
-# Configuração da API Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
 
 if __name__ == "__main__":
     if not os.path.exists(app.config['UPLOAD_FOLDER']):
@@ -0,0 +1,8 @@
+"""
+Formatação de valores para exibição (páginas web e respostas do RAG).
+"""
+
+
+def formatar_brl(valor):
+    """Formata um valor em reais no padrão brasileiro (R$ 1.234,56)."""
+    return 'R$ ' + f"{valor or 0:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
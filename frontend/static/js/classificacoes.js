@@ -1,63 +1,64 @@
 // Variáveis globais
 let classificacoesData = [];
 let ordemAscendente = true;
+let filtrosAtuais = '';
+let proximoCursor = null;
+let totalRegistros = 0;
 
 // Carregar todos os registros ATIVOS
 function carregarTodos() {
     const incluirInativos = document.getElementById('incluirInativos').checked;
-    const url = `/api/classificacoes?incluir_inativos=${incluirInativos}`;
-
-    fetch(url)
-        .then(response => response.json())
-        .then(result => {
-            if (result.success) {
-                classificacoesData = result.data;
-                renderizarTabela(classificacoesData);
-                atualizarContador(classificacoesData.length);
-            } else {
-                alert('Erro ao carregar classificações: ' + result.error);
-            }
-        })
-        .catch(error => {
-            console.error('Erro:', error);
-            alert('Erro ao carregar classificações');
-        });
+    carregarPagina(new URLSearchParams({ incluir_inativos: incluirInativos }).toString());
 }
 
-// Buscar com filtros
+// Buscar com filtros (tipo e busca aplicados no servidor)
 function carregarClassificacoes() {
-    const tipo = document.getElementById('filtroTipo').value;
-    const busca = document.getElementById('filtroBusca').value.toLowerCase();
-    const incluirInativos = document.getElementById('incluirInativos').checked;
+    const params = new URLSearchParams({
+        tipo: document.getElementById('filtroTipo').value,
+        busca: document.getElementById('filtroBusca').value.trim(),
+        incluir_inativos: document.getElementById('incluirInativos').checked
+    });
+    carregarPagina(params.toString());
+}
 
-    const url = `/api/classificacoes?tipo=${tipo}&incluir_inativos=${incluirInativos}`;
+// Carregar uma página (a primeira traz também o total; as seguintes continuam do cursor)
+function carregarPagina(filtros, after = null) {
+    const params = new URLSearchParams(filtros);
+    if (after) {
+        params.set('after', after);
+    } else {
+        params.set('total', 'true');
+    }
 
-    fetch(url)
+    fetch(`/api/classificacoes?${params}`)
         .then(response => response.json())
         .then(result => {
             if (result.success) {
-                let dados = result.data;
-
-                // Filtrar por busca local (descrição)
-                if (busca) {
-                    dados = dados.filter(c =>
-                        c.descricao.toLowerCase().includes(busca)
-                    );
+                classificacoesData = after ? classificacoesData.concat(result.data) : result.data;
+                if (!after) {
+                    totalRegistros = result.total;
                 }
-
-                classificacoesData = dados;
+                filtrosAtuais = filtros;
+                proximoCursor = result.proximo_cursor;
                 renderizarTabela(classificacoesData);
                 atualizarContador(classificacoesData.length);
             } else {
-                alert('Erro ao buscar classificações: ' + result.error);
+                alert('Erro ao carregar classificações: ' + result.error);
             }
         })
         .catch(error => {
             console.error('Erro:', error);
-            alert('Erro ao buscar classificações');
+            alert('Erro ao carregar classificações');
         });
 }
 
+// Carregar a próxima página
+function carregarMais() {
+    if (proximoCursor) {
+        carregarPagina(filtrosAtuais, proximoCursor);
+    }
+}
+
 // Renderizar tabela
 function renderizarTabela(dados) {
     const tbody = document.getElementById('tbodyClassificacoes');
@@ -231,6 +232,8 @@ function formatarData(dataISO) {
 }
 
 // Atualizar contador de registros
-function atualizarContador(total) {
-    document.getElementById('contadorRegistros').textContent = `${total} registro(s) encontrado(s)`;
+function atualizarContador(exibidos) {
+    document.getElementById('contadorRegistros').textContent =
+        `${exibidos} de ${totalRegistros} registro(s) encontrado(s)`;
+    document.getElementById('btnCarregarMais').style.display = proximoCursor ? '' : 'none';
 }
@@ -26,12 +26,143 @@ function setBadge(id, status) {
 // Função auxiliar para fazer requisições GET
 async function getJSON(url) {
     const res = await fetch(url, { headers: { 'Accept': 'application/json' } });
-    if (!res.ok) throw new Error('Falha: ' + res.status);
+    if (!res.ok) {
+        // Erros da API (ex.: filtro inválido, 400) trazem a mensagem em 'error'
+        const resp = await res.json().catch(() => null);
+        throw new Error((resp && resp.error) || 'Falha: ' + res.status);
+    }
     return await res.json();
 }
 
+// ==========================
+// Notas fiscais (paginadas no servidor)
+// ==========================
+const notas = {
+    filtros: '',
+    ordem: 'data_emissao',
+    direcao: 'desc',
+    proximoCursor: null,
+    exibidas: 0,
+    total: 0,
+    carregando: false,
+    consulta: 0  // descarta respostas de filtros/ordenações anteriores
+};
+
+// Monta uma linha da tabela (textContent evita interpretar HTML dos dados)
+function linhaNota(nota) {
+    const tr = document.createElement('tr');
+    const valor = (nota.valor_total || 0).toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' });
+    [nota.numero_nota, nota.fornecedor, nota.cnpj, nota.faturado, nota.data_emissao,
+     valor, nota.parcelas, nota.classificacao].forEach(campo => {
+        const td = document.createElement('td');
+        td.textContent = campo ?? '';
+        tr.appendChild(td);
+    });
+    return tr;
+}
+
+function atualizarContadorNotas() {
+    document.getElementById('contador-notas').textContent = `${notas.exibidas} de ${notas.total}`;
+    document.getElementById('fim-notas').textContent = notas.proximoCursor
+        ? 'Role para carregar mais...'
+        : (notas.total ? 'Fim da lista' : 'Nenhuma nota encontrada');
+}
+
+// Carrega a próxima página (ou a primeira, com o total) e acrescenta as linhas à tabela
+async function carregarNotas(primeira = false) {
+    if (notas.carregando && !primeira) return;
+    if (!primeira && !notas.proximoCursor) return;
+
+    const consulta = primeira ? ++notas.consulta : notas.consulta;
+    const params = new URLSearchParams(notas.filtros);
+    params.set('ordem', notas.ordem);
+    params.set('direcao', notas.direcao);
+    if (primeira) {
+        params.set('total', 'true');
+    } else {
+        params.set('after', notas.proximoCursor);
+    }
+
+    notas.carregando = true;
+    try {
+        const resp = await getJSON(`/api/notas?${params}`);
+        if (consulta !== notas.consulta) return;
+        if (!resp.success) throw new Error(resp.error);
+
+        const tbody = document.getElementById('tbody-notas');
+        if (primeira) {
+            tbody.innerHTML = '';
+            notas.exibidas = 0;
+            notas.total = resp.total;
+        }
+        const linhas = document.createDocumentFragment();
+        resp.data.forEach(nota => linhas.appendChild(linhaNota(nota)));
+        tbody.appendChild(linhas);
+        notas.exibidas += resp.data.length;
+        notas.proximoCursor = resp.proximo_cursor;
+        atualizarContadorNotas();
+    } catch (e) {
+        if (consulta === notas.consulta) {
+            document.getElementById('fim-notas').textContent = 'Erro ao carregar notas: ' + e.message;
+        }
+    } finally {
+        if (consulta === notas.consulta) notas.carregando = false;
+    }
+}
+
+function aplicarFiltrosNotas() {
+    const form = document.getElementById('filtros-notas');
+    const params = new URLSearchParams();
+    new FormData(form).forEach((valor, nome) => {
+        valor = valor.toString().trim();
+        if (nome === 'cnpj') valor = limparMascaraDocumento(valor);
+        if (valor) params.set(nome, valor);
+    });
+    notas.filtros = params.toString();
+    notas.proximoCursor = null;
+    document.getElementById('rolagem-notas').scrollTop = 0;
+    carregarNotas(true);
+}
+
+function ordenarNotas(ordem) {
+    if (notas.ordem === ordem) {
+        notas.direcao = notas.direcao === 'desc' ? 'asc' : 'desc';
+    } else {
+        notas.ordem = ordem;
+        notas.direcao = 'desc';
+    }
+    document.querySelectorAll('#rolagem-notas th.ordenavel').forEach(th => {
+        th.querySelector('.seta').textContent =
+            th.dataset.ordem === notas.ordem ? (notas.direcao === 'desc' ? '▼' : '▲') : '';
+    });
+    aplicarFiltrosNotas();
+}
+
+function iniciarNotas() {
+    const form = document.getElementById('filtros-notas');
+    form.addEventListener('submit', (e) => {
+        e.preventDefault();
+        aplicarFiltrosNotas();
+    });
+    form.addEventListener('reset', () => setTimeout(aplicarFiltrosNotas));
+
+    document.querySelectorAll('#rolagem-notas th.ordenavel').forEach(th => {
+        th.addEventListener('click', () => ordenarNotas(th.dataset.ordem));
+    });
+
+    // Próxima página quando o fim da tabela aparece na área de rolagem
+    const observer = new IntersectionObserver((entradas) => {
+        if (entradas.some(entrada => entrada.isIntersecting)) carregarNotas();
+    }, { root: document.getElementById('rolagem-notas'), rootMargin: '200px' });
+    observer.observe(document.getElementById('fim-notas'));
+
+    carregarNotas(true);
+}
+
 // Inicialização quando a página carrega
 document.addEventListener('DOMContentLoaded', function() {
+    iniciarNotas();
+
     // Event listener para consulta de pessoas
     document.getElementById('btn-consultar-pessoas').addEventListener('click', async () => {
         const tipo = document.getElementById('tipoPessoa').value;
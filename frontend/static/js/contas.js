@@ -1,86 +1,73 @@
 // Variáveis globais
 let movimentosData = [];
 let ordemAscendente = true;
-let pessoas = [];
-let classificacoes = [];
+let filtrosAtuais = '';
+let proximoCursor = null;
+let totalRegistros = 0;
 
-// Carregar dados auxiliares (pessoas e classificações)
-async function carregarDadosAuxiliares() {
-    try {
-        const [resPessoas, resClassificacoes] = await Promise.all([
-            fetch('/api/pessoas?incluir_inativos=false'),
-            fetch('/api/classificacoes?incluir_inativos=false')
-        ]);
-
-        const resultPessoas = await resPessoas.json();
-        const resultClassificacoes = await resClassificacoes.json();
-
-        if (resultPessoas.success) {
-            pessoas = resultPessoas.data;
-        }
-
-        if (resultClassificacoes.success) {
-            classificacoes = resultClassificacoes.data;
-        }
-    } catch (error) {
-        console.error('Erro ao carregar dados auxiliares:', error);
-    }
-}
+// Opções dos campos do modal: buscadas no servidor por tipo e texto, em vez de carregar todos os cadastros
+const TIPOS_FORNECEDOR_CLIENTE = 'FORNECEDOR,CLIENTE,CLIENTE-FORNECEDOR';
+const TIPOS_FATURADO = 'FATURADO,CLIENTE-FORNECEDOR';
+const LIMITE_OPCOES = 50;
+let temporizadorBusca = null;
 
 // Carregar todos os registros ATIVOS
 function carregarTodos() {
     const incluirInativos = document.getElementById('incluirInativos').checked;
-    const url = `/api/movimentos?incluir_inativos=${incluirInativos}`;
-
-    fetch(url)
-        .then(response => response.json())
-        .then(result => {
-            if (result.success) {
-                movimentosData = result.data;
-                renderizarTabela(movimentosData);
-                atualizarContador(movimentosData.length);
-            } else {
-                alert('Erro ao carregar movimentos: ' + result.error);
-            }
-        })
-        .catch(error => {
-            console.error('Erro:', error);
-            alert('Erro ao carregar movimentos');
-        });
+    carregarPagina(new URLSearchParams({ incluir_inativos: incluirInativos }).toString());
 }
 
-// Buscar com filtros
+// Buscar com filtros (tipo e ID mínimo aplicados no servidor)
 function carregarMovimentos() {
-    const tipo = document.getElementById('filtroTipo').value;
+    const params = new URLSearchParams({
+        tipo: document.getElementById('filtroTipo').value,
+        incluir_inativos: document.getElementById('incluirInativos').checked
+    });
     const idMin = document.getElementById('filtroIdMin').value;
-    const incluirInativos = document.getElementById('incluirInativos').checked;
+    if (idMin) {
+        params.set('id_min', idMin);
+    }
+    carregarPagina(params.toString());
+}
 
-    const url = `/api/movimentos?tipo=${tipo}&incluir_inativos=${incluirInativos}`;
+// Carregar uma página (a primeira traz também o total; as seguintes continuam do cursor)
+function carregarPagina(filtros, after = null) {
+    const params = new URLSearchParams(filtros);
+    if (after) {
+        params.set('after', after);
+    } else {
+        params.set('total', 'true');
+    }
 
-    fetch(url)
+    fetch(`/api/movimentos?${params}`)
         .then(response => response.json())
         .then(result => {
             if (result.success) {
-                let dados = result.data;
-
-                // Filtrar por ID mínimo
-                if (idMin) {
-                    dados = dados.filter(m => m.id >= parseInt(idMin));
+                movimentosData = after ? movimentosData.concat(result.data) : result.data;
+                if (!after) {
+                    totalRegistros = result.total;
                 }
-
-                movimentosData = dados;
+                filtrosAtuais = filtros;
+                proximoCursor = result.proximo_cursor;
                 renderizarTabela(movimentosData);
                 atualizarContador(movimentosData.length);
             } else {
-                alert('Erro ao buscar movimentos: ' + result.error);
+                alert('Erro ao carregar movimentos: ' + result.error);
             }
         })
         .catch(error => {
             console.error('Erro:', error);
-            alert('Erro ao buscar movimentos');
+            alert('Erro ao carregar movimentos');
         });
 }
 
+// Carregar a próxima página
+function carregarMais() {
+    if (proximoCursor) {
+        carregarPagina(filtrosAtuais, proximoCursor);
+    }
+}
+
 // Renderizar tabela
 function renderizarTabela(dados) {
     const tbody = document.getElementById('tbodyMovimentos');
@@ -154,41 +141,38 @@ function ordenarTabela(coluna) {
 }
 
 // Abrir modal para criar
-async function abrirModalCriar() {
-    await carregarDadosAuxiliares();
-
+function abrirModalCriar() {
     document.getElementById('modalTitulo').textContent = 'Novo Movimento';
     document.getElementById('formMovimento').reset();
     document.getElementById('movimentoId').value = '';
     document.getElementById('movimentoStatus').value = 'ATIVO';
 
-    popularSelectPessoas();
-    popularCheckboxesClassificacoes([]);
+    popularSelectPessoa('movimentoFornecedorCliente', TIPOS_FORNECEDOR_CLIENTE);
+    popularSelectPessoa('movimentoFaturado', TIPOS_FATURADO);
+    popularCheckboxesClassificacoes('', []);
 
     $('#modalMovimento').modal('show');
 }
 
 // Abrir modal para editar
-async function abrirModalEditar(id) {
-    await carregarDadosAuxiliares();
-
+function abrirModalEditar(id) {
     fetch(`/api/movimentos/${id}`)
         .then(response => response.json())
         .then(result => {
             if (result.success) {
                 const movimento = result.data;
+                document.getElementById('formMovimento').reset();
                 document.getElementById('modalTitulo').textContent = 'Editar Movimento';
                 document.getElementById('movimentoId').value = movimento.id;
                 document.getElementById('movimentoTipo').value = movimento.tipo;
                 document.getElementById('movimentoValor').value = movimento.valor;
                 document.getElementById('movimentoStatus').value = movimento.status;
 
-                popularSelectPessoas();
-                document.getElementById('movimentoFornecedorCliente').value = movimento.fornecedor_cliente_id;
-                document.getElementById('movimentoFaturado').value = movimento.faturado_id;
-
-                const classificacaoIds = movimento.classificacoes.map(c => c.id);
-                popularCheckboxesClassificacoes(classificacaoIds);
+                popularSelectPessoa('movimentoFornecedorCliente', TIPOS_FORNECEDOR_CLIENTE, '',
+                    { id: movimento.fornecedor_cliente_id, texto: movimento.fornecedor_cliente_nome });
+                popularSelectPessoa('movimentoFaturado', TIPOS_FATURADO, '',
+                    { id: movimento.faturado_id, texto: movimento.faturado_nome });
+                popularCheckboxesClassificacoes('', movimento.classificacoes);
 
                 $('#modalMovimento').modal('show');
             } else {
@@ -201,36 +185,98 @@ async function abrirModalEditar(id) {
         });
 }
 
-// Popular select de pessoas
-function popularSelectPessoas() {
-    const selectFornecedor = document.getElementById('movimentoFornecedorCliente');
-    const selectFaturado = document.getElementById('movimentoFaturado');
+// Buscar opções ATIVAS no servidor (primeira página, filtrada por tipo e texto)
+async function buscarOpcoes(api, tipos, busca) {
+    const params = new URLSearchParams({ limit: LIMITE_OPCOES });
+    if (tipos) {
+        params.set('tipo', tipos);
+    }
+    if (busca) {
+        params.set('busca', busca);
+    }
 
-    const fornecedoresClientes = pessoas.filter(p =>
-        p.tipo === 'FORNECEDOR' || p.tipo === 'CLIENTE' || p.tipo === 'CLIENTE-FORNECEDOR'
-    );
-    const faturados = pessoas.filter(p => p.tipo === 'FATURADO' || p.tipo === 'CLIENTE-FORNECEDOR');
+    const response = await fetch(`${api}?${params}`);
+    const result = await response.json();
+    if (!result.success) {
+        throw new Error(result.error);
+    }
+    return result.data;
+}
 
-    selectFornecedor.innerHTML = '<option value="">Selecione...</option>' +
-        fornecedoresClientes.map(p => `<option value="${p.id}">${p.razao_social} (${p.cpf_cnpj})</option>`).join('');
+// Aguardar o usuário parar de digitar antes de buscar
+function buscarAoDigitar(funcao) {
+    clearTimeout(temporizadorBusca);
+    temporizadorBusca = setTimeout(funcao, 300);
+}
+
+// Popular select de pessoas (mantém a pessoa selecionada, mesmo que não esteja entre as encontradas)
+async function popularSelectPessoa(selectId, tipos, busca = '', selecionada = null) {
+    const select = document.getElementById(selectId);
+    if (!selecionada && select.value) {
+        selecionada = { id: parseInt(select.value), texto: select.options[select.selectedIndex].text };
+    }
+
+    try {
+        const opcoes = (await buscarOpcoes('/api/pessoas', tipos, busca))
+            .map(p => ({ id: p.id, texto: `${p.razao_social} (${p.cpf_cnpj})` }));
+        if (selecionada && selecionada.id && !opcoes.some(o => o.id === selecionada.id)) {
+            opcoes.unshift(selecionada);
+        }
 
-    selectFaturado.innerHTML = '<option value="">Selecione...</option>' +
-        faturados.map(p => `<option value="${p.id}">${p.razao_social} (${p.cpf_cnpj})</option>`).join('');
+        select.innerHTML = '<option value="">Selecione...</option>' +
+            opcoes.map(o => `<option value="${o.id}">${o.texto}</option>`).join('');
+        if (selecionada && selecionada.id) {
+            select.value = selecionada.id;
+        }
+    } catch (error) {
+        console.error('Erro ao carregar pessoas:', error);
+    }
+}
+
+function filtrarFornecedoresClientes() {
+    const busca = document.getElementById('buscaFornecedorCliente').value.trim();
+    buscarAoDigitar(() => popularSelectPessoa('movimentoFornecedorCliente', TIPOS_FORNECEDOR_CLIENTE, busca));
+}
+
+function filtrarFaturados() {
+    const busca = document.getElementById('buscaFaturado').value.trim();
+    buscarAoDigitar(() => popularSelectPessoa('movimentoFaturado', TIPOS_FATURADO, busca));
+}
+
+// Classificações marcadas na lista atual (preservadas ao refazer a busca)
+function classificacoesMarcadas() {
+    const checkboxes = document.querySelectorAll('#classificacoesCheckboxes input[type="checkbox"]:checked');
+    return Array.from(checkboxes).map(cb => ({
+        id: parseInt(cb.value),
+        tipo: cb.dataset.tipo,
+        descricao: cb.dataset.descricao
+    }));
 }
 
-// Popular checkboxes de classificações
-function popularCheckboxesClassificacoes(classificacaoIdsSelecionadas) {
+// Popular checkboxes de classificações: as marcadas primeiro, depois as encontradas pela busca
+async function popularCheckboxesClassificacoes(busca, selecionadas) {
     const container = document.getElementById('classificacoesCheckboxes');
 
-    if (classificacoes.length === 0) {
+    let encontradas = [];
+    try {
+        encontradas = await buscarOpcoes('/api/classificacoes', null, busca);
+    } catch (error) {
+        console.error('Erro ao carregar classificações:', error);
+    }
+
+    const idsSelecionados = selecionadas.map(c => c.id);
+    const lista = selecionadas.concat(encontradas.filter(c => !idsSelecionados.includes(c.id)));
+
+    if (lista.length === 0) {
         container.innerHTML = '<p class="text-muted">Nenhuma classificação disponível</p>';
         return;
     }
 
-    container.innerHTML = classificacoes.map(c => `
+    container.innerHTML = lista.map(c => `
         <div class="form-check">
             <input class="form-check-input" type="checkbox" value="${c.id}" id="class_${c.id}"
-                   ${classificacaoIdsSelecionadas.includes(c.id) ? 'checked' : ''}>
+                   data-tipo="${c.tipo}" data-descricao="${c.descricao}"
+                   ${idsSelecionados.includes(c.id) ? 'checked' : ''}>
             <label class="form-check-label" for="class_${c.id}">
                 <span class="badge badge-${c.tipo === 'RECEITA' ? 'success' : 'warning'}">${c.tipo}</span>
                 ${c.descricao}
@@ -239,6 +285,11 @@ function popularCheckboxesClassificacoes(classificacaoIdsSelecionadas) {
     `).join('');
 }
 
+function filtrarClassificacoes() {
+    const busca = document.getElementById('buscaClassificacao').value.trim();
+    buscarAoDigitar(() => popularCheckboxesClassificacoes(busca, classificacoesMarcadas()));
+}
+
 // Salvar movimento (criar ou atualizar)
 function salvarMovimento() {
     const id = document.getElementById('movimentoId').value;
@@ -354,9 +405,8 @@ function formatarData(dataISO) {
 }
 
 // Atualizar contador de registros
-function atualizarContador(total) {
-    document.getElementById('contadorRegistros').textContent = `${total} registro(s) encontrado(s)`;
+function atualizarContador(exibidos) {
+    document.getElementById('contadorRegistros').textContent =
+        `${exibidos} de ${totalRegistros} registro(s) encontrado(s)`;
+    document.getElementById('btnCarregarMais').style.display = proximoCursor ? '' : 'none';
 }
-
-// Carregar dados auxiliares ao carregar a página
-document.addEventListener('DOMContentLoaded', carregarDadosAuxiliares);
@@ -1,64 +1,64 @@
 // Variáveis globais
 let pessoasData = [];
 let ordemAscendente = true;
+let filtrosAtuais = '';
+let proximoCursor = null;
+let totalRegistros = 0;
 
 // Carregar todos os registros ATIVOS
 function carregarTodos() {
     const incluirInativos = document.getElementById('incluirInativos').checked;
-    const url = `/api/pessoas?incluir_inativos=${incluirInativos}`;
-
-    fetch(url)
-        .then(response => response.json())
-        .then(result => {
-            if (result.success) {
-                pessoasData = result.data;
-                renderizarTabela(pessoasData);
-                atualizarContador(pessoasData.length);
-            } else {
-                alert('Erro ao carregar pessoas: ' + result.error);
-            }
-        })
-        .catch(error => {
-            console.error('Erro:', error);
-            alert('Erro ao carregar pessoas');
-        });
+    carregarPagina(new URLSearchParams({ incluir_inativos: incluirInativos }).toString());
 }
 
-// Buscar com filtros
+// Buscar com filtros (tipo e busca aplicados no servidor)
 function carregarPessoas() {
-    const tipo = document.getElementById('filtroTipo').value;
-    const busca = document.getElementById('filtroBusca').value.toLowerCase();
-    const incluirInativos = document.getElementById('incluirInativos').checked;
+    const params = new URLSearchParams({
+        tipo: document.getElementById('filtroTipo').value,
+        busca: document.getElementById('filtroBusca').value.trim(),
+        incluir_inativos: document.getElementById('incluirInativos').checked
+    });
+    carregarPagina(params.toString());
+}
 
-    const url = `/api/pessoas?tipo=${tipo}&incluir_inativos=${incluirInativos}`;
+// Carregar uma página (a primeira traz também o total; as seguintes continuam do cursor)
+function carregarPagina(filtros, after = null) {
+    const params = new URLSearchParams(filtros);
+    if (after) {
+        params.set('after', after);
+    } else {
+        params.set('total', 'true');
+    }
 
-    fetch(url)
+    fetch(`/api/pessoas?${params}`)
         .then(response => response.json())
         .then(result => {
             if (result.success) {
-                let dados = result.data;
-
-                // Filtrar por busca local (razão social ou CPF/CNPJ)
-                if (busca) {
-                    dados = dados.filter(p =>
-                        p.razao_social.toLowerCase().includes(busca) ||
-                        p.cpf_cnpj.includes(busca)
-                    );
+                pessoasData = after ? pessoasData.concat(result.data) : result.data;
+                if (!after) {
+                    totalRegistros = result.total;
                 }
-
-                pessoasData = dados;
+                filtrosAtuais = filtros;
+                proximoCursor = result.proximo_cursor;
                 renderizarTabela(pessoasData);
                 atualizarContador(pessoasData.length);
             } else {
-                alert('Erro ao buscar pessoas: ' + result.error);
+                alert('Erro ao carregar pessoas: ' + result.error);
             }
         })
         .catch(error => {
             console.error('Erro:', error);
-            alert('Erro ao buscar pessoas');
+            alert('Erro ao carregar pessoas');
         });
 }
 
+// Carregar a próxima página
+function carregarMais() {
+    if (proximoCursor) {
+        carregarPagina(filtrosAtuais, proximoCursor);
+    }
+}
+
 // Renderizar tabela
 function renderizarTabela(dados) {
     const tbody = document.getElementById('tbodyPessoas');
@@ -232,6 +232,8 @@ function formatarData(dataISO) {
 }
 
 // Atualizar contador de registros
-function atualizarContador(total) {
-    document.getElementById('contadorRegistros').textContent = `${total} registro(s) encontrado(s)`;
+function atualizarContador(exibidos) {
+    document.getElementById('contadorRegistros').textContent =
+        `${exibidos} de ${totalRegistros} registro(s) encontrado(s)`;
+    document.getElementById('btnCarregarMais').style.display = proximoCursor ? '' : 'none';
 }
@@ -0,0 +1,55 @@
+/**
+ * Script para a página de acompanhamento do processamento de nota fiscal
+ */
+
+// Intervalo entre consultas de status (ms)
+const INTERVALO_CONSULTA = 1500;
+
+const NOMES_ETAPAS = {
+    extracao_texto: 'Extraindo texto do PDF...',
+    extracao_dados: 'Extraindo dados com IA...',
+    gravacao_banco: 'Salvando no banco de dados...'
+};
+
+function formatarTempos(tempos) {
+    const partes = Object.keys(tempos || {}).map(etapa => etapa + ': ' + tempos[etapa].toFixed(2) + 's');
+    return partes.length ? partes.join(' | ') : '—';
+}
+
+function consultarStatus() {
+    fetch(jobStatusUrl)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error || 'Erro ao consultar o job');
+            }
+
+            const job = data.data;
+            document.getElementById('job-status').textContent = job.status;
+            document.getElementById('job-tempos').textContent = formatarTempos(job.tempos);
+
+            if (job.status === 'CONCLUIDO') {
+                window.location.href = job.resultado_url;
+                return;
+            }
+
+            if (job.status === 'ERRO') {
+                document.getElementById('job-loading').style.display = 'none';
+                document.getElementById('job-status').className = 'status-badge status-error';
+                document.getElementById('job-feedback').textContent = 'Erro ao processar a nota fiscal: ' + (job.erro || '');
+                document.getElementById('job-feedback').className = 'feedback-text erro';
+                return;
+            }
+
+            document.getElementById('job-etapa').textContent = NOMES_ETAPAS[job.etapa] || 'Aguardando processamento...';
+            setTimeout(consultarStatus, INTERVALO_CONSULTA);
+        })
+        .catch(error => {
+            console.error('Erro ao consultar status:', error);
+            document.getElementById('job-feedback').textContent = 'Erro ao consultar status: ' + error.message;
+            document.getElementById('job-feedback').className = 'feedback-text erro';
+            setTimeout(consultarStatus, INTERVALO_CONSULTA * 2);
+        });
+}
+
+document.addEventListener('DOMContentLoaded', consultarStatus);
@@ -159,23 +159,25 @@ async function handleAskQuestion() {
         const response = await fetch('/api/rag/ask', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
             },
             body: JSON.stringify({
                 question: question,
-                method: state.currentMethod
+                method: state.currentMethod,
+                stream: true
             })
         });
 
-        const data = await response.json();
-
-        hideLoading();
-
-        if (data.success) {
-            showResponse(data);
-        } else {
+        // Erros de validação continuam vindo como JSON
+        if (!response.ok || !response.body) {
+            const data = await response.json();
+            hideLoading();
             showError(data.error || 'Erro ao processar pergunta');
+            return;
         }
+
+        await readAnswerStream(response);
     } catch (error) {
         hideLoading();
         console.error('Erro ao fazer pergunta:', error);
@@ -183,6 +185,81 @@ async function handleAskQuestion() {
     }
 }
 
+/**
+ * Lê a resposta em SSE: 'meta' com os dados recuperados, 'token' com cada
+ * trecho gerado pelo LLM e 'done' ou 'error' ao final
+ */
+async function readAnswerStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let finished = false;
+
+    while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        // Eventos SSE são separados por uma linha em branco
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+            finished = handleStreamEvent(parseStreamEvent(frame)) || finished;
+        }
+    }
+
+    if (state.isLoading) {
+        hideLoading();
+    }
+}
+
+/**
+ * Converte um bloco SSE em { event, data }
+ */
+function parseStreamEvent(frame) {
+    let event = 'message';
+    const dataLines = [];
+
+    frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+
+    return { event: event, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : {} };
+}
+
+/**
+ * Atualiza a interface com um evento do stream; retorna true no evento final
+ */
+function handleStreamEvent({ event, data }) {
+    switch (event) {
+        case 'meta':
+            if (data.success) {
+                hideLoading();
+                showResponse(Object.assign({}, data, { answer: '' }));
+            }
+            return false;
+        case 'token':
+            elements.responseContent.textContent += data.text;
+            return false;
+        case 'done':
+            hideLoading();
+            return true;
+        case 'error':
+            hideLoading();
+            showError(data.error || 'Erro ao processar pergunta');
+            return true;
+        default:
+            return false;
+    }
+}
+
 /**
  * Mostra o indicador de loading
  */
@@ -222,6 +299,13 @@ function showResponse(data) {
             method: data.method,
             data_retrieved: data.data_retrieved
         }, null, 2);
+    } else if (data.documents) {
+        elements.responseMetadata.style.display = 'block';
+        elements.metadataContent.textContent = JSON.stringify({
+            method: data.method,
+            documents_retrieved: data.documents_retrieved,
+            documents: data.documents
+        }, null, 2);
     } else {
         elements.responseMetadata.style.display = 'none';
     }
@@ -9,6 +9,12 @@ from . import parcelas_contas
 from . import movimento_contas
 from . import nota_fiscal
 from . import document_embeddings
+from . import processamento_job
+from . import extracao_cache
+from . import versao_dados
+from . import resposta_cache
+from . import resumo_mensal
+from . import migracao
 
 def init_db(app):
     db.init_app(app)
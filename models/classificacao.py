@@ -1,5 +1,6 @@
 from . import db
 from datetime import datetime
+from .paginacao import paginar
 
 class Classificacao(db.Model):
     """
@@ -10,6 +11,15 @@ class Classificacao(db.Model):
     descricao = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(20), default='ATIVO', nullable=False)  # ATIVO, INATIVO
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Listagem paginada por (data_cadastro, id), com ou sem filtro de tipo
+        db.Index('idx_classificacao_status_data_cadastro_id', 'status', 'data_cadastro', 'id'),
+        db.Index('idx_classificacao_status_tipo_data_cadastro_id', 'status', 'tipo', 'data_cadastro', 'id'),
+        # verificar_existencia (apenas ativas)
+        db.Index('idx_classificacao_tipo_descricao_ativo', 'tipo', 'descricao',
+                 postgresql_where=db.text("status = 'ATIVO'")),
+    )
     
     def __repr__(self):
         return f'<Classificacao {self.descricao}>'
@@ -25,6 +35,29 @@ class Classificacao(db.Model):
             query = query.filter_by(status='ATIVO')
         return query.first()
 
+    @classmethod
+    def buscar_por_descricoes(cls, tipo, descricoes, incluir_inativos=False):
+        """
+        Busca as classificações de um tipo por várias descrições em uma única
+        consulta. Por padrão, retorna apenas registros com status ATIVO.
+
+        Returns:
+            Dicionário {descricao: classificação de menor id} (apenas as encontradas)
+        """
+        descricoes = {descricao for descricao in descricoes if descricao}
+        if not descricoes:
+            return {}
+        query = cls.query.filter(cls.tipo == tipo, cls.descricao.in_(descricoes))
+        if not incluir_inativos:
+            query = query.filter(cls.status == 'ATIVO')
+        # Sem ORDER BY: a consulta usa o índice (tipo, descricao) em vez de percorrer a chave primária
+        classificacoes = {}
+        for classificacao in query:
+            atual = classificacoes.get(classificacao.descricao)
+            if atual is None or classificacao.id < atual.id:
+                classificacoes[classificacao.descricao] = classificacao
+        return classificacoes
+
     @classmethod
     def criar_nova(cls, tipo, descricao, status='ATIVO'):
         """
@@ -52,6 +85,26 @@ class Classificacao(db.Model):
             query = query.filter_by(tipo=tipo)
         return query.order_by(cls.data_cadastro.desc()).all()
 
+    @classmethod
+    def listar_pagina(cls, tipos=None, busca=None, incluir_inativos=False, after=None, limit=None, contar=False):
+        """
+        Lista uma página de classificações, das cadastradas mais recentemente
+        para as mais antigas (ver models.paginacao).
+        Filtros: tipos (lista), busca (parte da descrição) e, por padrão,
+        apenas registros com status ATIVO.
+
+        Returns:
+            Tupla (classificações, proximo_cursor, total ou None)
+        """
+        query = cls.query
+        if not incluir_inativos:
+            query = query.filter(cls.status == 'ATIVO')
+        if tipos:
+            query = query.filter(cls.tipo.in_(tipos))
+        if busca:
+            query = query.filter(cls.descricao.icontains(busca, autoescape=True))
+        return paginar(query, cls.data_cadastro, cls.id, after=after, limit=limit, contar=contar)
+
     def atualizar(self, **kwargs):
         """
         Atualiza os campos da classificação
@@ -26,8 +26,9 @@ class DocumentEmbedding(db.Model):
     content = db.Column(Text, nullable=False)
 
     # Embedding vetorial (array de floats)
-    # Para pgvector, seria: db.Column(Vector(768))
-    # Por ora, usamos ARRAY de floats do PostgreSQL
+    # Com RAG_VECTOR_BACKEND=pgvector, a coluna embedding_vec (vector(768)),
+    # criada por scripts/migration_pgvector.sql, é mantida sincronizada com
+    # esta por um trigger e usada para a busca aproximada (HNSW)
     embedding = db.Column(ARRAY(db.Float), nullable=False)
 
     # Dimensionalidade do vetor (768 para text-embedding-004 do Gemini)
@@ -36,6 +37,9 @@ class DocumentEmbedding(db.Model):
     # Modelo usado para gerar o embedding
     embedding_model = db.Column(db.String(100), nullable=False, default='models/text-embedding-004')
 
+    # Hash SHA-256 do conteúdo indexado (permite reindexação incremental)
+    content_hash = db.Column(db.String(64), nullable=True)
+
     # Metadados adicionais em JSON
     meta = db.Column(db.JSON, nullable=True)
 
@@ -50,7 +54,8 @@ class DocumentEmbedding(db.Model):
         return f'<DocumentEmbedding {self.id} - {self.document_type}>'
 
     @classmethod
-    def criar_novo(cls, document_id, document_type, content, embedding, meta=None, embedding_model=None):
+    def criar_novo(cls, document_id, document_type, content, embedding, meta=None, embedding_model=None,
+                   content_hash=None):
         """
         Cria um novo embedding de documento.
 
@@ -61,6 +66,7 @@ class DocumentEmbedding(db.Model):
             embedding: Lista/array de floats representando o vetor
             meta: Metadados adicionais (dict)
             embedding_model: Nome do modelo usado (opcional)
+            content_hash: Hash do conteúdo indexado (opcional)
 
         Returns:
             Instância do DocumentEmbedding criado
@@ -72,6 +78,7 @@ class DocumentEmbedding(db.Model):
             embedding=embedding,
             embedding_dimension=len(embedding),
             embedding_model=embedding_model or 'models/text-embedding-004',
+            content_hash=content_hash,
             meta=meta or {}
         )
 
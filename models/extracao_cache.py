@@ -0,0 +1,40 @@
+from . import db
+from datetime import datetime
+
+class ExtracaoCache(db.Model):
+    """
+    Modelo para armazenar resultados de extração de notas fiscais, endereçados
+    pelo hash SHA-256 do PDF (nivel PDF) ou do texto normalizado (nivel TEXTO)
+    """
+    __tablename__ = 'extracao_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nivel = db.Column(db.String(10), nullable=False)  # PDF, TEXTO
+    chave = db.Column(db.String(64), nullable=False)  # SHA-256 em hexadecimal
+    modelo = db.Column(db.String(100), nullable=False)
+    versao_prompt = db.Column(db.String(20), nullable=False)
+    resultado = db.Column(db.JSON, nullable=False)
+    tamanho = db.Column(db.Integer, default=0)  # Tamanho do resultado serializado, em bytes
+    acessos = db.Column(db.Integer, default=0, nullable=False)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    ultimo_acesso = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('nivel', 'chave', 'modelo', 'versao_prompt', name='uq_extracao_cache_chave'),
+        db.Index('idx_extracao_cache_ultimo_acesso', 'ultimo_acesso'),
+    )
+
+    def __repr__(self):
+        return f'<ExtracaoCache {self.nivel} {self.chave[:12]}>'
+
+    @classmethod
+    def buscar(cls, nivel, chave, modelo, versao_prompt):
+        """
+        Busca um resultado em cache pela chave, modelo e versão do prompt
+        """
+        return cls.query.filter_by(
+            nivel=nivel,
+            chave=chave,
+            modelo=modelo,
+            versao_prompt=versao_prompt
+        ).first()
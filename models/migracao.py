@@ -0,0 +1,24 @@
+from . import db
+from datetime import datetime
+
+
+class MigracaoAplicada(db.Model):
+    """
+    Registro das migrações SQL (scripts/migration_*.sql) já aplicadas ao banco
+    por scripts/migrar.py, com o checksum do arquivo no momento da aplicação
+    """
+    __tablename__ = 'schema_migracoes'
+
+    versao = db.Column(db.String(10), primary_key=True)  # Ex.: '0003'
+    arquivo = db.Column(db.String(255), nullable=False)
+    checksum = db.Column(db.String(64), nullable=False)  # SHA-256 do arquivo
+    executada = db.Column(db.Boolean, default=True, nullable=False)  # False: apenas marcada (--marcar-aplicadas)
+    aplicada_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MigracaoAplicada {self.versao} {self.arquivo}>'
+
+    @classmethod
+    def aplicadas(cls):
+        """Retorna {versao: registro} das migrações já aplicadas"""
+        return {migracao.versao: migracao for migracao in cls.query.all()}
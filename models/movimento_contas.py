@@ -1,5 +1,7 @@
 from . import db
 from datetime import datetime
+from sqlalchemy.orm import aliased
+from .paginacao import paginar
 
 # Tabela de relacionamento N:N entre MovimentoContas e Classificacao
 movimento_classificacao = db.Table('movimento_classificacao',
@@ -19,12 +21,23 @@ class MovimentoContas(db.Model):
     valor = db.Column(db.Float)
     status = db.Column(db.String(20), default='ATIVO', nullable=False)  # ATIVO, INATIVO
     data_movimento = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Listagem paginada por (data_movimento, id), com ou sem filtro de tipo
+        db.Index('idx_movimento_contas_status_data_movimento_id', 'status', 'data_movimento', 'id'),
+        db.Index('idx_movimento_contas_status_tipo_data_movimento_id', 'status', 'tipo', 'data_movimento', 'id'),
+        # Movimentos ativos de um fornecedor/cliente ou faturado, na ordem da listagem
+        db.Index('idx_movimento_contas_fornecedor_cliente_ativo', 'fornecedor_cliente_id', 'data_movimento', 'id',
+                 postgresql_where=db.text("status = 'ATIVO'")),
+        db.Index('idx_movimento_contas_faturado_ativo', 'faturado_id', 'data_movimento', 'id',
+                 postgresql_where=db.text("status = 'ATIVO'")),
+    )
     
     # Relacionamentos
     parcela = db.relationship('ParcelasContas', backref=db.backref('movimentos', lazy=True))
     fornecedor_cliente = db.relationship('Pessoas', foreign_keys=[fornecedor_cliente_id], backref=db.backref('movimentos_fornecedor', lazy=True))
     faturado = db.relationship('Pessoas', foreign_keys=[faturado_id], backref=db.backref('movimentos_faturado', lazy=True))
-    classificacoes = db.relationship('Classificacao', secondary=movimento_classificacao, lazy='subquery',
+    classificacoes = db.relationship('Classificacao', secondary=movimento_classificacao, lazy='selectin',
                                     backref=db.backref('movimentos', lazy=True))
     
     def __repr__(self):
@@ -67,6 +80,64 @@ class MovimentoContas(db.Model):
             query = query.filter_by(tipo=tipo)
         return query.order_by(cls.data_movimento.desc()).all()
 
+    @classmethod
+    def listar_para_exibicao(cls, tipos=None, incluir_inativos=False, fornecedor_cliente_id=None,
+                             faturado_id=None, id_min=None, after=None, limit=None, contar=False):
+        """
+        Lista uma página de movimentos (ver models.paginacao) já com os nomes
+        do fornecedor/cliente e do faturado e com as classificações, em duas
+        consultas independentemente da quantidade de movimentos (sem carregar
+        os relacionamentos um a um). Por padrão, apenas registros com status ATIVO.
+
+        Returns:
+            Tupla (dicionários apenas com as colunas exibidas, proximo_cursor, total ou None)
+        """
+        from .pessoas import Pessoas
+        from .classificacao import Classificacao
+
+        fornecedor_cliente = aliased(Pessoas)
+        faturado = aliased(Pessoas)
+        query = db.session.query(
+            cls.id,
+            cls.tipo,
+            cls.parcela_id,
+            cls.fornecedor_cliente_id,
+            fornecedor_cliente.razao_social.label('fornecedor_cliente_nome'),
+            cls.faturado_id,
+            faturado.razao_social.label('faturado_nome'),
+            cls.valor,
+            cls.status,
+            cls.data_movimento
+        ).outerjoin(fornecedor_cliente, fornecedor_cliente.id == cls.fornecedor_cliente_id) \
+         .outerjoin(faturado, faturado.id == cls.faturado_id)
+        if not incluir_inativos:
+            query = query.filter(cls.status == 'ATIVO')
+        if tipos:
+            query = query.filter(cls.tipo.in_(tipos))
+        if fornecedor_cliente_id is not None:
+            query = query.filter(cls.fornecedor_cliente_id == fornecedor_cliente_id)
+        if faturado_id is not None:
+            query = query.filter(cls.faturado_id == faturado_id)
+        if id_min is not None:
+            query = query.filter(cls.id >= id_min)
+        rows, proximo_cursor, total = paginar(query, cls.data_movimento, cls.id,
+                                              after=after, limit=limit, contar=contar)
+        movimentos = [dict(row._mapping, classificacoes=[]) for row in rows]
+        if not movimentos:
+            return movimentos, proximo_cursor, total
+
+        por_id = {movimento['id']: movimento for movimento in movimentos}
+        classificacoes = db.session.query(
+            movimento_classificacao.c.movimento_id, Classificacao.id, Classificacao.descricao, Classificacao.tipo
+        ).join(Classificacao, Classificacao.id == movimento_classificacao.c.classificacao_id) \
+         .filter(movimento_classificacao.c.movimento_id.in_(list(por_id))) \
+         .order_by(movimento_classificacao.c.movimento_id, Classificacao.id)
+        for movimento_id, classificacao_id, descricao, tipo_classificacao in classificacoes:
+            por_id[movimento_id]['classificacoes'].append(
+                {'id': classificacao_id, 'descricao': descricao, 'tipo': tipo_classificacao}
+            )
+        return movimentos, proximo_cursor, total
+
     def atualizar(self, **kwargs):
         """
         Atualiza os campos do movimento
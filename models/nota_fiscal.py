@@ -6,6 +6,8 @@ class NotaFiscal(db.Model):
     Modelo para representar notas fiscais (mantido para compatibilidade com código existente)
     """
     id = db.Column(db.Integer, primary_key=True)
+    # A coluna busca_fornecedor (tsvector gerado a partir desta), criada por
+    # scripts/migration_busca_textual.sql, é usada pela busca textual
     razao_social_fornecedor = db.Column(db.String(255))
     cnpj_fornecedor = db.Column(db.String(20))
     nome_faturado = db.Column(db.String(255))
@@ -17,6 +19,17 @@ class NotaFiscal(db.Model):
     quantidade_parcelas = db.Column(db.Integer)
     classificacao_despesa = db.Column(db.String(50))
     data_processamento = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Paginação por (data_emissao, id) e filtros por período
+        db.Index('idx_nota_fiscal_data_emissao_id', 'data_emissao', 'id'),
+        # Filtros por fornecedor ou classificação, na mesma ordem da paginação
+        db.Index('idx_nota_fiscal_cnpj_data_emissao_id', 'cnpj_fornecedor', 'data_emissao', 'id'),
+        db.Index('idx_nota_fiscal_classificacao_data_emissao_id', 'classificacao_despesa', 'data_emissao', 'id'),
+        # Listagem de /consultas ordenada por valor ou fornecedor
+        db.Index('idx_nota_fiscal_valor_total_id', 'valor_total', 'id'),
+        db.Index('idx_nota_fiscal_razao_social_fornecedor_id', 'razao_social_fornecedor', 'id'),
+    )
     
     def __repr__(self):
         return f'<NotaFiscal {self.numero_nota}>'
@@ -27,7 +40,13 @@ class ProdutoNotaFiscal(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     nota_fiscal_id = db.Column(db.Integer, db.ForeignKey('nota_fiscal.id'))
+    # Buscada pela coluna gerada busca_descricao (scripts/migration_busca_textual.sql)
     descricao = db.Column(db.String(255))
+
+    __table_args__ = (
+        # Produtos das notas (selectinload de NotaFiscal.produtos)
+        db.Index('idx_produto_nota_fiscal_nota_fiscal_id', 'nota_fiscal_id'),
+    )
     
     # Relacionamento com NotaFiscal
     nota_fiscal = db.relationship('NotaFiscal', backref=db.backref('produtos', lazy=True))
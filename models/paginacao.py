@@ -0,0 +1,83 @@
+"""
+Paginação por chave (keyset) das listagens de cadastros e movimentos.
+
+As listagens são ordenadas por (data, id) decrescentes e a página seguinte
+começa depois do último item da anterior, informado em `after` no formato
+'<data ISO>,<id>' (ex.: '2025-03-15T10:30:00,42'), sem OFFSET. Com os índices
+(status, data, id) e (status, tipo, data, id), cada página lê apenas as
+linhas que retorna, qualquer que seja o tamanho da tabela.
+"""
+from datetime import datetime
+from sqlalchemy import and_, or_, tuple_
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+
+
+def formatar_cursor(data, item_id):
+    """Cursor '<data ISO>,<id>' (data vazia para registros sem data)."""
+    return f"{data.isoformat() if data else ''},{item_id}"
+
+
+def ler_cursor(after):
+    """
+    Lê um cursor '<data ISO>,<id>'.
+
+    Raises:
+        ValueError: Cursor em formato inválido
+    """
+    try:
+        data, item_id = after.rsplit(',', 1)
+        return (datetime.fromisoformat(data) if data else None), int(item_id)
+    except (ValueError, AttributeError):
+        raise ValueError(f"Cursor inválido: {after}")
+
+
+def ler_limite(limit):
+    """Tamanho da página: padrão LIMITE_PADRAO, entre 1 e LIMITE_MAXIMO."""
+    if limit in (None, ''):
+        return LIMITE_PADRAO
+    try:
+        return max(1, min(int(limit), LIMITE_MAXIMO))
+    except (TypeError, ValueError):
+        raise ValueError(f"limit deve ser um número inteiro: {limit}")
+
+
+def paginar(query, coluna_data, coluna_id, after=None, limit=None, contar=False):
+    """
+    Aplica a ordenação (data DESC, id DESC) e o cursor à consulta e lê uma página.
+
+    Registros sem data vêm primeiro, como no ORDER BY DESC do PostgreSQL.
+
+    Args:
+        query: Consulta já filtrada (objetos ou colunas, incluindo data e id)
+        coluna_data: Coluna de data da ordenação (data_cadastro, data_movimento)
+        coluna_id: Coluna id
+        after: Cursor do último item da página anterior
+        limit: Tamanho da página
+        contar: Também conta o total de registros dos filtros (uma consulta a mais)
+
+    Returns:
+        Tupla (itens, proximo_cursor ou None na última página, total ou None)
+
+    Raises:
+        ValueError: Cursor ou limite inválido
+    """
+    limit = ler_limite(limit)
+    total = query.order_by(None).count() if contar else None
+
+    if after:
+        data_cursor, id_cursor = ler_cursor(after)
+        if data_cursor is None:
+            query = query.filter(or_(and_(coluna_data.is_(None), coluna_id < id_cursor),
+                                     coluna_data.isnot(None)))
+        else:
+            query = query.filter(tuple_(coluna_data, coluna_id) < tuple_(data_cursor, id_cursor))
+
+    itens = query.order_by(coluna_data.desc(), coluna_id.desc()).limit(limit + 1).all()
+    proximo_cursor = None
+    if len(itens) > limit:
+        itens = itens[:limit]
+        ultimo = itens[-1]
+        proximo_cursor = formatar_cursor(getattr(ultimo, coluna_data.key), getattr(ultimo, coluna_id.key))
+    return itens, proximo_cursor, total
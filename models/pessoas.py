@@ -1,5 +1,6 @@
 from . import db
 from datetime import datetime
+from .paginacao import paginar
 
 class Pessoas(db.Model):
     """
@@ -11,6 +12,12 @@ class Pessoas(db.Model):
     cpf_cnpj = db.Column(db.String(20), nullable=False, unique=True)
     status = db.Column(db.String(20), default='ATIVO', nullable=False)  # ATIVO, INATIVO
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Listagem paginada por (data_cadastro, id), com ou sem filtro de tipo
+        db.Index('idx_pessoas_status_data_cadastro_id', 'status', 'data_cadastro', 'id'),
+        db.Index('idx_pessoas_status_tipo_data_cadastro_id', 'status', 'tipo', 'data_cadastro', 'id'),
+    )
     
     def __repr__(self):
         return f'<Pessoas {self.razao_social}>'
@@ -30,6 +37,27 @@ class Pessoas(db.Model):
         if cpf_cnpj is not None:
             query = query.filter_by(cpf_cnpj=cpf_cnpj)
         return query.first()
+
+    @classmethod
+    def buscar_por_documentos(cls, documentos, incluir_inativos=False):
+        """
+        Busca as pessoas de vários CPFs/CNPJs em uma única consulta.
+        Por padrão, retorna apenas registros com status ATIVO.
+
+        Returns:
+            Dicionário {cpf_cnpj: [pessoas em ordem de id]} (apenas os encontrados)
+        """
+        documentos = {documento for documento in documentos if documento}
+        if not documentos:
+            return {}
+        query = cls.query.filter(cls.cpf_cnpj.in_(documentos))
+        if not incluir_inativos:
+            query = query.filter(cls.status == 'ATIVO')
+        # Ordenado aqui, e não no banco, para a consulta usar o índice de cpf_cnpj
+        pessoas = {}
+        for pessoa in sorted(query, key=lambda pessoa: pessoa.id):
+            pessoas.setdefault(pessoa.cpf_cnpj, []).append(pessoa)
+        return pessoas
     
     @classmethod
     def criar_novo(cls, tipo, razao_social, cpf_cnpj, status='ATIVO'):
@@ -59,6 +87,27 @@ class Pessoas(db.Model):
             query = query.filter_by(tipo=tipo)
         return query.order_by(cls.data_cadastro.desc()).all()
 
+    @classmethod
+    def listar_pagina(cls, tipos=None, busca=None, incluir_inativos=False, after=None, limit=None, contar=False):
+        """
+        Lista uma página de pessoas, das cadastradas mais recentemente para as
+        mais antigas (ver models.paginacao).
+        Filtros: tipos (lista), busca (parte da razão social ou início do
+        CPF/CNPJ) e, por padrão, apenas registros com status ATIVO.
+
+        Returns:
+            Tupla (pessoas, proximo_cursor, total ou None)
+        """
+        query = cls.query
+        if not incluir_inativos:
+            query = query.filter(cls.status == 'ATIVO')
+        if tipos:
+            query = query.filter(cls.tipo.in_(tipos))
+        if busca:
+            query = query.filter(db.or_(cls.razao_social.icontains(busca, autoescape=True),
+                                        cls.cpf_cnpj.startswith(busca, autoescape=True)))
+        return paginar(query, cls.data_cadastro, cls.id, after=after, limit=limit, contar=contar)
+
     def atualizar(self, **kwargs):
         """
         Atualiza os campos da pessoa
@@ -0,0 +1,185 @@
+from . import db
+from datetime import datetime, timedelta
+import os
+import socket
+import uuid
+
+# Status em que o job ainda pode mudar (CONCLUIDO e ERRO são finais)
+STATUS_ATIVOS = ('PENDENTE', 'PROCESSANDO')
+
+
+def processo_atual():
+    """Identificação (host:pid) do processo que recebe e executa os jobs."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _processo_ativo(processo):
+    """Se o processo dono de um job (host:pid) ainda existe neste host (None se for de outro host)."""
+    host, _, pid = (processo or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class ProcessamentoJob(db.Model):
+    """
+    Modelo para representar um job de processamento de nota fiscal (upload de PDF)
+    ou de um lote de notas fiscais
+    """
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tipo = db.Column(db.String(10), default='NOTA', nullable=False)  # NOTA, LOTE
+    status = db.Column(db.String(20), default='PENDENTE', nullable=False)  # PENDENTE, PROCESSANDO, CONCLUIDO, ERRO
+    etapa = db.Column(db.String(50))  # Etapa atual do pipeline
+    nome_arquivo = db.Column(db.String(255))
+    caminho_arquivo = db.Column(db.String(500))  # PDF ou, no lote, diretório com os arquivos
+    tempos = db.Column(db.JSON)  # Duração de cada etapa, em segundos
+    resultado = db.Column(db.JSON)  # Dados extraídos da nota fiscal (no lote, o relatório por arquivo)
+    origem = db.Column(db.String(20))  # llm, cache_pdf, cache_texto
+    erro = db.Column(db.Text)
+    nota_fiscal_id = db.Column(db.Integer, db.ForeignKey('nota_fiscal.id'))
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_inicio = db.Column(db.DateTime)
+    data_conclusao = db.Column(db.DateTime)
+    # Atualizada a cada etapa e pelo sinal periódico da fila do processo dono
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    processo = db.Column(db.String(100))  # host:pid do worker que recebeu e executa o job
+
+    def __repr__(self):
+        return f'<ProcessamentoJob {self.id} {self.status}>'
+
+    @classmethod
+    def criar_novo(cls, nome_arquivo, caminho_arquivo, job_id=None, tipo='NOTA'):
+        """
+        Cria um novo job de processamento com status PENDENTE
+        """
+        job = cls(
+            id=job_id or str(uuid.uuid4()),
+            tipo=tipo,
+            nome_arquivo=nome_arquivo,
+            caminho_arquivo=caminho_arquivo,
+            status='PENDENTE',
+            processo=processo_atual(),
+            tempos={}
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @classmethod
+    def falhar_interrompidos(cls, minutos):
+        """
+        Marca como ERRO os jobs PENDENTE/PROCESSANDO cujo processo dono foi
+        encerrado antes de concluí-los: o processo não existe mais neste host
+        ou (em outro host) parou de sinalizar os seus jobs há mais de `minutos`.
+        Jobs deste processo nunca são marcados.
+        """
+        limite = datetime.utcnow() - timedelta(minutes=minutos)
+        atual = processo_atual()
+        candidatos = cls.query.filter(
+            cls.status.in_(STATUS_ATIVOS),
+            db.or_(cls.processo.is_(None), cls.processo != atual)
+        ).with_for_update(skip_locked=True).all()
+
+        jobs = []
+        for job in candidatos:
+            ativo = _processo_ativo(job.processo)
+            parado = (job.data_atualizacao or job.data_criacao) < limite
+            if ativo is False or parado:
+                job.status = 'ERRO'
+                job.erro = 'Processamento interrompido pela reinicialização do servidor. Envie o arquivo novamente.'
+                job.data_conclusao = datetime.utcnow()
+                jobs.append(job)
+        db.session.commit()
+        return jobs
+
+    @classmethod
+    def sinalizar(cls, job_ids):
+        """
+        Atualiza data_atualizacao dos jobs ainda ativos (sinal de que o
+        processo dono continua executando ou com eles na fila)
+        """
+        if not job_ids:
+            return 0
+        atualizados = cls.query.filter(cls.id.in_(list(job_ids)), cls.status.in_(STATUS_ATIVOS)).update(
+            {cls.data_atualizacao: datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        return atualizados
+
+    def _atualizar_se_ativo(self, **campos):
+        """
+        Grava os campos apenas se o job ainda está PENDENTE/PROCESSANDO, para
+        não sobrescrever um status final gravado por outro processo
+        """
+        atualizados = ProcessamentoJob.query.filter(
+            ProcessamentoJob.id == self.id,
+            ProcessamentoJob.status.in_(STATUS_ATIVOS)
+        ).update(campos, synchronize_session=False)
+        db.session.commit()
+        db.session.refresh(self)
+        if not atualizados:
+            print(f"Job {self.id} já finalizado ({self.status}); atualização ignorada")
+        return self
+
+    def iniciar_etapa(self, etapa):
+        """
+        Marca o início de uma etapa do pipeline
+        """
+        campos = {'etapa': etapa}
+        if self.status == 'PENDENTE':
+            campos.update(status='PROCESSANDO', data_inicio=datetime.utcnow())
+        return self._atualizar_se_ativo(**campos)
+
+    def registrar_tempo(self, etapa, segundos):
+        """
+        Registra a duração de uma etapa do pipeline
+        """
+        tempos = dict(self.tempos or {})
+        tempos[etapa] = round(segundos, 3)
+        self.tempos = tempos
+        db.session.commit()
+        return self
+
+    def concluir(self, resultado, nota_fiscal_id=None, origem=None):
+        """
+        Finaliza o job com sucesso
+        """
+        return self._atualizar_se_ativo(
+            status='CONCLUIDO',
+            etapa=None,
+            resultado=resultado,
+            nota_fiscal_id=nota_fiscal_id,
+            origem=origem,
+            data_conclusao=datetime.utcnow()
+        )
+
+    def falhar(self, erro):
+        """
+        Finaliza o job com erro
+        """
+        return self._atualizar_se_ativo(status='ERRO', erro=erro, data_conclusao=datetime.utcnow())
+
+    def to_dict(self):
+        """
+        Serializa o job para a API de status
+        """
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'etapa': self.etapa,
+            'nome_arquivo': self.nome_arquivo,
+            'tempos': self.tempos or {},
+            'resultado': self.resultado,
+            'origem': self.origem,
+            'erro': self.erro,
+            'nota_fiscal_id': self.nota_fiscal_id,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
+            'data_conclusao': self.data_conclusao.isoformat() if self.data_conclusao else None
+        }
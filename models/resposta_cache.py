@@ -0,0 +1,23 @@
+from . import db
+from datetime import datetime
+
+class RespostaCache(db.Model):
+    """
+    Modelo para persistir respostas do RAG entre reinicializações, endereçadas
+    pelo hash da pergunta normalizada, do método e da versão dos dados
+    """
+    __tablename__ = 'rag_resposta_cache'
+
+    chave = db.Column(db.String(64), primary_key=True)  # SHA-256 em hexadecimal
+    metodo = db.Column(db.String(20), nullable=False)
+    pergunta = db.Column(db.Text, nullable=False)  # Pergunta normalizada
+    versao_dados = db.Column(db.BigInteger, nullable=False)
+    resultado = db.Column(db.JSON, nullable=False)
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_rag_resposta_cache_data_criacao', 'data_criacao'),
+    )
+
+    def __repr__(self):
+        return f'<RespostaCache {self.metodo} {self.chave[:12]}>'
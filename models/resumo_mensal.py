@@ -0,0 +1,161 @@
+from . import db
+from datetime import date
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from .nota_fiscal import NotaFiscal
+
+# Atributos da nota que definem a linha do resumo e o valor somado
+ATRIBUTOS_RESUMO = ('data_emissao', 'cnpj_fornecedor', 'classificacao_despesa', 'valor_total')
+
+# Mês das notas sem data de emissão (fica fora de qualquer filtro por período)
+MES_SEM_DATA = date(1, 1, 1)
+
+SQL_ACUMULAR = text("""
+    INSERT INTO resumo_mensal_notas
+        (mes, cnpj_fornecedor, classificacao_despesa, razao_social_fornecedor, quantidade, total)
+    VALUES (:mes, :cnpj, :classificacao, :razao_social, :quantidade, :total)
+    ON CONFLICT (mes, cnpj_fornecedor, classificacao_despesa) DO UPDATE SET
+        quantidade = resumo_mensal_notas.quantidade + EXCLUDED.quantidade,
+        total = resumo_mensal_notas.total + EXCLUDED.total,
+        razao_social_fornecedor = COALESCE(EXCLUDED.razao_social_fornecedor,
+                                           resumo_mensal_notas.razao_social_fornecedor)
+""")
+
+
+class ResumoMensal(db.Model):
+    """
+    Totais das notas fiscais por mês de emissão × CNPJ do fornecedor ×
+    classificação, mantidos na mesma transação em que as notas são gravadas
+    (ver o evento de sessão abaixo). Sem CNPJ ou classificação, a chave usa ''.
+    """
+    __tablename__ = 'resumo_mensal_notas'
+
+    mes = db.Column(db.Date, primary_key=True)  # Primeiro dia do mês de emissão
+    cnpj_fornecedor = db.Column(db.String(20), primary_key=True, default='')
+    classificacao_despesa = db.Column(db.String(50), primary_key=True, default='')
+    razao_social_fornecedor = db.Column(db.String(255))
+    quantidade = db.Column(db.Integer, default=0, nullable=False)
+    total = db.Column(db.Float, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ResumoMensal {self.mes:%Y-%m} {self.cnpj_fornecedor} {self.classificacao_despesa}>'
+
+    @staticmethod
+    def chave(data_emissao, cnpj_fornecedor, classificacao_despesa):
+        mes = data_emissao.replace(day=1) if data_emissao else MES_SEM_DATA
+        return (mes, cnpj_fornecedor or '', classificacao_despesa or '')
+
+    @classmethod
+    def acumular(cls, connection, deltas):
+        """
+        Soma os deltas {chave: [quantidade, total, razao_social]} aos totais,
+        em ordem de chave (para que transações concorrentes travem as linhas na
+        mesma ordem), e remove as linhas que ficaram sem notas.
+        """
+        for chave in sorted(deltas):
+            quantidade, total, razao_social = deltas[chave]
+            if not quantidade and not total:
+                continue
+            connection.execute(SQL_ACUMULAR, {
+                'mes': chave[0],
+                'cnpj': chave[1],
+                'classificacao': chave[2],
+                'razao_social': razao_social,
+                'quantidade': quantidade,
+                'total': total
+            })
+        if any(delta[0] < 0 for delta in deltas.values()):
+            connection.execute(text("DELETE FROM resumo_mensal_notas WHERE quantidade <= 0"))
+
+    @classmethod
+    def reconstruir(cls):
+        """
+        Recalcula todos os totais a partir de nota_fiscal (carga inicial ou
+        após alterações feitas por SQL direto). As gravações de notas ficam
+        bloqueadas durante a reconstrução.
+
+        Returns:
+            Quantidade de linhas do resumo
+        """
+        db.session.execute(text("LOCK TABLE nota_fiscal IN SHARE MODE"))
+        db.session.execute(text("DELETE FROM resumo_mensal_notas"))
+        db.session.execute(text("""
+            INSERT INTO resumo_mensal_notas
+                (mes, cnpj_fornecedor, classificacao_despesa, razao_social_fornecedor, quantidade, total)
+            SELECT
+                COALESCE(DATE_TRUNC('month', data_emissao)::date, :mes_sem_data),
+                COALESCE(cnpj_fornecedor, ''),
+                COALESCE(classificacao_despesa, ''),
+                MAX(razao_social_fornecedor),
+                COUNT(*),
+                COALESCE(SUM(valor_total), 0)
+            FROM nota_fiscal
+            GROUP BY 1, 2, 3
+        """), {'mes_sem_data': MES_SEM_DATA})
+        linhas = db.session.query(db.func.count()).select_from(cls).scalar()
+        db.session.commit()
+        return linhas
+
+    @classmethod
+    def precisa_reconstruir(cls):
+        """Indica se o resumo está vazio mas já existem notas (tabela recém-criada)."""
+        return (db.session.query(NotaFiscal.id).limit(1).first() is not None
+                and db.session.query(cls.mes).limit(1).first() is None)
+
+
+def _acumular_nota(deltas, nota, sinal, valores=None):
+    valores = valores or {}
+    chave = ResumoMensal.chave(
+        valores.get('data_emissao', nota.data_emissao),
+        valores.get('cnpj_fornecedor', nota.cnpj_fornecedor),
+        valores.get('classificacao_despesa', nota.classificacao_despesa)
+    )
+    delta = deltas.setdefault(chave, [0, 0.0, None])
+    delta[0] += sinal
+    delta[1] += sinal * (valores.get('valor_total', nota.valor_total) or 0)
+    if sinal > 0:
+        delta[2] = nota.razao_social_fornecedor
+
+
+@event.listens_for(Session, 'before_flush')
+def _calcular_deltas(session, flush_context, instances):
+    """
+    Calcula a variação do resumo pelas notas inseridas, alteradas e excluídas
+    (antes do flush, enquanto os valores anteriores ainda estão disponíveis).
+    """
+    deltas = session.info.setdefault('resumo_mensal_deltas', {})
+    with session.no_autoflush:
+        for nota in session.new:
+            if isinstance(nota, NotaFiscal):
+                _acumular_nota(deltas, nota, 1)
+        for nota in session.deleted:
+            if isinstance(nota, NotaFiscal):
+                _acumular_nota(deltas, nota, -1)
+        for nota in session.dirty:
+            if not isinstance(nota, NotaFiscal):
+                continue
+            estado = inspect(nota)
+            if not any(estado.attrs[atributo].history.has_changes() for atributo in ATRIBUTOS_RESUMO):
+                continue
+            # Valores ainda gravados no banco (o histórico não os tem se o objeto estava expirado)
+            anteriores = session.connection().execute(
+                select(*(getattr(NotaFiscal, atributo) for atributo in ATRIBUTOS_RESUMO))
+                .where(NotaFiscal.id == nota.id)
+            ).mappings().first()
+            if anteriores is not None:
+                _acumular_nota(deltas, nota, -1, dict(anteriores))
+                _acumular_nota(deltas, nota, 1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _atualizar_resumo_mensal(session, flush_context):
+    """Aplica as variações no resumo, na mesma transação das notas."""
+    deltas = session.info.pop('resumo_mensal_deltas', None)
+    if deltas:
+        ResumoMensal.acumular(session.connection(), deltas)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _descartar_deltas(session, previous_transaction):
+    session.info.pop('resumo_mensal_deltas', None)
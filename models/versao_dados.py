@@ -0,0 +1,96 @@
+from . import db
+from datetime import datetime
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+# Tabelas cujas alterações invalidam caches derivados dos dados (respostas do RAG, agregados)
+TABELAS_VERSIONADAS = (
+    'nota_fiscal',
+    'produto_nota_fiscal',
+    'movimento_contas',
+    'parcelas_contas',
+    'document_embeddings',
+)
+
+
+class VersaoDados(db.Model):
+    """
+    Contador de versão por tabela, incrementado a cada commit que altera a
+    tabela (ver os eventos de sessão abaixo). Caches usam a versão como parte
+    da chave, de modo que qualquer alteração nos dados os invalida, inclusive
+    entre processos.
+    """
+    __tablename__ = 'versao_dados'
+
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, default=0, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<VersaoDados {self.tabela} {self.versao}>'
+
+    @classmethod
+    def atual(cls, tabelas=TABELAS_VERSIONADAS):
+        """
+        Retorna a versão combinada das tabelas (soma dos contadores, que só
+        cresce e muda sempre que qualquer uma delas é alterada)
+        """
+        return db.session.query(
+            db.func.coalesce(db.func.sum(cls.versao), 0)
+        ).filter(cls.tabela.in_(tabelas)).scalar()
+
+    @classmethod
+    def incrementar(cls, tabelas, bind=None):
+        """
+        Incrementa a versão das tabelas em uma conexão própria (autocommit),
+        fora da transação de quem alterou os dados.
+        """
+        engine = bind or db.engine
+        with engine.begin() as conn:
+            for tabela in sorted(tabelas):
+                conn.execute(text("""
+                    INSERT INTO versao_dados (tabela, versao, data_atualizacao)
+                    VALUES (:tabela, 1, :agora)
+                    ON CONFLICT (tabela) DO UPDATE
+                    SET versao = versao_dados.versao + 1, data_atualizacao = :agora
+                """), {'tabela': tabela, 'agora': datetime.utcnow()})
+
+
+def _registrar(session, tabela):
+    if tabela in TABELAS_VERSIONADAS:
+        session.info.setdefault('tabelas_alteradas', set()).add(tabela)
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    """Anota as tabelas alteradas pelo flush (inserções, alterações e exclusões)."""
+    for obj in list(session.new) + list(session.deleted):
+        _registrar(session, getattr(obj, '__tablename__', None))
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            _registrar(session, getattr(obj, '__tablename__', None))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _coletar_alteracoes_em_massa(orm_execute_state):
+    """Anota as tabelas de UPDATE/DELETE em massa (query.update(), query.delete())."""
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabela = getattr(orm_execute_state.statement, 'table', None)
+        _registrar(orm_execute_state.session, getattr(tabela, 'name', None))
+
+
+@event.listens_for(Session, 'after_commit')
+def _incrementar_versoes(session):
+    tabelas = session.info.pop('tabelas_alteradas', None)
+    if not tabelas:
+        return
+    try:
+        VersaoDados.incrementar(tabelas, bind=session.get_bind())
+    except Exception as e:
+        print(f"Erro ao incrementar a versão dos dados ({', '.join(sorted(tabelas))}): {e}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _descartar_alteracoes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('tabelas_alteradas', None)
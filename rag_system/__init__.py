@@ -9,5 +9,8 @@ Este módulo implementa duas abordagens:
 from .rag_simple import RAGSimple
 from .rag_embeddings import RAGEmbeddings
 from .database_retriever import DatabaseRetriever
+from .indexing_worker import IndexingWorker
+from .answer_cache import AnswerCache
+from .text_search import TextSearch
 
-__all__ = ['RAGSimple', 'RAGEmbeddings', 'DatabaseRetriever']
+__all__ = ['RAGSimple', 'RAGEmbeddings', 'DatabaseRetriever', 'IndexingWorker', 'AnswerCache', 'TextSearch']
@@ -0,0 +1,171 @@
+"""
+Cache de respostas do RAG.
+
+As respostas são endereçadas pela pergunta normalizada, pelo método (simple ou
+embeddings) e pela versão dos dados (models.versao_dados), que muda a cada
+commit em nota_fiscal, movimento_contas, document_embeddings etc. Assim, uma
+alteração nos dados invalida o cache sem precisar removê-lo explicitamente.
+
+Em memória: LRU com TTL. Opcionalmente (RAG_CACHE_PERSISTENTE=true) as
+respostas também são gravadas na tabela rag_resposta_cache, compartilhada entre
+processos e preservada entre reinicializações.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.resposta_cache import RespostaCache
+from models.versao_dados import VersaoDados
+
+
+def normalize_question(question: str) -> str:
+    """Minúsculas, sem acentos, espaços colapsados e sem pontuação final."""
+    texto = unicodedata.normalize('NFKD', question or '').encode('ascii', 'ignore').decode('ascii')
+    texto = ' '.join(texto.lower().split())
+    return re.sub(r'[\s?!.;:]+$', '', texto)
+
+
+class AnswerCache:
+    """Cache LRU + TTL de respostas do RAG, versionado pelos dados."""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, persistent: bool = None,
+                 cleanup_interval: int = None):
+        """
+        Args:
+            max_entries: Máximo de respostas em memória (padrão: RAG_CACHE_MAX_ENTRADAS ou 500)
+            ttl_seconds: Validade de uma resposta (padrão: RAG_CACHE_TTL_SEGUNDOS ou 3600)
+            persistent: Grava as respostas no banco (padrão: RAG_CACHE_PERSISTENTE ou false)
+            cleanup_interval: Gravações entre limpezas da tabela (padrão: RAG_CACHE_INTERVALO_LIMPEZA ou 100)
+        """
+        self.max_entries = max_entries or int(os.environ.get('RAG_CACHE_MAX_ENTRADAS', '500'))
+        self.ttl_seconds = ttl_seconds or float(os.environ.get('RAG_CACHE_TTL_SEGUNDOS', '3600'))
+        if persistent is None:
+            persistent = os.environ.get('RAG_CACHE_PERSISTENTE', 'false').lower() == 'true'
+        self.persistent = persistent
+        self.cleanup_interval = cleanup_interval or int(os.environ.get('RAG_CACHE_INTERVALO_LIMPEZA', '100'))
+
+        self._entries = OrderedDict()  # chave -> (expira_em, resultado)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'hits_persistentes': 0, 'misses': 0, 'gravacoes': 0}
+
+    def key(self, question: str, method: str, data_version: int = None) -> str:
+        """Chave SHA-256 da pergunta normalizada, do método e da versão dos dados."""
+        if data_version is None:
+            data_version = VersaoDados.atual()
+        base = f"{method}\n{data_version}\n{normalize_question(question)}"
+        return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna a resposta em cache (ou None), consultando o banco se persistente."""
+        agora = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > agora:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        result = self._get_persistent(key) if self.persistent else None
+        with self._lock:
+            if result is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._stats['hits_persistentes'] += 1
+            self._put_memory(key, result)
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], question: str = None, method: str = None,
+            data_version: int = None):
+        """Armazena uma resposta bem-sucedida."""
+        if not result.get('success'):
+            return
+        with self._lock:
+            self._put_memory(key, result)
+            self._stats['gravacoes'] += 1
+            gravacoes = self._stats['gravacoes']
+
+        if self.persistent:
+            self._put_persistent(key, result, question, method, data_version)
+            if gravacoes % self.cleanup_interval == 0:
+                self.cleanup()
+
+    def _put_memory(self, key, result):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_persistent(self, key):
+        try:
+            row = db.session.get(RespostaCache, key)
+            if row is None or row.data_criacao < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+                return None
+            return row.resultado
+        except Exception as e:
+            print(f"Erro ao consultar o cache de respostas: {e}")
+            db.session.rollback()
+            return None
+
+    def _put_persistent(self, key, result, question, method, data_version):
+        try:
+            db.session.merge(RespostaCache(
+                chave=key,
+                metodo=method or result.get('method', ''),
+                pergunta=normalize_question(question or result.get('question', '')),
+                versao_dados=data_version if data_version is not None else VersaoDados.atual(),
+                resultado=result,
+                data_criacao=datetime.utcnow()
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Outro processo gravou a mesma resposta
+            db.session.rollback()
+        except Exception as e:
+            print(f"Erro ao gravar no cache de respostas: {e}")
+            db.session.rollback()
+
+    def cleanup(self) -> int:
+        """Remove do banco as respostas expiradas ou de versões antigas dos dados."""
+        try:
+            removidas = RespostaCache.query.filter(db.or_(
+                RespostaCache.data_criacao < datetime.utcnow() - timedelta(seconds=self.ttl_seconds),
+                RespostaCache.versao_dados < VersaoDados.atual()
+            )).delete(synchronize_session=False)
+            db.session.commit()
+            return removidas
+        except Exception as e:
+            print(f"Erro ao limpar o cache de respostas: {e}")
+            db.session.rollback()
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entradas = len(self._entries)
+        consultas = stats['hits'] + stats['misses']
+        return {
+            'entradas': entradas,
+            'max_entradas': self.max_entries,
+            'ttl_segundos': self.ttl_seconds,
+            'persistente': self.persistent,
+            'hits': stats['hits'],
+            'hits_persistentes': stats['hits_persistentes'],
+            'misses': stats['misses'],
+            'hit_ratio': round(stats['hits'] / consultas, 4) if consultas else 0.0
+        }
@@ -3,14 +3,45 @@ Módulo para recuperação de dados do banco de dados PostgreSQL.
 Realiza consultas SQL otimizadas para buscar informações relevantes.
 """
 
+import json
+import base64
+import threading
 from sqlalchemy import text, func
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Tuple
+
+from models.versao_dados import VersaoDados
+from .text_search import TextSearch
+
+
+def _parse_date(valor) -> date:
+    """Aceita date/datetime ou texto em AAAA-MM-DD ou DD/MM/AAAA."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(valor), formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida: {valor}")
+
+
+def _parse_like(valor) -> str:
+    """Padrão LIKE de 'contém', com os curingas do termo escapados."""
+    termo = str(valor).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{termo}%'
 
 
 class DatabaseRetriever:
     """Classe responsável por recuperar dados do banco de dados para o sistema RAG."""
 
+    # Agregados das notas fiscais como uma tupla ((versão de nota_fiscal, dia), dados),
+    # compartilhada entre instâncias e substituída de uma vez
+    _agregados = None
+    _agregados_lock = threading.Lock()
+
     def __init__(self, db):
         """
         Inicializa o recuperador de dados.
@@ -19,6 +50,7 @@ class DatabaseRetriever:
             db: Instância do SQLAlchemy database
         """
         self.db = db
+        self.text_search = TextSearch(db)
 
     def get_database_schema(self) -> str:
         """
@@ -56,18 +88,126 @@ class DatabaseRetriever:
         """
         return schema_description
 
-    def search_notas_fiscais(self, filters: Dict[str, Any] = None) -> List[Dict]:
+    # Filtros aceitos por search_notas_fiscais: nome -> (condição SQL, conversão do valor)
+    NOTA_FILTERS = {
+        'data_inicio': ('data_emissao >= :data_inicio', _parse_date),
+        'data_fim': ('data_emissao <= :data_fim', _parse_date),
+        'fornecedor': ('razao_social_fornecedor ILIKE :fornecedor', _parse_like),
+        'cnpj': ('cnpj_fornecedor = :cnpj', str),
+        'numero_nota': ('numero_nota = :numero_nota', str),
+        'classificacao': ('classificacao_despesa = :classificacao', str),
+        'valor_min': ('valor_total >= :valor_min', float),
+        'valor_max': ('valor_total <= :valor_max', float),
+    }
+
+    def _build_filters(self, filters: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
         """
-        Busca notas fiscais com filtros opcionais.
+        Monta as condições parametrizadas a partir dos filtros.
+
+        Raises:
+            ValueError: Filtro desconhecido ou valor inválido
+        """
+        conditions, params = [], {}
+        for nome, valor in (filters or {}).items():
+            if valor is None or valor == '':
+                continue
+            if nome not in self.NOTA_FILTERS:
+                raise ValueError(f"Filtro desconhecido: {nome}")
+            condicao, conversao = self.NOTA_FILTERS[nome]
+            try:
+                params[nome] = conversao(valor)
+            except (TypeError, ValueError):
+                raise ValueError(f"Valor inválido para o filtro {nome}: {valor}")
+            conditions.append(condicao)
+        return conditions, params
+
+    # Ordenações aceitas por search_notas_fiscais_page: nome -> (coluna, conversão do valor do cursor)
+    NOTA_ORDENACOES = {
+        'data_emissao': ('data_emissao', date.fromisoformat),
+        'valor_total': ('valor_total', float),
+        'fornecedor': ('razao_social_fornecedor', str),
+    }
+
+    @staticmethod
+    def encode_cursor(valor, nota_id: int) -> str:
+        """Cursor opaco com a posição (valor da ordenação, id) da última nota da página."""
+        if isinstance(valor, date):
+            valor = valor.isoformat()
+        chave = json.dumps([valor, nota_id])
+        return base64.urlsafe_b64encode(chave.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor: str, ordem: str = 'data_emissao') -> Tuple[Any, int]:
+        try:
+            valor, nota_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            conversao = self.NOTA_ORDENACOES[ordem][1]
+            return (conversao(valor) if valor is not None else None), int(nota_id)
+        except (ValueError, TypeError, UnicodeError):
+            raise ValueError("Cursor inválido")
+
+    def search_notas_fiscais_page(self, filters: Dict[str, Any] = None, limit: int = 50,
+                                  cursor: str = None, ordem: str = 'data_emissao',
+                                  direcao: str = 'desc', contar: bool = False) -> Dict[str, Any]:
+        """
+        Busca uma página de notas fiscais, por padrão da mais recente para a mais antiga.
+
+        A paginação é por chave (keyset) em (coluna da ordenação, id): a próxima
+        página começa depois do cursor da anterior, sem OFFSET, usando os índices
+        (data_emissao, id), (cnpj/classificação, data_emissao, id), (valor_total, id)
+        e (razao_social_fornecedor, id). Notas sem valor na coluna da ordenação vêm
+        primeiro na ordem decrescente e por último na crescente, como no PostgreSQL.
 
         Args:
-            filters: Dicionário com filtros (fornecedor, data_inicio, data_fim, etc.)
+            filters: Filtros opcionais (ver NOTA_FILTERS): data_inicio, data_fim,
+                fornecedor (parte do nome), cnpj, numero_nota, classificacao,
+                valor_min, valor_max
+            limit: Tamanho da página (máximo 500)
+            cursor: 'proximo_cursor' da página anterior (com a mesma ordenação)
+            ordem: Coluna da ordenação (ver NOTA_ORDENACOES): data_emissao,
+                valor_total ou fornecedor
+            direcao: 'desc' ou 'asc'
+            contar: Também conta o total de notas dos filtros (uma consulta a mais)
 
         Returns:
-            Lista de dicionários com dados das notas fiscais
+            Dicionário com 'notas', 'proximo_cursor' (None na última página) e,
+            com contar, 'total'
+
+        Raises:
+            ValueError: Filtro, ordenação, valor ou cursor inválido
         """
-        query = text("""
-            SELECT
+        if ordem not in self.NOTA_ORDENACOES:
+            raise ValueError(f"Ordenação desconhecida: {ordem}")
+        if direcao not in ('asc', 'desc'):
+            raise ValueError(f"Direção inválida: {direcao}")
+        coluna = self.NOTA_ORDENACOES[ordem][0]
+        descendente = direcao == 'desc'
+
+        limit = max(1, min(int(limit), 500))
+        conditions, params = self._build_filters(filters)
+
+        total = None
+        if contar:
+            total = self.db.session.execute(text(f"""
+                SELECT COUNT(*) FROM nota_fiscal WHERE {' AND '.join(conditions) or 'TRUE'}
+            """), params).scalar()
+
+        # Nulos onde o PostgreSQL os põe: primeiro no DESC e por último no ASC
+        ordenacao = f"{coluna} {direcao.upper()}, id {direcao.upper()}"
+        nulos_depois = False
+        if cursor:
+            valor_cursor, id_cursor = self.decode_cursor(cursor, ordem)
+            params.update(valor_cursor=valor_cursor, id_cursor=id_cursor)
+            if descendente and valor_cursor is None:
+                conditions.append(f'(({coluna} IS NULL AND id < :id_cursor) OR {coluna} IS NOT NULL)')
+            elif descendente:
+                conditions.append(f'({coluna}, id) < (:valor_cursor, :id_cursor)')
+            elif valor_cursor is None:
+                conditions.extend([f'{coluna} IS NULL', 'id > :id_cursor'])
+            else:
+                # "(coluna, id) > cursor OR coluna IS NULL" não usaria o índice:
+                # os valores seguintes e os nulos são lidos separadamente
+                nulos_depois = True
+
+        colunas = """
                 id,
                 razao_social_fornecedor,
                 cnpj_fornecedor,
@@ -77,31 +217,189 @@ class DatabaseRetriever:
                 valor_total,
                 quantidade_parcelas,
                 classificacao_despesa,
-                data_processamento
+                data_processamento"""
+
+        def pagina_sql(condicoes, ordem_sql):
+            return f"""
+            SELECT {colunas}
             FROM nota_fiscal
-            WHERE 1=1
-            ORDER BY data_emissao DESC
-            LIMIT 50
+            WHERE {' AND '.join(condicoes) or 'TRUE'}
+            ORDER BY {ordem_sql}
+            LIMIT :limit"""
+
+        if nulos_depois:
+            query = text(f"""
+                SELECT * FROM (
+                    ({pagina_sql(conditions + [f'({coluna}, id) > (:valor_cursor, :id_cursor)'], ordenacao)})
+                    UNION ALL
+                    ({pagina_sql(conditions + [f'{coluna} IS NULL'], 'id')})
+                ) pagina
+                ORDER BY {ordenacao}
+                LIMIT :limit
+            """)
+        else:
+            query = text(pagina_sql(conditions, ordenacao))
+        params['limit'] = limit + 1
+
+        rows = self.db.session.execute(query, params).fetchall()
+        proximo_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            ultima = rows[-1]._mapping
+            proximo_cursor = self.encode_cursor(ultima[coluna], ultima['id'])
+
+        pagina = {
+            'notas': [
+                {
+                    'id': row[0],
+                    'fornecedor': row[1],
+                    'cnpj': row[2],
+                    'faturado': row[3],
+                    'numero_nota': row[4],
+                    'data_emissao': row[5].strftime('%d/%m/%Y') if row[5] else None,
+                    'valor_total': float(row[6]) if row[6] else 0,
+                    'parcelas': row[7],
+                    'classificacao': row[8],
+                    'data_processamento': row[9].strftime('%d/%m/%Y %H:%M') if row[9] else None
+                }
+                for row in rows
+            ],
+            'proximo_cursor': proximo_cursor
+        }
+        if total is not None:
+            pagina['total'] = total
+        return pagina
+
+    def search_notas_fiscais(self, filters: Dict[str, Any] = None, limit: int = 50,
+                             cursor: str = None) -> List[Dict]:
+        """
+        Busca notas fiscais com filtros opcionais.
+
+        Args:
+            filters: Dicionário com filtros (data_inicio, data_fim, fornecedor,
+                cnpj, numero_nota, classificacao, valor_min, valor_max)
+            limit: Quantidade máxima de notas
+            cursor: Cursor de paginação (ver search_notas_fiscais_page)
+
+        Returns:
+            Lista de dicionários com dados das notas fiscais
+        """
+        return self.search_notas_fiscais_page(filters, limit, cursor)['notas']
+
+    def get_agregados(self) -> Dict[str, Any]:
+        """
+        Retorna os agregados das notas fiscais: resumo geral, totais por
+        classificação e por fornecedor.
+
+        São calculados em uma única consulta: uma leitura de resumo_mensal_notas
+        (GROUPING SETS), cujo tamanho depende do número de meses, fornecedores
+        e classificações e não do número de notas, mais as notas dos dias
+        anteriores ao primeiro mês completo dos últimos 30 dias. Ficam em
+        memória enquanto a versão de nota_fiscal (VersaoDados) e o dia não
+        mudarem; nesse caso, a consulta custa apenas a leitura da versão.
+
+        Returns:
+            Dicionário com 'resumo', 'por_classificacao' e 'por_fornecedor'
+            (listas ordenadas pelo total, decrescente)
+        """
+        chave = (VersaoDados.atual(('nota_fiscal',)), date.today())
+        # Uma única leitura do atributo: chave e dados sempre do mesmo cálculo
+        em_cache = DatabaseRetriever._agregados
+        if em_cache is not None and em_cache[0] == chave:
+            return em_cache[1]
+
+        with DatabaseRetriever._agregados_lock:
+            em_cache = DatabaseRetriever._agregados
+            if em_cache is not None and em_cache[0] == chave:
+                return em_cache[1]
+            agregados = self._calcular_agregados()
+            DatabaseRetriever._agregados = (chave, agregados)
+            return agregados
+
+    def _calcular_agregados(self) -> Dict[str, Any]:
+        """
+        Calcula os agregados de get_agregados em uma única consulta a
+        resumo_mensal_notas (totais por mês × fornecedor × classificação); o
+        valor dos últimos 30 dias soma os meses completos do resumo e, de
+        nota_fiscal, apenas os dias anteriores ao primeiro deles.
+        """
+        data_inicio, mes_completo = self._inicio_periodo(30)
+        query = text("""
+            SELECT
+                GROUPING(classificacao_despesa) AS sem_classificacao,
+                GROUPING(cnpj_fornecedor) AS sem_fornecedor,
+                classificacao_despesa,
+                cnpj_fornecedor,
+                MAX(razao_social_fornecedor) AS razao_social_fornecedor,
+                COALESCE(SUM(quantidade), 0) AS quantidade,
+                COALESCE(SUM(total), 0) AS total,
+                COALESCE(SUM(total) FILTER (WHERE mes >= :mes_completo), 0)
+                    + (SELECT COALESCE(SUM(valor_total), 0)
+                       FROM nota_fiscal
+                       WHERE data_emissao >= :data_inicio AND data_emissao < :mes_completo)
+                    AS total_periodo
+            FROM resumo_mensal_notas
+            GROUP BY GROUPING SETS (
+                (),
+                (classificacao_despesa),
+                (cnpj_fornecedor)
+            )
         """)
 
-        result = self.db.session.execute(query)
-        rows = result.fetchall()
-
-        return [
-            {
-                'id': row[0],
-                'fornecedor': row[1],
-                'cnpj': row[2],
-                'faturado': row[3],
-                'numero_nota': row[4],
-                'data_emissao': row[5].strftime('%d/%m/%Y') if row[5] else None,
-                'valor_total': float(row[6]) if row[6] else 0,
-                'parcelas': row[7],
-                'classificacao': row[8],
-                'data_processamento': row[9].strftime('%d/%m/%Y %H:%M') if row[9] else None
-            }
-            for row in rows
-        ]
+        resumo = {
+            'total_notas_fiscais': 0,
+            'valor_total_geral': 0,
+            'valor_ultimos_30_dias': 0,
+            'total_fornecedores_unicos': 0
+        }
+        por_classificacao = []
+        por_fornecedor = []
+
+        for row in self.db.session.execute(query, {'data_inicio': data_inicio, 'mes_completo': mes_completo}):
+            if row.sem_classificacao and row.sem_fornecedor:
+                resumo['total_notas_fiscais'] = int(row.quantidade)
+                resumo['valor_total_geral'] = float(row.total)
+                resumo['valor_ultimos_30_dias'] = float(row.total_periodo)
+            elif not row.sem_classificacao:
+                # '' agrupa as notas sem classificação
+                if row.classificacao_despesa:
+                    por_classificacao.append({
+                        'classificacao': row.classificacao_despesa,
+                        'quantidade': int(row.quantidade),
+                        'total': float(row.total)
+                    })
+            else:
+                por_fornecedor.append({
+                    'fornecedor': row.razao_social_fornecedor,
+                    'cnpj': row.cnpj_fornecedor or None,
+                    'quantidade_notas': int(row.quantidade),
+                    'total_gasto': float(row.total)
+                })
+                if row.cnpj_fornecedor:
+                    resumo['total_fornecedores_unicos'] += 1
+
+        por_classificacao.sort(key=lambda item: item['total'], reverse=True)
+        por_fornecedor.sort(key=lambda item: item['total_gasto'], reverse=True)
+
+        return {
+            'resumo': resumo,
+            'por_classificacao': por_classificacao,
+            'por_fornecedor': por_fornecedor,
+            'data_calculo': datetime.now().strftime('%d/%m/%Y %H:%M')
+        }
+
+    @staticmethod
+    def _inicio_periodo(dias: int) -> Tuple[date, date]:
+        """
+        Início dos últimos `dias` dias e o primeiro dia do primeiro mês completo
+        a partir dele: meses inteiros vêm de resumo_mensal_notas e só os dias
+        anteriores leem nota_fiscal.
+        """
+        data_inicio = date.today() - timedelta(days=dias)
+        mes_completo = data_inicio if data_inicio.day == 1 else (
+            data_inicio.replace(day=28) + timedelta(days=4)
+        ).replace(day=1)
+        return data_inicio, mes_completo
 
     def get_total_despesas_por_periodo(self, dias: int = 30) -> Dict[str, Any]:
         """
@@ -113,22 +411,31 @@ class DatabaseRetriever:
         Returns:
             Dicionário com total de despesas e quantidade de notas
         """
-        data_inicio = datetime.now() - timedelta(days=dias)
+        data_inicio, mes_completo = self._inicio_periodo(dias)
 
         query = text("""
-            SELECT
-                COUNT(*) as quantidade_notas,
-                COALESCE(SUM(valor_total), 0) as total_despesas
-            FROM nota_fiscal
-            WHERE data_emissao >= :data_inicio
+            SELECT SUM(quantidade_notas), SUM(total_despesas)
+            FROM (
+                SELECT
+                    COALESCE(SUM(quantidade), 0) as quantidade_notas,
+                    COALESCE(SUM(total), 0) as total_despesas
+                FROM resumo_mensal_notas
+                WHERE mes >= :mes_completo
+                UNION ALL
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(valor_total), 0)
+                FROM nota_fiscal
+                WHERE data_emissao >= :data_inicio AND data_emissao < :mes_completo
+            ) periodo
         """)
 
-        result = self.db.session.execute(query, {'data_inicio': data_inicio})
+        result = self.db.session.execute(query, {'data_inicio': data_inicio, 'mes_completo': mes_completo})
         row = result.fetchone()
 
         return {
             'periodo_dias': dias,
-            'quantidade_notas': row[0],
+            'quantidade_notas': int(row[0] or 0),
             'total_despesas': float(row[1]) if row[1] else 0
         }
 
@@ -142,29 +449,7 @@ class DatabaseRetriever:
         Returns:
             Lista com classificações e totais
         """
-        query = text("""
-            SELECT
-                classificacao_despesa,
-                COUNT(*) as quantidade,
-                SUM(valor_total) as total
-            FROM nota_fiscal
-            WHERE classificacao_despesa IS NOT NULL
-            GROUP BY classificacao_despesa
-            ORDER BY total DESC
-            LIMIT :limit
-        """)
-
-        result = self.db.session.execute(query, {'limit': limit})
-        rows = result.fetchall()
-
-        return [
-            {
-                'classificacao': row[0],
-                'quantidade': row[1],
-                'total': float(row[2]) if row[2] else 0
-            }
-            for row in rows
-        ]
+        return self.get_agregados()['por_classificacao'][:limit]
 
     def get_maiores_fornecedores(self, limit: int = 10) -> List[Dict]:
         """
@@ -176,71 +461,21 @@ class DatabaseRetriever:
         Returns:
             Lista com fornecedores e totais
         """
-        query = text("""
-            SELECT
-                razao_social_fornecedor,
-                cnpj_fornecedor,
-                COUNT(*) as quantidade_notas,
-                SUM(valor_total) as total_gasto
-            FROM nota_fiscal
-            GROUP BY razao_social_fornecedor, cnpj_fornecedor
-            ORDER BY total_gasto DESC
-            LIMIT :limit
-        """)
+        return self.get_agregados()['por_fornecedor'][:limit]
 
-        result = self.db.session.execute(query, {'limit': limit})
-        rows = result.fetchall()
-
-        return [
-            {
-                'fornecedor': row[0],
-                'cnpj': row[1],
-                'quantidade_notas': row[2],
-                'total_gasto': float(row[3]) if row[3] else 0
-            }
-            for row in rows
-        ]
-
-    def search_by_fornecedor(self, termo_busca: str) -> List[Dict]:
+    def search_by_fornecedor(self, termo_busca: str, limit: int = 20) -> List[Dict]:
         """
-        Busca notas fiscais por nome do fornecedor.
+        Busca notas fiscais por nome do fornecedor, ordenadas por relevância
+        (ver TextSearch: trigramas ou full-text, sem acentos).
 
         Args:
             termo_busca: Termo para buscar no nome do fornecedor
+            limit: Número máximo de notas
 
         Returns:
             Lista de notas fiscais encontradas
         """
-        query = text("""
-            SELECT
-                id,
-                razao_social_fornecedor,
-                cnpj_fornecedor,
-                numero_nota,
-                data_emissao,
-                valor_total,
-                classificacao_despesa
-            FROM nota_fiscal
-            WHERE LOWER(razao_social_fornecedor) LIKE LOWER(:termo)
-            ORDER BY data_emissao DESC
-            LIMIT 20
-        """)
-
-        result = self.db.session.execute(query, {'termo': f'%{termo_busca}%'})
-        rows = result.fetchall()
-
-        return [
-            {
-                'id': row[0],
-                'fornecedor': row[1],
-                'cnpj': row[2],
-                'numero_nota': row[3],
-                'data_emissao': row[4].strftime('%d/%m/%Y') if row[4] else None,
-                'valor_total': float(row[5]) if row[5] else 0,
-                'classificacao': row[6]
-            }
-            for row in rows
-        ]
+        return self.text_search.buscar_notas_por_fornecedor(termo_busca, limit)
 
     def get_resumo_financeiro(self) -> Dict[str, Any]:
         """
@@ -249,35 +484,4 @@ class DatabaseRetriever:
         Returns:
             Dicionário com resumo financeiro completo
         """
-        # Total de notas
-        query_total_notas = text("SELECT COUNT(*) FROM nota_fiscal")
-        total_notas = self.db.session.execute(query_total_notas).scalar()
-
-        # Total geral
-        query_total_geral = text("SELECT COALESCE(SUM(valor_total), 0) FROM nota_fiscal")
-        total_geral = self.db.session.execute(query_total_geral).scalar()
-
-        # Total últimos 30 dias
-        data_30_dias = datetime.now() - timedelta(days=30)
-        query_30_dias = text("""
-            SELECT COALESCE(SUM(valor_total), 0)
-            FROM nota_fiscal
-            WHERE data_emissao >= :data_inicio
-        """)
-        total_30_dias = self.db.session.execute(
-            query_30_dias,
-            {'data_inicio': data_30_dias}
-        ).scalar()
-
-        # Quantidade de fornecedores únicos
-        query_fornecedores = text("""
-            SELECT COUNT(DISTINCT cnpj_fornecedor) FROM nota_fiscal
-        """)
-        total_fornecedores = self.db.session.execute(query_fornecedores).scalar()
-
-        return {
-            'total_notas_fiscais': total_notas,
-            'valor_total_geral': float(total_geral) if total_geral else 0,
-            'valor_ultimos_30_dias': float(total_30_dias) if total_30_dias else 0,
-            'total_fornecedores_unicos': total_fornecedores
-        }
+        return dict(self.get_agregados()['resumo'])
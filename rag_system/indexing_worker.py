@@ -0,0 +1,144 @@
+"""
+Worker de indexação assíncrona para o RAG com Embeddings.
+
+Notas fiscais recém-salvas são enfileiradas e indexadas em segundo plano,
+sem que a requisição de upload espere pela latência da API de embeddings.
+Rajadas de notas são agrupadas em lotes, gerando uma única chamada de
+embeddings por lote.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+
+class IndexingWorker:
+    """
+    Thread em segundo plano que consome ids de notas fiscais de uma fila e
+    os indexa em lotes usando RAGEmbeddings.
+    """
+
+    def __init__(self, app, rag_embeddings, batch_size: int = None, coalesce_seconds: float = None):
+        """
+        Inicializa o worker (a thread só é iniciada no primeiro enfileiramento).
+
+        Args:
+            app: Aplicação Flask (para abrir o app context na thread)
+            rag_embeddings: Instância de RAGEmbeddings
+            batch_size: Máximo de notas por lote (padrão: RAG_INDEX_BATCH_SIZE ou 100)
+            coalesce_seconds: Tempo máximo de espera para agrupar notas em um
+                lote (padrão: RAG_INDEX_COALESCE_SECONDS ou 2)
+        """
+        self.app = app
+        self.rag_embeddings = rag_embeddings
+        self.batch_size = batch_size or int(os.environ.get('RAG_INDEX_BATCH_SIZE', '100'))
+        self.coalesce_seconds = coalesce_seconds if coalesce_seconds is not None else float(
+            os.environ.get('RAG_INDEX_COALESCE_SECONDS', '2')
+        )
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self._stats = {
+            'enqueued': 0,
+            'indexed': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'last_batch_seconds': None,
+            'last_error': None
+        }
+
+    def _ensure_started(self):
+        """
+        Inicia a thread se ainda não estiver rodando neste processo
+        (threads não sobrevivem ao fork dos workers do gunicorn).
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='rag-indexing-worker', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, nota_fiscal_id: int):
+        """
+        Agenda a indexação de uma nota fiscal.
+
+        Args:
+            nota_fiscal_id: ID da nota fiscal
+        """
+        self._ensure_started()
+        self._queue.put(nota_fiscal_id)
+        with self._lock:
+            self._stats['enqueued'] += 1
+
+    def _next_batch(self) -> List[int]:
+        """
+        Bloqueia até haver uma nota na fila e agrupa as que chegarem em até
+        coalesce_seconds (ou até completar batch_size).
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.coalesce_seconds
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Remove duplicatas mantendo a ordem
+        return list(dict.fromkeys(batch))
+
+    def _run(self):
+        """Laço principal da thread."""
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+
+            indexed, error = 0, None
+            with self.app.app_context():
+                try:
+                    indexed = self.rag_embeddings.index_notas_fiscais(batch)
+                except Exception as e:
+                    error = str(e)
+                    print(f"Erro na indexação assíncrona de {len(batch)} notas: {e}")
+
+            elapsed = time.perf_counter() - started
+            # Os contadores são lidos por get_status() nas threads das requisições
+            with self._lock:
+                self._stats['indexed'] += indexed
+                self._stats['failed'] += len(batch) - indexed
+                self._stats['last_error'] = error
+                self._stats['batches'] += 1
+                self._stats['last_batch_size'] = len(batch)
+                self._stats['last_batch_seconds'] = round(elapsed, 3)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Retorna o estado do worker.
+
+        Returns:
+            Dicionário com tamanho da fila e contadores
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            running = self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+        return {
+            'running': running,
+            'pending': self._queue.qsize(),
+            'batch_size': self.batch_size,
+            'coalesce_seconds': self.coalesce_seconds,
+            **stats
+        }
@@ -6,12 +6,18 @@ e combina com LLM para gerar respostas contextualizadas.
 """
 
 import os
-import numpy as np
-import google.generativeai as genai
-from typing import Dict, Any, List, Tuple
+import time
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.orm import selectinload
 from models.document_embeddings import DocumentEmbedding
 from models.nota_fiscal import NotaFiscal
 from models import db
+from .vector_index import VectorIndex, PgVectorIndex
+from .streaming import stream_answer
+from agents.cliente_llm import get_cliente_llm
 
 
 class RAGEmbeddings:
@@ -21,6 +27,9 @@ class RAGEmbeddings:
     Usa Google Gemini Embeddings API para gerar embeddings e busca por similaridade.
     """
 
+    # Máximo de textos por chamada de embeddings (limite do batchEmbedContents)
+    EMBED_BATCH_LIMIT = 100
+
     def __init__(self, database, model_name='models/text-embedding-004'):
         """
         Inicializa o sistema RAG com Embeddings.
@@ -32,19 +41,36 @@ class RAGEmbeddings:
         self.db = database
         self.model_name = model_name
 
-        # Configura o Gemini
+        # As chamadas ao Gemini usam o cliente compartilhado (agents.cliente_llm)
         api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
+        if not api_key and get_cliente_llm().backend.nome == 'gemini':
             raise ValueError("GEMINI_API_KEY não encontrada nas variáveis de ambiente")
 
-        genai.configure(api_key=api_key)
-
         print(f"Usando modelo de embeddings: {model_name}")
 
-        # Modelo para geração de respostas
-        self.llm_model = genai.GenerativeModel(
-            os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
-        )
+        # Índice vetorial: 'memory' (numpy, exato, em memória) ou
+        # 'pgvector' (busca delegada ao PostgreSQL, ver scripts/migration_pgvector.sql)
+        self.vector_backend = os.environ.get('RAG_VECTOR_BACKEND', 'memory').lower()
+        self._index_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._index_loaded = False
+        self._index_signature = None
+        self._index_checked_at = 0.0
+        self.index_refresh_seconds = float(os.environ.get('RAG_INDEX_REFRESH_SECONDS', '60'))
+
+        if self.vector_backend == 'pgvector':
+            ef_search = os.environ.get('RAG_HNSW_EF_SEARCH')
+            self.index = PgVectorIndex(
+                database,
+                exact=os.environ.get('RAG_VECTOR_SEARCH', 'approximate').lower() == 'exact',
+                ef_search=int(ef_search) if ef_search else None
+            )
+            self._index_loaded = True
+        else:
+            # Carregado sob demanda na primeira busca
+            self.index = VectorIndex()
+
+        print(f"Backend de busca vetorial: {self.vector_backend}")
 
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -58,16 +84,138 @@ class RAGEmbeddings:
         """
         try:
             # Usa a API de embeddings do Gemini
-            result = genai.embed_content(
-                model=self.model_name,
-                content=text,
+            return get_cliente_llm().embed(
+                text,
+                modelo=self.model_name,
                 task_type="retrieval_document"
             )
-            return result['embedding']
         except Exception as e:
             print(f"Erro ao gerar embedding: {e}")
             raise
 
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings para vários textos, enviando até EMBED_BATCH_LIMIT
+        textos por chamada à API do Gemini.
+
+        Args:
+            texts: Lista de textos
+
+        Returns:
+            Lista de vetores, na mesma ordem dos textos
+        """
+        embeddings = []
+        try:
+            for start in range(0, len(texts), self.EMBED_BATCH_LIMIT):
+                chunk = texts[start:start + self.EMBED_BATCH_LIMIT]
+                embeddings.extend(get_cliente_llm().embed(
+                    chunk,
+                    modelo=self.model_name,
+                    task_type="retrieval_document"
+                ))
+        except Exception as e:
+            print(f"Erro ao gerar embeddings em lote: {e}")
+            raise
+
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"API retornou {len(embeddings)} embeddings para {len(texts)} textos"
+            )
+        return embeddings
+
+    def _build_meta(self, nota: NotaFiscal) -> Dict[str, Any]:
+        """Monta os metadados armazenados junto ao embedding da nota."""
+        return {
+            'numero_nota': nota.numero_nota,
+            'fornecedor': nota.razao_social_fornecedor,
+            'valor_total': float(nota.valor_total) if nota.valor_total else 0,
+            'classificacao': nota.classificacao_despesa
+        }
+
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        """Calcula o hash SHA-256 do texto indexado."""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _index_batch(self, notas: List[NotaFiscal], contents: List[str] = None) -> int:
+        """
+        Indexa um lote de notas fiscais: uma chamada de embeddings por até
+        EMBED_BATCH_LIMIT textos e uma única transação para substituir os
+        embeddings do lote.
+
+        Args:
+            notas: Notas fiscais (com produtos já carregados)
+            contents: Textos já formatados das notas (opcional)
+
+        Returns:
+            Quantidade de notas indexadas
+        """
+        if not notas:
+            return 0
+
+        if contents is None:
+            contents = [self._format_nota_fiscal_text(nota) for nota in notas]
+        embeddings = self.generate_embeddings(contents)
+        document_ids = [nota.id for nota in notas]
+
+        try:
+            # Remove embeddings antigos do lote (se existirem)
+            deleted = DocumentEmbedding.query.filter(
+                DocumentEmbedding.document_id.in_(document_ids)
+            ).delete(synchronize_session=False)
+
+            objs = [
+                DocumentEmbedding(
+                    document_id=nota.id,
+                    document_type='nota_fiscal',
+                    content=content,
+                    embedding=embedding,
+                    embedding_dimension=len(embedding),
+                    embedding_model=self.model_name,
+                    content_hash=self._content_hash(content),
+                    meta=self._build_meta(nota)
+                )
+                for nota, content, embedding in zip(notas, contents, embeddings)
+            ]
+            self.db.session.add_all(objs)
+            self.db.session.flush()
+
+            # Captura os ids antes do commit (que expira os objetos)
+            index_rows = [(obj.id, obj.document_id, obj.embedding) for obj in objs]
+            last_updated = max(obj.updated_at for obj in objs)
+
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+        if self.vector_backend == 'pgvector' or not self._index_loaded:
+            self.index.remove_documents(document_ids)
+            self.index.add_many(index_rows)
+            return len(objs)
+
+        with self._index_lock:
+            self.index.remove_documents(document_ids)
+            self.index.add_many(index_rows)
+            expected = self._expected_signature(deleted, len(objs), last_updated)
+            signature = self._index_table_signature()
+            self._index_signature = signature
+
+        if signature != expected:
+            # Outro processo alterou a tabela desde a última leitura: as
+            # alterações dele só entram no índice em memória recarregando-o
+            self.load_index()
+
+        return len(objs)
+
+    def _expected_signature(self, deleted: int, added: int, last_updated) -> Tuple[int, Any]:
+        """
+        Assinatura que a tabela teria se apenas este processo a tivesse
+        alterado desde a última leitura do índice.
+        """
+        count, updated_at = self._index_signature
+        return (count - deleted + added, max(updated_at, last_updated) if updated_at else last_updated)
+
     def index_nota_fiscal(self, nota_fiscal_id: int) -> bool:
         """
         Indexa uma nota fiscal criando seu embedding.
@@ -85,32 +233,7 @@ class RAGEmbeddings:
                 print(f"Nota fiscal {nota_fiscal_id} não encontrada")
                 return False
 
-            # Cria texto da nota fiscal
-            content = self._format_nota_fiscal_text(nota)
-
-            # Gera embedding
-            embedding = self.generate_embedding(content)
-
-            # Metadados
-            meta = {
-                'numero_nota': nota.numero_nota,
-                'fornecedor': nota.razao_social_fornecedor,
-                'valor_total': float(nota.valor_total) if nota.valor_total else 0,
-                'classificacao': nota.classificacao_despesa
-            }
-
-            # Remove embeddings antigos (se existirem)
-            DocumentEmbedding.deletar_por_documento(nota_fiscal_id)
-
-            # Cria novo embedding
-            DocumentEmbedding.criar_novo(
-                document_id=nota_fiscal_id,
-                document_type='nota_fiscal',
-                content=content,
-                embedding=embedding,
-                meta=meta,
-                embedding_model=self.model_name
-            )
+            self._index_batch([nota])
 
             print(f"Nota fiscal {nota_fiscal_id} indexada com sucesso")
             return True
@@ -119,35 +242,202 @@ class RAGEmbeddings:
             print(f"Erro ao indexar nota fiscal {nota_fiscal_id}: {e}")
             return False
 
-    def index_all_notas_fiscais(self) -> Dict[str, Any]:
+    def index_notas_fiscais(self, nota_fiscal_ids: List[int]) -> int:
+        """
+        Indexa um conjunto de notas fiscais em lote (usado pelo worker de
+        indexação assíncrona). Notas já indexadas com o mesmo conteúdo são
+        ignoradas.
+
+        Args:
+            nota_fiscal_ids: IDs das notas fiscais
+
+        Returns:
+            Quantidade de notas indexadas ou já atualizadas
+        """
+        notas = (
+            NotaFiscal.query
+            .options(selectinload(NotaFiscal.produtos))
+            .filter(NotaFiscal.id.in_(nota_fiscal_ids))
+            .all()
+        )
+        if not notas:
+            return 0
+
+        stale_notas, contents = self._select_stale(notas)
+        indexed = self._index_batch(stale_notas, contents)
+
+        print(f"{indexed} notas fiscais indexadas em lote "
+              f"({len(notas) - len(stale_notas)} já atualizadas)")
+        return indexed + len(notas) - len(stale_notas)
+
+    def _iter_notas_em_lotes(self, batch_size: int):
+        """
+        Percorre as notas fiscais em lotes ordenados por id (paginação por
+        chave), carregando os produtos de cada lote em uma única consulta.
+        """
+        last_id = 0
+        while True:
+            notas = (
+                NotaFiscal.query
+                .options(selectinload(NotaFiscal.produtos))
+                .filter(NotaFiscal.id > last_id)
+                .order_by(NotaFiscal.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not notas:
+                return
+            yield notas
+            last_id = notas[-1].id
+
+    def _select_stale(self, notas: List[NotaFiscal], full: bool = False) -> Tuple[List[NotaFiscal], List[str]]:
+        """
+        Seleciona, dentro de um lote, as notas que precisam ser (re)indexadas:
+        notas sem embedding, cujo texto formatado mudou ou cujo embedding foi
+        gerado por outro modelo.
+
+        Args:
+            notas: Lote de notas fiscais
+            full: Se True, reindexa todas as notas do lote
+
+        Returns:
+            Tupla (notas a indexar, textos formatados correspondentes)
+        """
+        contents = [self._format_nota_fiscal_text(nota) for nota in notas]
+        if full:
+            return notas, contents
+
+        existing = {}
+        rows = self.db.session.query(
+            DocumentEmbedding.document_id,
+            DocumentEmbedding.content_hash,
+            DocumentEmbedding.embedding_model
+        ).filter(
+            DocumentEmbedding.document_type == 'nota_fiscal',
+            DocumentEmbedding.document_id.in_([nota.id for nota in notas])
+        )
+        for document_id, content_hash, embedding_model in rows:
+            existing.setdefault(document_id, set()).add((content_hash, embedding_model))
+
+        stale_notas = []
+        stale_contents = []
+        for nota, content in zip(notas, contents):
+            current = {(self._content_hash(content), self.model_name)}
+            if existing.get(nota.id) != current:
+                stale_notas.append(nota)
+                stale_contents.append(content)
+
+        return stale_notas, stale_contents
+
+    def _delete_orphan_embeddings(self) -> int:
+        """
+        Remove embeddings de notas fiscais que não existem mais.
+
+        Returns:
+            Quantidade de registros removidos
         """
-        Indexa todas as notas fiscais do banco de dados.
+        result = self.db.session.execute(text("""
+            DELETE FROM document_embeddings de
+            WHERE de.document_type = 'nota_fiscal'
+              AND (de.document_id IS NULL
+                   OR NOT EXISTS (SELECT 1 FROM nota_fiscal nf WHERE nf.id = de.document_id))
+        """))
+        self.db.session.commit()
+
+        deleted = result.rowcount or 0
+        if deleted and self.vector_backend == 'memory':
+            # Recarrega o índice em memória na próxima busca
+            self._index_loaded = False
+        return deleted
+
+    def index_all_notas_fiscais(self, batch_size: int = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Indexa as notas fiscais do banco de dados, em lotes.
+
+        Por padrão a indexação é incremental: apenas notas novas, notas cujo
+        texto formatado mudou e embeddings gerados por outro modelo são
+        enviados para a API de embeddings.
+
+        Args:
+            batch_size: Notas por lote (padrão: RAG_INDEX_BATCH_SIZE ou 100)
+            full: Se True, reindexa todas as notas independentemente do hash
 
         Returns:
-            Dicionário com estatísticas da indexação
+            Dicionário com estatísticas da indexação, incluindo a vazão de cada lote
         """
+        batch_size = batch_size or int(os.environ.get('RAG_INDEX_BATCH_SIZE', '100'))
+
         try:
-            notas = NotaFiscal.query.all()
-            total = len(notas)
+            total = NotaFiscal.query.count()
             success_count = 0
+            processed = 0
+            skipped = 0
+            stale_count = 0
+            batches = []
+            started = time.perf_counter()
+
+            modo = 'completa' if full else 'incremental'
+            print(f"Iniciando indexação {modo} de {total} notas fiscais em lotes de {batch_size}...")
+
+            for numero, notas in enumerate(self._iter_notas_em_lotes(batch_size), 1):
+                batch_started = time.perf_counter()
+                processed += len(notas)
+
+                stale_notas, contents = self._select_stale(notas, full=full)
+                skipped += len(notas) - len(stale_notas)
+                stale_count += len(stale_notas)
+
+                if not stale_notas:
+                    continue
+
+                try:
+                    indexed = self._index_batch(stale_notas, contents)
+                    error = None
+                except Exception as e:
+                    indexed = 0
+                    error = str(e)
+                    print(f"Erro ao indexar lote {numero}: {e}")
+
+                elapsed = time.perf_counter() - batch_started
+                success_count += indexed
+
+                batch_stats = {
+                    'batch': numero,
+                    'notas': len(stale_notas),
+                    'indexed': indexed,
+                    'seconds': round(elapsed, 3),
+                    'notas_per_second': round(len(stale_notas) / elapsed, 2) if elapsed > 0 else None
+                }
+                if error:
+                    batch_stats['error'] = error
+                batches.append(batch_stats)
 
-            print(f"Iniciando indexação de {total} notas fiscais...")
+                print(f"Lote {numero}: {indexed}/{len(stale_notas)} notas em {elapsed:.2f}s "
+                      f"({processed}/{total})")
 
-            for i, nota in enumerate(notas, 1):
-                print(f"Indexando nota {i}/{total}...")
-                if self.index_nota_fiscal(nota.id):
-                    success_count += 1
+            deleted = self._delete_orphan_embeddings()
 
-            print(f"Indexação concluída: {success_count}/{total} notas indexadas")
+            elapsed_total = time.perf_counter() - started
+            print(f"Indexação concluída em {elapsed_total:.2f}s: {success_count} atualizadas, "
+                  f"{skipped} inalteradas, {deleted} removidas")
 
             return {
                 'success': True,
-                'total_notas': total,
+                'mode': 'full' if full else 'incremental',
+                'total_notas': processed,
                 'indexed': success_count,
-                'failed': total - success_count
+                'failed': stale_count - success_count,
+                'skipped': skipped,
+                'updated': success_count,
+                'deleted': deleted,
+                'batch_size': batch_size,
+                'seconds': round(elapsed_total, 3),
+                'notas_per_second': round(stale_count / elapsed_total, 2) if elapsed_total > 0 else None,
+                'batches': batches
             }
 
         except Exception as e:
+            self.db.session.rollback()
             print(f"Erro ao indexar notas fiscais: {e}")
             return {
                 'success': False,
@@ -192,10 +482,88 @@ class RAGEmbeddings:
 
         return " | ".join(parts)
 
+    def _index_table_signature(self) -> Tuple[int, Any]:
+        """
+        Retorna uma assinatura barata da tabela de embeddings (quantidade e
+        última atualização), usada para detectar alterações feitas por outros
+        processos.
+        """
+        row = self.db.session.query(
+            func.count(DocumentEmbedding.id),
+            func.max(DocumentEmbedding.updated_at)
+        ).one()
+        return (row[0], row[1])
+
+    def load_index(self) -> int:
+        """
+        (Re)carrega o índice vetorial em memória a partir do banco de dados.
+
+        Apenas as colunas id, document_id e embedding são lidas, em lotes.
+
+        Returns:
+            Quantidade de vetores carregados
+        """
+        if self.vector_backend == 'pgvector':
+            return len(self.index)
+
+        with self._index_lock:
+            signature = self._index_table_signature()
+
+            rows = (
+                self.db.session.query(
+                    DocumentEmbedding.id,
+                    DocumentEmbedding.document_id,
+                    DocumentEmbedding.embedding
+                )
+                .execution_options(yield_per=1000)
+            )
+
+            index = VectorIndex()
+            batch = []
+            for row in rows:
+                batch.append((row[0], row[1], row[2]))
+                if len(batch) >= 1000:
+                    index.add_many(batch)
+                    batch = []
+            index.add_many(batch)
+
+            self.index = index
+            self._index_loaded = True
+            self._index_signature = signature
+            self._index_checked_at = time.monotonic()
+
+            print(f"Índice vetorial carregado com {len(index)} documentos")
+            return len(index)
+
+    def _ensure_index(self):
+        """
+        Garante que o índice em memória está carregado e, periodicamente,
+        verifica se a tabela foi alterada por outro processo.
+        """
+        if self.vector_backend == 'pgvector':
+            return
+
+        if not self._index_loaded:
+            with self._load_lock:
+                # Outra thread pode ter carregado o índice enquanto esperávamos
+                if not self._index_loaded:
+                    self.load_index()
+            return
+
+        if time.monotonic() - self._index_checked_at < self.index_refresh_seconds:
+            return
+
+        self._index_checked_at = time.monotonic()
+        if self._index_table_signature() != self._index_signature:
+            self.load_index()
+
     def search_similar_documents(self, query: str, top_k: int = 5) -> List[Tuple[DocumentEmbedding, float]]:
         """
         Busca documentos similares à query usando embeddings.
 
+        A pontuação é feita no índice vetorial (em memória ou no pgvector);
+        apenas os top_k registros são carregados do banco de dados.
+
         Args:
             query: Texto da consulta
             top_k: Número de documentos a retornar
@@ -205,68 +573,41 @@ class RAGEmbeddings:
         """
         try:
             # Gera embedding da query usando task_type específico para queries
-            result = genai.embed_content(
-                model=self.model_name,
-                content=query,
+            query_embedding = get_cliente_llm().embed(
+                query,
+                modelo=self.model_name,
                 task_type="retrieval_query"
             )
-            query_embedding = result['embedding']
 
-            # Busca todos os embeddings
-            all_embeddings = DocumentEmbedding.query.all()
+            self._ensure_index()
 
-            if not all_embeddings:
+            hits = self.index.search(query_embedding, top_k)
+            if not hits:
                 return []
 
-            # Calcula similaridades
-            similarities = []
-            for doc_emb in all_embeddings:
-                similarity = self._cosine_similarity(query_embedding, doc_emb.embedding)
-                similarities.append((doc_emb, similarity))
+            # Carrega somente os documentos do top_k
+            docs = DocumentEmbedding.query.filter(
+                DocumentEmbedding.id.in_([doc_id for doc_id, _ in hits])
+            ).all()
+            docs_by_id = {doc.id: doc for doc in docs}
 
-            # Ordena por similaridade (maior primeiro)
-            similarities.sort(key=lambda x: x[1], reverse=True)
-
-            # Retorna top_k
-            return similarities[:top_k]
+            return [
+                (docs_by_id[doc_id], similarity)
+                for doc_id, similarity in hits
+                if doc_id in docs_by_id
+            ]
 
         except Exception as e:
             print(f"Erro ao buscar documentos similares: {e}")
             return []
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """
-        Calcula a similaridade de cosseno entre dois vetores.
-
-        Args:
-            vec1: Primeiro vetor
-            vec2: Segundo vetor
-
-        Returns:
-            Similaridade entre 0 e 1
-        """
-        vec1_np = np.array(vec1)
-        vec2_np = np.array(vec2)
-
-        dot_product = np.dot(vec1_np, vec2_np)
-        norm1 = np.linalg.norm(vec1_np)
-        norm2 = np.linalg.norm(vec2_np)
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        return float(dot_product / (norm1 * norm2))
-
-    def answer_question(self, question: str, top_k: int = 5) -> Dict[str, Any]:
+    def _prepare_answer(self, question: str, top_k: int = 5) -> Tuple[Dict[str, Any], Optional[str]]:
         """
-        Responde uma pergunta usando busca semântica + LLM.
-
-        Args:
-            question: Pergunta do usuário
-            top_k: Número de documentos a recuperar
+        Busca os documentos similares e monta o prompt.
 
         Returns:
-            Dicionário com resposta e metadados
+            Tupla (resultado sem a resposta, prompt); o prompt é None quando não
+            há documentos ou em caso de erro, e o resultado já traz 'answer'
         """
         try:
             # 1. Busca documentos similares
@@ -279,7 +620,7 @@ class RAGEmbeddings:
                     'error': 'Nenhum documento encontrado no banco de dados',
                     'answer': 'Não há documentos indexados no sistema. Por favor, indexe as notas fiscais primeiro.',
                     'method': 'RAG_EMBEDDINGS'
-                }
+                }, None
 
             # 2. Formata o contexto
             context = self._format_context_from_docs(similar_docs)
@@ -307,10 +648,7 @@ Sua tarefa é fornecer uma resposta clara, objetiva e profissional:
 RESPOSTA:
 """
 
-            # 4. Gera a resposta com o LLM
-            response = self.llm_model.generate_content(prompt)
-
-            # 5. Prepara metadados
+            # 4. Prepara metadados
             documents_metadata = [
                 {
                     'content': doc.content[:200] + '...' if len(doc.content) > 200 else doc.content,
@@ -323,20 +661,55 @@ RESPOSTA:
             return {
                 'success': True,
                 'question': question,
-                'answer': response.text,
                 'method': 'RAG_EMBEDDINGS',
                 'documents_retrieved': len(similar_docs),
                 'documents': documents_metadata
-            }
+            }, prompt
 
         except Exception as e:
-            return {
-                'success': False,
-                'question': question,
-                'error': str(e),
-                'answer': f'Erro ao processar a pergunta: {str(e)}',
-                'method': 'RAG_EMBEDDINGS'
-            }
+            return self._error_result(question, e), None
+
+    @staticmethod
+    def _error_result(question: str, error: Exception) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'question': question,
+            'error': str(error),
+            'answer': f'Erro ao processar a pergunta: {str(error)}',
+            'method': 'RAG_EMBEDDINGS'
+        }
+
+    def answer_question(self, question: str, top_k: int = 5) -> Dict[str, Any]:
+        """
+        Responde uma pergunta usando busca semântica + LLM.
+
+        Args:
+            question: Pergunta do usuário
+            top_k: Número de documentos a recuperar
+
+        Returns:
+            Dicionário com resposta e metadados
+        """
+        result, prompt = self._prepare_answer(question, top_k)
+        if prompt is None:
+            return result
+
+        try:
+            # 5. Gera a resposta com o LLM
+            response = get_cliente_llm().gerar(prompt)
+        except Exception as e:
+            return self._error_result(question, e)
+
+        result['answer'] = response.text
+        return result
+
+    def answer_question_stream(self, question: str, top_k: int = 5):
+        """
+        Versão em streaming de `answer_question`: gera o evento 'meta' com os
+        documentos recuperados antes de chamar o LLM e depois os trechos da resposta.
+        """
+        result, prompt = self._prepare_answer(question, top_k)
+        yield from stream_answer(result, prompt)
 
     def _format_context_from_docs(self, docs_with_similarity: List[Tuple[DocumentEmbedding, float]]) -> str:
         """
@@ -374,5 +747,7 @@ RESPOSTA:
             'total_documents_indexed': total_embeddings,
             'total_notas_fiscais': total_notas,
             'indexation_percentage': (total_embeddings / total_notas * 100) if total_notas > 0 else 0,
-            'model_used': self.model_name
+            'model_used': self.model_name,
+            'vector_backend': self.vector_backend,
+            'vectors_in_memory': len(self.index) if self.vector_backend == 'memory' and self._index_loaded else None
         }
@@ -2,13 +2,30 @@
 Implementação do RAG Simples.
 
 Esta abordagem usa consultas SQL diretas ao banco de dados e o LLM (Gemini)
-para elaborar respostas naturais e informativas.
+para elaborar respostas naturais e informativas. Perguntas de agregados
+(resumo, total do período, maiores fornecedores, despesas por classificação)
+são respondidas por um modelo de texto, sem chamar o LLM, a menos que a
+redação pelo LLM seja pedida.
 """
 
 import os
-import google.generativeai as genai
-from typing import Dict, Any, List
+import time
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from .database_retriever import DatabaseRetriever
+from .streaming import stream_answer
+from agents.cliente_llm import get_cliente_llm
+from formatacao import formatar_brl
+
+# Consultas cujo resultado já é a resposta completa (respondidas sem o LLM)
+TEMPLATE_QUERY_TYPES = ('resumo_geral', 'total_periodo', 'maiores_fornecedores', 'por_classificacao')
+
+# Palavras da pergunta que não fazem parte do nome buscado em 'buscar_fornecedor'
+PALAVRAS_IGNORADAS_FORNECEDOR = {
+    'fornecedor', 'fornecedores', 'empresa', 'empresas', 'notas', 'nota', 'fiscal', 'fiscais',
+    'busque', 'buscar', 'busca', 'mostre', 'mostrar', 'liste', 'listar', 'quais', 'qual',
+    'quanto', 'gastamos', 'compras', 'compramos', 'sobre', 'todas', 'todos'
+}
 
 
 class RAGSimple:
@@ -19,23 +36,20 @@ class RAGSimple:
     no banco de dados e usa o Gemini para elaborar uma resposta natural.
     """
 
-    def __init__(self, db):
+    def __init__(self, db, llm_phrasing: bool = None):
         """
         Inicializa o sistema RAG Simples.
 
         Args:
             db: Instância do SQLAlchemy database
+            llm_phrasing: Redige também as respostas de agregados com o LLM
+                (padrão: RAG_SIMPLE_RESPOSTA_LLM ou false)
         """
         self.db = db
         self.retriever = DatabaseRetriever(db)
-
-        # Configura o Gemini
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(
-            os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
-        )
+        if llm_phrasing is None:
+            llm_phrasing = os.environ.get('RAG_SIMPLE_RESPOSTA_LLM', 'false').lower() == 'true'
+        self.llm_phrasing = llm_phrasing
 
     def _analyze_question(self, question: str) -> Dict[str, Any]:
         """
@@ -67,14 +81,24 @@ class RAGSimple:
             else:
                 return {'type': 'resumo_geral', 'params': {}}
 
+        elif (any(word in question_lower for word in ['maiores', 'principais'])
+              and any(word in question_lower for word in ['fornecedor', 'fornecedores'])):
+            return {'type': 'maiores_fornecedores', 'params': {}}
+
         elif any(word in question_lower for word in ['fornecedor', 'empresa']):
             # Busca por fornecedor específico
-            palavras = question_lower.replace('fornecedor', '').replace('empresa', '').strip().split()
-            termo = ' '.join([p for p in palavras if len(p) > 3])
+            palavras = question_lower.strip(' ?!.').split()
+            termo = ' '.join([p for p in palavras if len(p) > 3 and p not in PALAVRAS_IGNORADAS_FORNECEDOR])
             return {'type': 'buscar_fornecedor', 'params': {'termo': termo}}
 
         elif any(word in question_lower for word in ['nota', 'notas', 'fiscal', 'fiscais']):
-            return {'type': 'listar_notas', 'params': {}}
+            filters = {}
+            words = question_lower.split()
+            for i, word in enumerate(words[:-1]):
+                if word.isdigit() and words[i + 1].startswith('dia'):
+                    filters['data_inicio'] = date.today() - timedelta(days=int(word))
+                    break
+            return {'type': 'listar_notas', 'params': {'filters': filters}}
 
         elif any(word in question_lower for word in ['resumo', 'overview', 'visão geral', 'visao geral']):
             return {'type': 'resumo_geral', 'params': {}}
@@ -82,8 +106,8 @@ class RAGSimple:
         elif any(word in question_lower for word in ['estrutura', 'esquema', 'tabelas', 'banco']):
             return {'type': 'esquema', 'params': {}}
 
-        # Pergunta genérica
-        return {'type': 'resumo_geral', 'params': {}}
+        # Pergunta genérica: o resumo serve de contexto, mas a resposta fica com o LLM
+        return {'type': 'resumo_geral', 'params': {'generica': True}}
 
     def _retrieve_data(self, query_type: str, params: Dict[str, Any]) -> Any:
         """
@@ -111,7 +135,8 @@ class RAGSimple:
             return self.retriever.search_by_fornecedor(termo)
 
         elif query_type == 'listar_notas':
-            return self.retriever.search_notas_fiscais()
+            # Apenas as notas que entram no contexto
+            return self.retriever.search_notas_fiscais(params.get('filters'), limit=15)
 
         elif query_type == 'esquema':
             return self.retriever.get_database_schema()
@@ -170,9 +195,9 @@ DESPESAS NO PERÍODO ({data['periodo_dias']} dias):
         elif query_type == 'buscar_fornecedor':
             if not data:
                 return "Nenhuma nota fiscal encontrada para este fornecedor."
-            context = f"NOTAS FISCAIS ENCONTRADAS ({len(data)}):\n"
+            context = f"NOTAS FISCAIS ENCONTRADAS ({len(data)}), DA MAIS PARA A MENOS RELEVANTE:\n"
             for nota in data[:10]:  # Limita a 10 para não sobrecarregar
-                context += f"- Nota {nota['numero_nota']}: R$ {nota['valor_total']:,.2f} "
+                context += f"- Nota {nota['numero_nota']} ({nota['fornecedor']}): R$ {nota['valor_total']:,.2f} "
                 context += f"({nota['data_emissao']}) - {nota['classificacao']}\n"
             return context
 
@@ -188,23 +213,101 @@ DESPESAS NO PERÍODO ({data['periodo_dias']} dias):
 
         return str(data)
 
-    def answer_question(self, question: str) -> Dict[str, Any]:
+    def _render_answer(self, data: Any, query_type: str) -> str:
         """
-        Processa uma pergunta e retorna uma resposta elaborada.
+        Monta a resposta em texto para as consultas de agregados, a partir dos
+        dados do DatabaseRetriever.
 
         Args:
-            question: Pergunta do usuário
+            data: Dados recuperados do banco
+            query_type: Tipo de consulta executada (um de TEMPLATE_QUERY_TYPES)
+
+        Returns:
+            Resposta formatada
+        """
+        if query_type == 'resumo_geral':
+            return (
+                "Resumo financeiro:\n"
+                f"- Notas fiscais lançadas: {data['total_notas_fiscais']}\n"
+                f"- Valor total: {formatar_brl(data['valor_total_geral'])}\n"
+                f"- Últimos 30 dias: {formatar_brl(data['valor_ultimos_30_dias'])}\n"
+                f"- Fornecedores distintos: {data['total_fornecedores_unicos']}"
+            )
+
+        if query_type == 'total_periodo':
+            if not data['quantidade_notas']:
+                return f"Nenhuma nota fiscal foi emitida nos últimos {data['periodo_dias']} dias."
+            notas = 'nota fiscal' if data['quantidade_notas'] == 1 else 'notas fiscais'
+            return (
+                f"Nos últimos {data['periodo_dias']} dias foram emitidas {data['quantidade_notas']} {notas}, "
+                f"totalizando {formatar_brl(data['total_despesas'])} em despesas."
+            )
+
+        if query_type == 'maiores_fornecedores':
+            if not data:
+                return "Nenhuma nota fiscal cadastrada."
+            linhas = [f"Maiores fornecedores por valor total ({len(data)}):"]
+            for i, fornecedor in enumerate(data, 1):
+                notas = 'nota' if fornecedor['quantidade_notas'] == 1 else 'notas'
+                linhas.append(
+                    f"{i}. {fornecedor['fornecedor']} (CNPJ {fornecedor['cnpj']}): "
+                    f"{formatar_brl(fornecedor['total_gasto'])} em {fornecedor['quantidade_notas']} {notas}"
+                )
+            return '\n'.join(linhas)
+
+        if query_type == 'por_classificacao':
+            if not data:
+                return "Nenhuma nota fiscal classificada."
+            total = sum(item['total'] for item in data) or 1
+            linhas = ["Despesas por classificação:"]
+            for i, item in enumerate(data, 1):
+                notas = 'nota' if item['quantidade'] == 1 else 'notas'
+                percentual = f"{item['total'] / total * 100:.1f}".replace('.', ',')
+                linhas.append(
+                    f"{i}. {item['classificacao']}: {formatar_brl(item['total'])} "
+                    f"({percentual}% do total, {item['quantidade']} {notas})"
+                )
+            return '\n'.join(linhas)
+
+        return str(data)
+
+    def _prepare_answer(self, question: str, llm_phrasing: bool = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Analisa a pergunta, recupera os dados e monta o prompt.
 
         Returns:
-            Dicionário com resposta e metadados
+            Tupla (resultado, prompt). O prompt é None quando a resposta já
+            está em 'answer': consultas de agregados sem redação pelo LLM
+            (answer_path 'template') ou erro
         """
+        if llm_phrasing is None:
+            llm_phrasing = self.llm_phrasing
+
         try:
+            inicio = time.perf_counter()
+
             # 1. Analisa a pergunta
             query_info = self._analyze_question(question)
 
             # 2. Recupera dados relevantes
             data = self._retrieve_data(query_info['type'], query_info['params'])
 
+            result = {
+                'success': True,
+                'question': question,
+                'query_type': query_info['type'],
+                'data_retrieved': data,
+                'method': 'RAG_SIMPLE',
+                'answer_path': 'llm',
+                'latency_ms': {'retrieval': round((time.perf_counter() - inicio) * 1000, 1)}
+            }
+
+            if (not llm_phrasing and query_info['type'] in TEMPLATE_QUERY_TYPES
+                    and not query_info['params'].get('generica')):
+                result['answer_path'] = 'template'
+                result['answer'] = self._render_answer(data, query_info['type'])
+                return result, None
+
             # 3. Formata o contexto
             context = self._format_context(data, query_info['type'])
 
@@ -230,26 +333,57 @@ Sua tarefa é fornecer uma resposta clara, objetiva e profissional:
 RESPOSTA:
 """
 
-            # 5. Gera a resposta com o LLM
-            response = self.model.generate_content(prompt)
+            return result, prompt
 
-            return {
-                'success': True,
-                'question': question,
-                'answer': response.text,
-                'query_type': query_info['type'],
-                'data_retrieved': data,
-                'method': 'RAG_SIMPLE'
-            }
+        except Exception as e:
+            return self._error_result(question, e), None
+
+    @staticmethod
+    def _error_result(question: str, error: Exception) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'question': question,
+            'error': str(error),
+            'answer': f'Erro ao processar a pergunta: {str(error)}',
+            'method': 'RAG_SIMPLE'
+        }
+
+    def answer_question(self, question: str, llm_phrasing: bool = None) -> Dict[str, Any]:
+        """
+        Processa uma pergunta e retorna uma resposta elaborada.
+
+        Args:
+            question: Pergunta do usuário
+            llm_phrasing: Redige com o LLM também as respostas de agregados
+                (padrão: o valor definido na inicialização)
 
+        Returns:
+            Dicionário com resposta e metadados; 'answer_path' indica se a
+            resposta veio do modelo de texto ('template') ou do LLM ('llm') e
+            'latency_ms' traz o tempo de recuperação e de geração
+        """
+        result, prompt = self._prepare_answer(question, llm_phrasing)
+        if prompt is None:
+            return result
+
+        try:
+            # 5. Gera a resposta com o LLM
+            inicio = time.perf_counter()
+            response = get_cliente_llm().gerar(prompt)
         except Exception as e:
-            return {
-                'success': False,
-                'question': question,
-                'error': str(e),
-                'answer': f'Erro ao processar a pergunta: {str(e)}',
-                'method': 'RAG_SIMPLE'
-            }
+            return self._error_result(question, e)
+
+        result['answer'] = response.text
+        result['latency_ms']['generation'] = round((time.perf_counter() - inicio) * 1000, 1)
+        return result
+
+    def answer_question_stream(self, question: str, llm_phrasing: bool = None):
+        """
+        Versão em streaming de `answer_question`: gera o evento 'meta' com os
+        dados recuperados antes de chamar o LLM e depois os trechos da resposta.
+        """
+        result, prompt = self._prepare_answer(question, llm_phrasing)
+        yield from stream_answer(result, prompt)
 
     def get_available_queries(self) -> List[str]:
         """
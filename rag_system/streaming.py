@@ -0,0 +1,42 @@
+"""
+Streaming das respostas do RAG.
+
+Os métodos `answer_question_stream` geram eventos (nome, dados): primeiro
+'meta', com o resultado da recuperação (sem a resposta), depois um 'token'
+por trecho gerado pelo LLM (ou um único 'token' com a resposta já pronta) e,
+ao final, 'done' com a resposta completa ou 'error' se a geração falhar.
+"""
+import json
+
+from agents.cliente_llm import get_cliente_llm
+
+
+def stream_answer(result: dict, prompt: str):
+    """Gera os eventos de uma resposta já preparada por `_prepare_answer`."""
+    yield 'meta', {chave: valor for chave, valor in result.items() if chave != 'answer'}
+    if prompt is None:
+        # Resposta já pronta (modelo de texto, nenhum documento ou erro)
+        if result.get('success'):
+            yield 'token', {'text': result['answer']}
+            yield 'done', {'answer': result['answer']}
+        else:
+            yield 'error', {'error': result.get('error'), 'answer': result.get('answer')}
+        return
+
+    partes = []
+    try:
+        for trecho in get_cliente_llm().gerar_stream(prompt):
+            partes.append(trecho)
+            yield 'token', {'text': trecho}
+    except Exception as e:
+        yield 'error', {
+            'error': str(e),
+            'answer': f'Erro ao processar a pergunta: {str(e)}'
+        }
+        return
+    yield 'done', {'answer': ''.join(partes)}
+
+
+def sse(evento: str, dados) -> str:
+    """Formata um evento no padrão Server-Sent Events."""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
@@ -0,0 +1,252 @@
+"""
+Busca textual ranqueada por nome de fornecedor e descrição de produto.
+
+Os textos são comparados sem acentos e em minúsculas pela função SQL
+busca_normalizar() (IMMUTABLE, baseada em translate, para poder ser usada em
+índices de expressão). Três implementações, escolhidas por
+BUSCA_TEXTUAL_BACKEND (padrão: auto):
+
+- trigram: extensão pg_trgm, operador <% (word_similarity) sobre índices GIN
+  gin_trgm_ops; tolera erros de digitação e ordena pela similaridade.
+- fulltext: colunas tsvector geradas (configuração 'portuguese') com índices
+  GIN, consulta por prefixo de todas as palavras e ordenação por ts_rank.
+  As colunas armazenadas evitam recalcular o tsvector de cada linha
+  encontrada só para o ts_rank.
+- like: LOWER(...) LIKE '%termo%' sem índice (banco sem a migração).
+
+No modo auto, usa trigram se a extensão estiver instalada, fulltext se as
+colunas tsvector existirem e like caso contrário. A função, as colunas e os
+índices são criados por scripts/migration_busca_textual.sql (as colunas não
+são mapeadas nos modelos, como embedding_vec em document_embeddings).
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from sqlalchemy import text
+from typing import Any, Dict, List
+
+BACKENDS = ('trigram', 'fulltext', 'like')
+
+ACENTOS = 'ÁÀÂÃÄÅáàâãäåÉÈÊËéèêëÍÌÎÏíìîïÓÒÔÕÖóòôõöÚÙÛÜúùûüÇçÑñ'
+SEM_ACENTOS = 'AAAAAAaaaaaaEEEEeeeeIIIIiiiiOOOOOoooooUUUUuuuuCcNn'
+
+# Coluna tsvector (gerada a partir de busca_normalizar) de cada coluna pesquisada
+COLUNAS_TSVECTOR = {
+    'razao_social_fornecedor': 'busca_fornecedor',
+    'descricao': 'busca_descricao',
+}
+
+SQL_FUNCAO_NORMALIZAR = f"""
+    CREATE OR REPLACE FUNCTION busca_normalizar(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT lower(translate(coalesce(texto, ''), '{ACENTOS}', '{SEM_ACENTOS}'))
+    $$
+"""
+
+
+def normalizar(termo: str) -> str:
+    """Equivalente em Python de busca_normalizar(): minúsculas e sem acentos."""
+    texto = unicodedata.normalize('NFKD', termo or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+class TextSearch:
+    """Busca ranqueada em nota_fiscal.razao_social_fornecedor e produto_nota_fiscal.descricao."""
+
+    # Backend detectado no banco (uma vez por processo)
+    _backend_detectado = None
+    _backend_lock = threading.Lock()
+
+    def __init__(self, db, backend: str = None, notas_table: str = 'nota_fiscal',
+                 produtos_table: str = 'produto_nota_fiscal'):
+        """
+        Args:
+            db: Instância do SQLAlchemy database
+            backend: trigram, fulltext, like ou auto (padrão: BUSCA_TEXTUAL_BACKEND ou auto)
+            notas_table: Tabela de notas (outra apenas no benchmark)
+            produtos_table: Tabela de produtos (outra apenas no benchmark)
+        """
+        self.db = db
+        backend = (backend or os.environ.get('BUSCA_TEXTUAL_BACKEND', 'auto')).lower()
+        if backend != 'auto' and backend not in BACKENDS:
+            raise ValueError(f"BUSCA_TEXTUAL_BACKEND inválido: {backend}")
+        self._backend = None if backend == 'auto' else backend
+        self.notas_table = notas_table
+        self.produtos_table = produtos_table
+
+    @property
+    def backend(self) -> str:
+        if self._backend is None:
+            with TextSearch._backend_lock:
+                if TextSearch._backend_detectado is None:
+                    TextSearch._backend_detectado = self.detectar_backend()
+            self._backend = TextSearch._backend_detectado
+        return self._backend
+
+    def detectar_backend(self) -> str:
+        """Melhor backend disponível no banco."""
+        row = self.db.session.execute(text("""
+            SELECT
+                EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'),
+                EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'busca_normalizar'),
+                EXISTS (SELECT 1 FROM information_schema.columns
+                        WHERE table_name = :tabela AND column_name = :coluna)
+        """), {'tabela': self.notas_table, 'coluna': COLUNAS_TSVECTOR['razao_social_fornecedor']}).fetchone()
+        if row[0] and row[1]:
+            return 'trigram'
+        if row[2]:
+            return 'fulltext'
+        print("Busca textual sem índice: execute python scripts/migrar.py (scripts/migration_busca_textual.sql)")
+        return 'like'
+
+    def criar_indices(self, backend: str = None):
+        """
+        Cria a função busca_normalizar, as colunas tsvector e os índices GIN do
+        backend (o mesmo que a migração faz; usado pelo benchmark nas suas tabelas).
+        """
+        backend = backend or self.backend
+        self.db.session.execute(text(SQL_FUNCAO_NORMALIZAR))
+        colunas = ((self.notas_table, 'razao_social_fornecedor'), (self.produtos_table, 'descricao'))
+        for tabela, coluna in colunas:
+            if backend == 'trigram':
+                self.db.session.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_{tabela}_{coluna}_trgm "
+                    f"ON {tabela} USING gin (busca_normalizar({coluna}) gin_trgm_ops)"
+                ))
+            elif backend == 'fulltext':
+                vetor = COLUNAS_TSVECTOR[coluna]
+                self.db.session.execute(text(
+                    f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS {vetor} tsvector "
+                    f"GENERATED ALWAYS AS (to_tsvector('portuguese', busca_normalizar({coluna}))) STORED"
+                ))
+                self.db.session.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_{tabela}_{vetor} ON {tabela} USING gin ({vetor})"
+                ))
+        self.db.session.commit()
+
+    def _condicao(self, coluna: str, termo: str, backend: str, alias: str = ''):
+        """Retorna (WHERE, expressão de relevância, parâmetros) para a coluna."""
+        if backend == 'fulltext':
+            vetor = f"{alias}{COLUNAS_TSVECTOR[coluna]}"
+            return (
+                f"{vetor} @@ to_tsquery('portuguese', :consulta)",
+                f"ts_rank({vetor}, to_tsquery('portuguese', :consulta))",
+                {'consulta': self._tsquery(termo)}
+            )
+        coluna = f"{alias}{coluna}"
+        if backend == 'trigram':
+            return (
+                f"busca_normalizar(:termo) <% busca_normalizar({coluna})",
+                f"word_similarity(busca_normalizar(:termo), busca_normalizar({coluna}))",
+                {'termo': termo}
+            )
+        padrao = ' '.join(termo.split()).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"LOWER({coluna}) LIKE LOWER(:padrao)", "1.0", {'padrao': f'%{padrao}%'}
+
+    @staticmethod
+    def _tsquery(termo: str) -> str:
+        """Todas as palavras do termo, cada uma por prefixo ('sao:* & joao:*')."""
+        palavras = re.findall(r'[a-z0-9]+', normalizar(termo))
+        return ' & '.join(f'{palavra}:*' for palavra in palavras)
+
+    def _termo_valido(self, termo: str, backend: str) -> bool:
+        if backend == 'fulltext':
+            return bool(self._tsquery(termo))
+        return bool(normalizar(termo))
+
+    def buscar_notas_por_fornecedor(self, termo: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Notas fiscais cujo fornecedor corresponde ao termo, das mais relevantes
+        para as menos relevantes (e das mais recentes, no empate).
+        """
+        backend = self.backend
+        if not self._termo_valido(termo, backend):
+            return []
+        where, relevancia, params = self._condicao('razao_social_fornecedor', termo, backend)
+        rows = self.db.session.execute(text(f"""
+            SELECT id, razao_social_fornecedor, cnpj_fornecedor, numero_nota,
+                   data_emissao, valor_total, classificacao_despesa, {relevancia} AS relevancia
+            FROM {self.notas_table}
+            WHERE {where}
+            ORDER BY relevancia DESC, data_emissao DESC NULLS LAST, id DESC
+            LIMIT :limit
+        """), {**params, 'limit': limit}).fetchall()
+
+        return [
+            {
+                'id': row[0],
+                'fornecedor': row[1],
+                'cnpj': row[2],
+                'numero_nota': row[3],
+                'data_emissao': row[4].strftime('%d/%m/%Y') if row[4] else None,
+                'valor_total': float(row[5]) if row[5] else 0,
+                'classificacao': row[6],
+                'relevancia': round(float(row[7]), 4)
+            }
+            for row in rows
+        ]
+
+    def buscar_fornecedores(self, termo: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Fornecedores que correspondem ao termo, com quantidade e total das suas notas."""
+        backend = self.backend
+        if not self._termo_valido(termo, backend):
+            return []
+        where, relevancia, params = self._condicao('razao_social_fornecedor', termo, backend)
+        rows = self.db.session.execute(text(f"""
+            SELECT razao_social_fornecedor, cnpj_fornecedor, COUNT(*), COALESCE(SUM(valor_total), 0),
+                   MAX({relevancia}) AS relevancia
+            FROM {self.notas_table}
+            WHERE {where}
+            GROUP BY razao_social_fornecedor, cnpj_fornecedor
+            ORDER BY relevancia DESC, 4 DESC
+            LIMIT :limit
+        """), {**params, 'limit': limit}).fetchall()
+
+        return [
+            {
+                'fornecedor': row[0],
+                'cnpj': row[1],
+                'quantidade_notas': row[2],
+                'total': float(row[3]),
+                'relevancia': round(float(row[4]), 4)
+            }
+            for row in rows
+        ]
+
+    def buscar_produtos(self, termo: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Produtos cuja descrição corresponde ao termo, com a nota de origem (os
+        mais recentes no empate). As notas são lidas só para os selecionados.
+        """
+        backend = self.backend
+        if not self._termo_valido(termo, backend):
+            return []
+        where, relevancia, params = self._condicao('descricao', termo, backend, alias='p.')
+        rows = self.db.session.execute(text(f"""
+            SELECT p.id, p.descricao, n.id, n.numero_nota, n.razao_social_fornecedor,
+                   n.data_emissao, p.relevancia
+            FROM (
+                SELECT p.id, p.descricao, p.nota_fiscal_id, {relevancia} AS relevancia
+                FROM {self.produtos_table} p
+                WHERE {where}
+                ORDER BY relevancia DESC, p.id DESC
+                LIMIT :limit
+            ) p
+            LEFT JOIN {self.notas_table} n ON n.id = p.nota_fiscal_id
+            ORDER BY p.relevancia DESC, p.id DESC
+        """), {**params, 'limit': limit}).fetchall()
+
+        return [
+            {
+                'id': row[0],
+                'descricao': row[1],
+                'nota_fiscal_id': row[2],
+                'numero_nota': row[3],
+                'fornecedor': row[4],
+                'data_emissao': row[5].strftime('%d/%m/%Y') if row[5] else None,
+                'relevancia': round(float(row[6]), 4)
+            }
+            for row in rows
+        ]
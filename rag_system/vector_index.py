@@ -0,0 +1,278 @@
+"""
+Índices vetoriais para a busca semântica do RAG com Embeddings.
+
+- VectorIndex: mantém todos os embeddings já normalizados em uma única matriz
+  float32 em memória, de modo que a similaridade de cosseno contra todo o
+  acervo é um único produto matriz-vetor, seguido de uma seleção parcial
+  (argpartition) do top-k.
+- PgVectorIndex: delega a busca ao PostgreSQL com a extensão pgvector
+  (ORDER BY embedding_vec <=> :q LIMIT k), usando o índice HNSW/IVFFlat
+  criado por scripts/migration_pgvector.sql.
+"""
+
+import threading
+import numpy as np
+from sqlalchemy import text
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+class VectorIndex:
+    """
+    Índice vetorial residente em memória.
+
+    Cada linha da matriz corresponde a um registro de DocumentEmbedding,
+    identificado pelo seu id e pelo id do documento de origem.
+    """
+
+    # Capacidade inicial da matriz (cresce dobrando conforme necessário)
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, dimension: Optional[int] = None):
+        """
+        Inicializa um índice vazio.
+
+        Args:
+            dimension: Dimensionalidade dos vetores (definida no primeiro
+                vetor adicionado se não for informada)
+        """
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._size = 0
+        self._matrix = None
+        self._ids = None
+        self._document_ids = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Normaliza as linhas para norma 1 (linhas nulas permanecem nulas)."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, required: int):
+        """Garante espaço para `required` linhas, realocando se necessário."""
+        if self._matrix is not None and self._matrix.shape[0] >= required:
+            return
+
+        capacity = self.INITIAL_CAPACITY if self._matrix is None else self._matrix.shape[0]
+        while capacity < required:
+            capacity *= 2
+
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        document_ids = np.zeros(capacity, dtype=np.int64)
+
+        if self._matrix is not None and self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+            document_ids[:self._size] = self._document_ids[:self._size]
+
+        self._matrix = matrix
+        self._ids = ids
+        self._document_ids = document_ids
+
+    def clear(self):
+        """Remove todos os vetores do índice."""
+        with self._lock:
+            self._size = 0
+            self._matrix = None
+            self._ids = None
+            self._document_ids = None
+
+    def add_many(self, rows: Iterable[Tuple[int, Optional[int], Sequence[float]]]) -> int:
+        """
+        Adiciona vários vetores ao índice.
+
+        Args:
+            rows: Iterável de tuplas (id, document_id, embedding)
+
+        Returns:
+            Quantidade de vetores adicionados
+        """
+        rows = [row for row in rows if row[2] is not None and len(row[2]) > 0]
+        if not rows:
+            return 0
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = len(rows[0][2])
+
+            # Ignora vetores com dimensionalidade diferente da do índice
+            rows = [row for row in rows if len(row[2]) == self.dimension]
+            if not rows:
+                return 0
+
+            vectors = self._normalize(np.asarray([row[2] for row in rows], dtype=np.float32))
+
+            start = self._size
+            end = start + len(rows)
+            self._ensure_capacity(end)
+
+            self._matrix[start:end] = vectors
+            self._ids[start:end] = [row[0] for row in rows]
+            self._document_ids[start:end] = [row[1] if row[1] is not None else -1 for row in rows]
+            self._size = end
+
+            return len(rows)
+
+    def add(self, row_id: int, document_id: Optional[int], embedding: Sequence[float]) -> bool:
+        """
+        Adiciona um único vetor ao índice.
+
+        Returns:
+            True se o vetor foi adicionado
+        """
+        return self.add_many([(row_id, document_id, embedding)]) == 1
+
+    def remove_documents(self, document_ids: Iterable[int]) -> int:
+        """
+        Remove do índice todos os vetores dos documentos informados.
+
+        Returns:
+            Quantidade de vetores removidos
+        """
+        document_ids = np.fromiter(document_ids, dtype=np.int64)
+        if document_ids.size == 0:
+            return 0
+
+        with self._lock:
+            if not self._size:
+                return 0
+
+            keep = ~np.isin(self._document_ids[:self._size], document_ids)
+            removed = self._size - int(keep.sum())
+            if removed:
+                kept = int(keep.sum())
+                self._matrix[:kept] = self._matrix[:self._size][keep]
+                self._ids[:kept] = self._ids[:self._size][keep]
+                self._document_ids[:kept] = self._document_ids[:self._size][keep]
+                self._size = kept
+
+            return removed
+
+    def remove_document(self, document_id: int) -> int:
+        """Remove do índice todos os vetores de um documento."""
+        return self.remove_documents([document_id])
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Busca os vetores mais similares à consulta.
+
+        Args:
+            query_embedding: Vetor da consulta
+            top_k: Número de resultados a retornar
+
+        Returns:
+            Lista de tuplas (id, similaridade), da maior para a menor similaridade
+        """
+        with self._lock:
+            if not self._size or top_k <= 0:
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            if query.shape != (self.dimension,):
+                raise ValueError(
+                    f"Dimensão da consulta ({query.shape[0]}) difere da do índice ({self.dimension})"
+                )
+
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+
+            scores = self._matrix[:self._size] @ (query / norm)
+            ids = self._ids[:self._size].copy()
+
+        k = min(top_k, scores.shape[0])
+        if k < scores.shape[0]:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(scores.shape[0])
+
+        ordered = candidates[np.argsort(scores[candidates])[::-1]]
+
+        return [(int(ids[i]), float(scores[i])) for i in ordered]
+
+
+class PgVectorIndex:
+    """
+    Índice vetorial armazenado no PostgreSQL (pgvector).
+
+    A coluna embedding_vec é mantida pelo trigger criado na migração, então
+    as operações de escrita são no-ops: basta gravar DocumentEmbedding
+    normalmente.
+    """
+
+    def __init__(self, db, exact: bool = False, ef_search: Optional[int] = None):
+        """
+        Inicializa o índice.
+
+        Args:
+            db: Instância do SQLAlchemy database
+            exact: Se True, força varredura exata (ignora o índice ANN)
+            ef_search: Valor de hnsw.ef_search para buscas aproximadas (opcional)
+        """
+        self.db = db
+        self.exact = exact
+        self.ef_search = ef_search
+
+    def __len__(self) -> int:
+        return self.db.session.execute(
+            text("SELECT COUNT(embedding_vec) FROM document_embeddings")
+        ).scalar() or 0
+
+    def clear(self):
+        pass
+
+    def add_many(self, rows) -> int:
+        return 0
+
+    def add(self, row_id, document_id, embedding) -> bool:
+        return False
+
+    def remove_documents(self, document_ids) -> int:
+        return 0
+
+    def remove_document(self, document_id) -> int:
+        return 0
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Busca os vetores mais similares à consulta diretamente no PostgreSQL.
+
+        Args:
+            query_embedding: Vetor da consulta
+            top_k: Número de resultados a retornar
+
+        Returns:
+            Lista de tuplas (id, similaridade), da maior para a menor similaridade
+        """
+        if top_k <= 0:
+            return []
+
+        vector_literal = '[' + ','.join(repr(float(v)) for v in query_embedding) + ']'
+
+        if self.exact:
+            # Somar 0 à distância impede o uso do índice ANN: varredura exata
+            order_by = "(embedding_vec <=> CAST(:q AS vector)) + 0"
+        else:
+            order_by = "embedding_vec <=> CAST(:q AS vector)"
+            if self.ef_search:
+                self.db.session.execute(
+                    text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+                    {'ef': str(int(self.ef_search))}
+                )
+
+        query = text(f"""
+            SELECT id, 1 - (embedding_vec <=> CAST(:q AS vector)) AS similarity
+            FROM document_embeddings
+            WHERE embedding_vec IS NOT NULL
+            ORDER BY {order_by}
+            LIMIT :k
+        """)
+
+        rows = self.db.session.execute(query, {'q': vector_literal, 'k': top_k}).fetchall()
+
+        return [(row[0], float(row[1])) for row in rows]
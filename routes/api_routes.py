@@ -1,28 +1,49 @@
 """
 Rotas da API REST para validação e cadastro de dados.
 """
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, stream_with_context
 from models.pessoas import Pessoas
 from models.classificacao import Classificacao
 from models.parcelas_contas import ParcelasContas
 from models.movimento_contas import MovimentoContas
 from models.nota_fiscal import NotaFiscal, ProdutoNotaFiscal
+from models.processamento_job import ProcessamentoJob
 from datetime import datetime
 from models import db
-from rag_system import RAGSimple, RAGEmbeddings
+from models.versao_dados import VersaoDados
+from models.resumo_mensal import ResumoMensal
+from rag_system import RAGSimple, RAGEmbeddings, IndexingWorker, AnswerCache, DatabaseRetriever, TextSearch
+from rag_system.streaming import sse
+from agents.cache_extracao import CacheExtracao
+from agents.cliente_llm import get_cliente_llm
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 # Inicializar o sistema RAG (será configurado depois da inicialização do app)
 rag_simple = None
 rag_embeddings = None
+indexing_worker = None
+rag_answer_cache = None
 
 
 def init_rag_system(database):
     """Inicializa o sistema RAG com a instância do banco de dados."""
-    global rag_simple, rag_embeddings
+    global rag_simple, rag_embeddings, indexing_worker, rag_answer_cache
     rag_simple = RAGSimple(database)
 
+    # Carga inicial do resumo mensal (tabela recém-criada em um banco com notas)
+    try:
+        if ResumoMensal.precisa_reconstruir():
+            print(f"Resumo mensal reconstruído: {ResumoMensal.reconstruir()} linhas")
+    except Exception as e:
+        database.session.rollback()
+        print(f"Erro ao reconstruir o resumo mensal: {e}")
+
+    # Cache de respostas por pergunta normalizada, método e versão dos dados
+    if os.environ.get('RAG_CACHE', 'true').lower() == 'true':
+        rag_answer_cache = AnswerCache()
+
     # Inicializa RAG com embeddings (pode demorar devido ao carregamento do modelo)
     try:
         print("Inicializando RAG com Embeddings...")
@@ -32,83 +53,156 @@ def init_rag_system(database):
         print(f"Erro ao inicializar RAG com Embeddings: {e}")
         rag_embeddings = None
 
+    # Indexação automática das notas salvas (em segundo plano)
+    if rag_embeddings is not None and os.environ.get('RAG_AUTO_INDEX', 'true').lower() == 'true':
+        indexing_worker = IndexingWorker(current_app._get_current_object(), rag_embeddings)
 
-@api_bp.route('/validar', methods=['POST'])
-def validar_dados():
+
+def agendar_indexacao(nota_fiscal_id):
+    """Agenda a indexação assíncrona de uma nota fiscal recém-salva."""
+    if indexing_worker is not None and nota_fiscal_id is not None:
+        indexing_worker.enqueue(nota_fiscal_id)
+
+
+# Máximo de notas por requisição em /api/validar/lote
+VALIDACAO_LOTE_MAXIMO = 1000
+
+# Tipos de pessoa aceitos, em ordem de preferência, quando o mesmo documento
+# aparece em mais de um cadastro (sem correspondência, vale qualquer tipo)
+TIPOS_FORNECEDOR = ('CLIENTE-FORNECEDOR', 'FORNECEDOR')
+TIPOS_FATURADO = ('FATURADO',)
+
+
+def _texto(nota, campo, subcampo=None):
     """
-    Verifica se fornecedor, faturado e classificação de despesa existem no banco de dados
-    Adaptado para funcionar com a interface existente
+    Valor de um campo de texto da nota (None se ausente ou vazio).
+    Números são aceitos e convertidos; listas e objetos geram ValueError.
     """
-    data = request.json
-    print("Dados recebidos para validação:", data)  # Log para debug
+    valor, nome = nota.get(campo), campo
+    if subcampo is not None:
+        if valor is None:
+            return None
+        if not isinstance(valor, dict):
+            raise ValueError(f'{campo} deve ser um objeto')
+        valor, nome = valor.get(subcampo), f'{campo}.{subcampo}'
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, (str, int, float)):
+        raise ValueError(f'{nome} deve ser texto')
+    return str(valor)
+
+
+def _campos_validacao(nota):
+    """(CNPJ do fornecedor, CPF do faturado, classificação de despesa) da nota."""
+    cnpj_fornecedor = _texto(nota, 'Fornecedor', 'CNPJ')
+    cpf_faturado = _texto(nota, 'Faturado', 'CPF')
+    return (
+        cnpj_fornecedor.strip() if cnpj_fornecedor else None,
+        cpf_faturado.strip() if cpf_faturado else None,
+        _texto(nota, 'Classificacao_Despesa')
+    )
 
-    # Verificar fornecedor
-    fornecedor_info = {
-        'existe': False,
-        'id': None
-    }
 
-    # Adaptar para o formato da interface existente
-    cnpj_fornecedor = data.get('Fornecedor', {}).get('CNPJ')
-    print(f"CNPJ Fornecedor: {cnpj_fornecedor}")  # Log para debug
-    if cnpj_fornecedor:
-        # Tenta com ambos os tipos possíveis
-        fornecedor = Pessoas.verificar_existencia(tipo='CLIENTE-FORNECEDOR', cpf_cnpj=cnpj_fornecedor)
-        if not fornecedor:
-            fornecedor = Pessoas.verificar_existencia(tipo='FORNECEDOR', cpf_cnpj=cnpj_fornecedor)
-        if not fornecedor:
-            fornecedor = Pessoas.verificar_existencia(cpf_cnpj=cnpj_fornecedor)  # Tenta sem filtro de tipo
-
-        if fornecedor:
-            fornecedor_info['existe'] = True
-            fornecedor_info['id'] = fornecedor.id
-            print(f"Fornecedor encontrado: {fornecedor.id}")  # Log para debug
-        else:
-            print("Fornecedor não encontrado no banco")  # Log para debug
+def _escolher_pessoa(pessoas, tipos_preferidos):
+    for tipo in tipos_preferidos:
+        for pessoa in pessoas:
+            if pessoa.tipo == tipo:
+                return pessoa
+    return pessoas[0] if pessoas else None
 
-    # Verificar faturado
-    faturado_info = {
-        'existe': False,
-        'id': None
-    }
 
-    cpf_faturado = data.get('Faturado', {}).get('CPF')
-    print(f"CPF Faturado: {cpf_faturado}")  # Log para debug
-    if cpf_faturado:
-        faturado = Pessoas.verificar_existencia(tipo='FATURADO', cpf_cnpj=cpf_faturado)
-        if not faturado:
-            faturado = Pessoas.verificar_existencia(cpf_cnpj=cpf_faturado)  # Tenta sem filtro de tipo
-
-        if faturado:
-            faturado_info['existe'] = True
-            faturado_info['id'] = faturado.id
-            print(f"Faturado encontrado: {faturado.id}")  # Log para debug
-        else:
-            print("Faturado não encontrado no banco")  # Log para debug
+def _situacao(registro):
+    return {'existe': registro is not None, 'id': registro.id if registro else None}
 
-    # Verificar classificação de despesa
-    despesa_info = {
-        'existe': False,
-        'id': None
-    }
 
-    classificacao_despesa = data.get('Classificacao_Despesa')
+def validar_notas_fiscais(notas):
+    """
+    Verifica se fornecedor, faturado e classificação de despesa de cada nota
+    (no formato extraído pelo agente) existem no banco de dados.
 
-    print(f"Classificação Despesa: {classificacao_despesa}")  # Log para debug
-    if classificacao_despesa:
-        despesa = Classificacao.verificar_existencia('DESPESA', classificacao_despesa)
-        if despesa:
-            despesa_info['existe'] = True
-            despesa_info['id'] = despesa.id
-            print(f"Despesa encontrada: {despesa.id}")  # Log para debug
-        else:
-            print("Classificação de despesa não encontrada no banco")  # Log para debug
+    Todos os CPFs/CNPJs são resolvidos em uma consulta e todas as
+    classificações em outra, qualquer que seja a quantidade de notas.
 
-    return jsonify({
-        'fornecedor': fornecedor_info,
-        'faturado': faturado_info,
-        'classificacao': despesa_info
-    })
+    Returns:
+        Lista, na ordem das notas, de {'fornecedor', 'faturado', 'classificacao'},
+        cada um com 'existe' e 'id'; notas que não são objetos ou com CNPJ, CPF
+        ou classificação que não são texto vêm apenas com 'error'
+    """
+    campos = []
+    for nota in notas:
+        try:
+            if not isinstance(nota, dict):
+                raise ValueError('A nota fiscal deve ser um objeto')
+            campos.append(_campos_validacao(nota))
+        except ValueError as e:
+            campos.append(str(e))
+    validos = [campo for campo in campos if isinstance(campo, tuple)]
+
+    pessoas = Pessoas.buscar_por_documentos(
+        [documento for cnpj, cpf, _ in validos for documento in (cnpj, cpf)]
+    )
+    classificacoes = Classificacao.buscar_por_descricoes('DESPESA', [descricao for _, _, descricao in validos])
+
+    resultados = []
+    for campo in campos:
+        if not isinstance(campo, tuple):
+            resultados.append({'error': campo})
+            continue
+        cnpj_fornecedor, cpf_faturado, classificacao_despesa = campo
+        resultados.append({
+            'fornecedor': _situacao(_escolher_pessoa(pessoas.get(cnpj_fornecedor, []), TIPOS_FORNECEDOR)),
+            'faturado': _situacao(_escolher_pessoa(pessoas.get(cpf_faturado, []), TIPOS_FATURADO)),
+            'classificacao': _situacao(classificacoes.get(classificacao_despesa)),
+        })
+    return resultados
+
+
+@api_bp.route('/validar', methods=['POST'])
+def validar_dados():
+    """
+    Verifica se fornecedor, faturado e classificação de despesa existem no banco de dados
+    Adaptado para funcionar com a interface existente
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Envie os dados da nota fiscal em JSON'}), 400
+
+    resultado = validar_notas_fiscais([data])[0]
+    if 'error' in resultado:
+        return jsonify({'success': False, 'error': resultado['error']}), 400
+    return jsonify(resultado)
+
+
+@api_bp.route('/validar/lote', methods=['POST'])
+def validar_dados_lote():
+    """
+    Valida várias notas fiscais de uma vez (ver validar_notas_fiscais), em duas
+    consultas ao banco.
+    JSON: {"notas": [nota, ...]} (ou a lista de notas), no formato de /api/validar
+    Retorna 'resultados' na mesma ordem das notas (com 'error' nas notas em formato inválido).
+    """
+    data = request.get_json(silent=True)
+    notas = data.get('notas') if isinstance(data, dict) else data
+    if not isinstance(notas, list):
+        return jsonify({'success': False, 'error': 'Envie {"notas": [...]} com as notas fiscais em JSON'}), 400
+    if len(notas) > VALIDACAO_LOTE_MAXIMO:
+        return jsonify({
+            'success': False,
+            'error': f'Máximo de {VALIDACAO_LOTE_MAXIMO} notas por requisição'
+        }), 400
+
+    try:
+        return jsonify({
+            'success': True,
+            'total': len(notas),
+            'resultados': validar_notas_fiscais(notas)
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao validar notas fiscais: {str(e)}'
+        }), 500
 
 
 @api_bp.route('/cadastrar/fornecedor', methods=['POST'])
@@ -233,6 +327,8 @@ def lancar_nota_fiscal():
             db.session.add(produto)
         db.session.commit()
 
+    agendar_indexacao(nota_fiscal.id)
+
     return jsonify({
         'success': True,
         'message': 'Nota fiscal processada com sucesso!',
@@ -241,6 +337,167 @@ def lancar_nota_fiscal():
     })
 
 
+# ==================== ROTAS DE JOBS DE PROCESSAMENTO ====================
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def obter_job(job_id):
+    """
+    Retorna o status de um job de processamento de nota fiscal,
+    com a duração de cada etapa e o resultado quando concluído.
+    """
+    try:
+        job = ProcessamentoJob.query.get(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': 'Job não encontrado'
+            }), 404
+
+        data = job.to_dict()
+        if job.status == 'CONCLUIDO' and job.tipo != 'LOTE':
+            data['resultado_url'] = url_for('web.resultado_processamento', job_id=job.id)
+
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao obter job: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/cache/extracao', methods=['GET'])
+def cache_extracao_status():
+    """
+    Retorna as estatísticas do cache de extração (hits/misses por nível e ocupação).
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'data': CacheExtracao.estatisticas()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao obter status do cache: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/cache/extracao/limpar', methods=['POST'])
+def cache_extracao_limpar():
+    """
+    Aplica a política de expiração do cache de extração (idade e tamanho).
+    """
+    try:
+        cache = CacheExtracao(current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash'))
+        return jsonify({
+            'success': True,
+            'removidas': cache.limpar()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao limpar cache: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/resumo', methods=['GET'])
+def resumo_financeiro():
+    """
+    Resumo financeiro e totais por classificação e por fornecedor
+    (calculados em uma única leitura e mantidos em cache por versão dos dados).
+    """
+    try:
+        agregados = DatabaseRetriever(db).get_agregados()
+        return jsonify({'success': True, **agregados})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao calcular o resumo: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/notas', methods=['GET'])
+def listar_notas():
+    """
+    Lista as notas fiscais em páginas (paginação por cursor, ver
+    DatabaseRetriever.search_notas_fiscais_page).
+
+    Parâmetros: filtros por coluna (data_inicio, data_fim, fornecedor, cnpj,
+    numero_nota, classificacao, valor_min, valor_max), ordem (data_emissao,
+    valor_total ou fornecedor; padrão: data_emissao), direcao (desc ou asc),
+    after (proximo_cursor da página anterior), limit (padrão: 50, máximo: 500)
+    e total (true para também contar as notas dos filtros).
+    """
+    filtros = {nome: request.args.get(nome) for nome in DatabaseRetriever.NOTA_FILTERS}
+    try:
+        pagina = DatabaseRetriever(db).search_notas_fiscais_page(
+            filtros,
+            limit=request.args.get('limit', 50),
+            cursor=request.args.get('after') or None,
+            ordem=request.args.get('ordem', 'data_emissao'),
+            direcao=request.args.get('direcao', 'desc').lower(),
+            contar=request.args.get('total', 'false').lower() == 'true'
+        )
+        return _resposta_listagem(pagina['notas'], pagina['proximo_cursor'], pagina.get('total'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao listar notas fiscais: {str(e)}'
+        }), 500
+
+
+@api_bp.route('/busca', methods=['GET'])
+def busca_textual():
+    """
+    Busca ranqueada por nome de fornecedor ou descrição de produto, sem
+    diferenciar acentos (ver rag_system.text_search).
+
+    Parâmetros: q (termo), tipo (fornecedores, notas ou produtos; padrão:
+    fornecedores) e limit (padrão: 10, máximo: 100).
+    """
+    termo = request.args.get('q', '').strip()
+    tipo = request.args.get('tipo', 'fornecedores')
+    if not termo:
+        return jsonify({'success': False, 'error': 'Informe o termo de busca (q)'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit deve ser um número inteiro'}), 400
+
+    busca = TextSearch(db)
+    buscas = {
+        'fornecedores': busca.buscar_fornecedores,
+        'notas': busca.buscar_notas_por_fornecedor,
+        'produtos': busca.buscar_produtos,
+    }
+    if tipo not in buscas:
+        return jsonify({
+            'success': False,
+            'error': f"tipo inválido: {tipo} (use {', '.join(buscas)})"
+        }), 400
+
+    try:
+        resultados = buscas[tipo](termo, limit)
+        return jsonify({
+            'success': True,
+            'tipo': tipo,
+            'backend': busca.backend,
+            'resultados': resultados
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'Erro na busca: {str(e)}'
+        }), 500
+
+
 # ==================== ROTAS DO SISTEMA RAG ====================
 
 @api_bp.route('/rag/ask', methods=['POST'])
@@ -250,11 +507,19 @@ def rag_ask_question():
 
     Recebe uma pergunta em JSON e retorna uma resposta elaborada.
     Suporta dois métodos: RAG_SIMPLE e RAG_EMBEDDINGS
+
+    Com "stream": true (ou Accept: text/event-stream) a resposta é um fluxo SSE:
+    o evento 'meta' com os dados recuperados, um 'token' por trecho gerado
+    pelo LLM e, ao final, 'done' ou 'error'.
+
+    No método simple, perguntas de agregados são respondidas sem o LLM;
+    "llm": true pede a redação pelo LLM (campo 'answer_path' da resposta).
     """
     try:
         data = request.json
         question = data.get('question', '').strip()
         method = data.get('method', 'simple').lower()  # 'simple' ou 'embeddings'
+        stream = bool(data.get('stream')) or request.accept_mimetypes.best == 'text/event-stream'
 
         if not question:
             return jsonify({
@@ -270,8 +535,12 @@ def rag_ask_question():
                     'error': 'Sistema RAG não inicializado'
                 }), 500
 
-            result = rag_simple.answer_question(question)
-            return jsonify(result)
+            llm_phrasing = data.get('llm')
+            if llm_phrasing is None:
+                llm_phrasing = rag_simple.llm_phrasing
+            llm_phrasing = bool(llm_phrasing)
+            return _rag_answer(rag_simple, 'simple:llm' if llm_phrasing else 'simple', question, stream,
+                               llm_phrasing=llm_phrasing)
 
         elif method == 'embeddings':
             if rag_embeddings is None:
@@ -280,8 +549,7 @@ def rag_ask_question():
                     'error': 'RAG com embeddings não inicializado. Verifique os logs do servidor.'
                 }), 500
 
-            result = rag_embeddings.answer_question(question)
-            return jsonify(result)
+            return _rag_answer(rag_embeddings, 'embeddings', question, stream)
 
         else:
             return jsonify({
@@ -296,6 +564,64 @@ def rag_ask_question():
         }), 500
 
 
+def _rag_answer(rag, method, question, stream, **options):
+    """Responde pela instância do RAG, consultando antes o cache de respostas."""
+    if rag_answer_cache is None:
+        if stream:
+            return _rag_stream_response(rag.answer_question_stream(question, **options))
+        return jsonify(rag.answer_question(question, **options))
+
+    data_version = VersaoDados.atual()
+    key = rag_answer_cache.key(question, method, data_version)
+    cached = rag_answer_cache.get(key)
+
+    if cached is not None:
+        result = dict(cached, question=question, cached=True)
+        if stream:
+            meta = {k: v for k, v in result.items() if k != 'answer'}
+            return _rag_stream_response(iter([
+                ('meta', meta),
+                ('token', {'text': result['answer']}),
+                ('done', {'answer': result['answer']})
+            ]))
+        return jsonify(result)
+
+    def store(result):
+        rag_answer_cache.put(key, result, question, method, data_version)
+
+    if stream:
+        return _rag_stream_response(_cache_stream(rag.answer_question_stream(question, **options), store))
+
+    result = rag.answer_question(question, **options)
+    store(result)
+    return jsonify(dict(result, cached=False))
+
+
+def _cache_stream(eventos, store):
+    """Repassa os eventos do stream e grava a resposta completa no cache ao final."""
+    meta = None
+    for evento, dados in eventos:
+        if evento == 'meta':
+            meta = dict(dados, cached=False)
+            dados = meta
+        elif evento == 'done' and meta is not None and meta.get('success'):
+            store(dict(meta, answer=dados['answer']))
+        yield evento, dados
+
+
+def _rag_stream_response(eventos):
+    """Resposta SSE com os eventos de `answer_question_stream`."""
+    def gerar():
+        for evento, dados in eventos:
+            yield sse(evento, dados)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Sem buffer em proxies (nginx), para os trechos chegarem assim que gerados
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @api_bp.route('/rag/examples', methods=['GET'])
 def rag_get_examples():
     """
@@ -344,13 +670,34 @@ def rag_get_status():
         index_status = rag_embeddings.get_index_status()
         status['index_status'] = index_status
 
+    if indexing_worker is not None:
+        status['indexing_worker'] = indexing_worker.get_status()
+
+    if rag_answer_cache is not None:
+        status['answer_cache'] = rag_answer_cache.get_status()
+
     return jsonify(status)
 
 
+@api_bp.route('/llm/status', methods=['GET'])
+def llm_get_status():
+    """
+    Retorna a configuração do cliente LLM e as métricas por operação
+    (chamadas, erros, tokens e latência).
+    """
+    return jsonify({
+        'success': True,
+        'data': get_cliente_llm().get_status()
+    })
+
+
 @api_bp.route('/rag/index', methods=['POST'])
 def rag_index_documents():
     """
-    Indexa todos os documentos (notas fiscais) para busca semântica.
+    Indexa os documentos (notas fiscais) para busca semântica.
+
+    Por padrão reindexa apenas notas novas ou alteradas.
+    Query params: full (true/false) para forçar a reindexação completa
     """
     try:
         if rag_embeddings is None:
@@ -359,7 +706,8 @@ def rag_index_documents():
                 'error': 'RAG com embeddings não inicializado'
             }), 500
 
-        result = rag_embeddings.index_all_notas_fiscais()
+        full = request.args.get('full', 'false').lower() == 'true'
+        result = rag_embeddings.index_all_notas_fiscais(full=full)
         return jsonify(result)
 
     except Exception as e:
@@ -401,31 +749,63 @@ def rag_index_nota(nota_id):
         }), 500
 
 
+def _parametros_listagem():
+    """
+    Parâmetros comuns das listagens paginadas (ver models.paginacao):
+    tipo (um ou mais, separados por vírgula), incluir_inativos, after (cursor
+    '<data ISO>,<id>'), limit (padrão: 100, máximo: 500) e total (true para
+    também contar os registros dos filtros).
+    """
+    tipos = [tipo.strip() for tipo in request.args.get('tipo', '').split(',') if tipo.strip()]
+    return {
+        'tipos': tipos or None,
+        'incluir_inativos': request.args.get('incluir_inativos', 'false').lower() == 'true',
+        'after': request.args.get('after') or None,
+        'limit': request.args.get('limit'),
+        'contar': request.args.get('total', 'false').lower() == 'true',
+    }
+
+
+def _resposta_listagem(data, proximo_cursor, total):
+    resposta = {
+        'success': True,
+        'data': data,
+        'proximo_cursor': proximo_cursor
+    }
+    if total is not None:
+        resposta['total'] = total
+    return jsonify(resposta)
+
+
 # ==================== ROTAS CRUD PARA PESSOAS ====================
 
 @api_bp.route('/pessoas', methods=['GET'])
 def listar_pessoas():
     """
-    Lista todas as pessoas (filtro opcional por tipo).
-    Query params: tipo (FORNECEDOR, CLIENTE, FATURADO), incluir_inativos (true/false)
+    Lista as pessoas em páginas, das cadastradas mais recentemente para as mais antigas.
+    Query params: tipo (FORNECEDOR, CLIENTE, FATURADO; vários separados por vírgula),
+    busca (razão social ou início do CPF/CNPJ), incluir_inativos (true/false),
+    after, limit e total (ver _parametros_listagem)
     """
     try:
-        tipo = request.args.get('tipo')
-        incluir_inativos = request.args.get('incluir_inativos', 'false').lower() == 'true'
-
-        pessoas = Pessoas.listar_todos(tipo=tipo, incluir_inativos=incluir_inativos)
+        pessoas, proximo_cursor, total = Pessoas.listar_pagina(
+            busca=request.args.get('busca', '').strip() or None,
+            **_parametros_listagem()
+        )
 
+        return _resposta_listagem([{
+            'id': p.id,
+            'tipo': p.tipo,
+            'razao_social': p.razao_social,
+            'cpf_cnpj': p.cpf_cnpj,
+            'status': p.status,
+            'data_cadastro': p.data_cadastro.isoformat() if p.data_cadastro else None
+        } for p in pessoas], proximo_cursor, total)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': [{
-                'id': p.id,
-                'tipo': p.tipo,
-                'razao_social': p.razao_social,
-                'cpf_cnpj': p.cpf_cnpj,
-                'status': p.status,
-                'data_cadastro': p.data_cadastro.isoformat() if p.data_cadastro else None
-            } for p in pessoas]
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -600,25 +980,28 @@ def excluir_pessoa(pessoa_id):
 @api_bp.route('/classificacoes', methods=['GET'])
 def listar_classificacoes():
     """
-    Lista todas as classificações (filtro opcional por tipo).
-    Query params: tipo (RECEITA, DESPESA), incluir_inativos (true/false)
+    Lista as classificações em páginas, das cadastradas mais recentemente para as mais antigas.
+    Query params: tipo (RECEITA, DESPESA), busca (parte da descrição),
+    incluir_inativos (true/false), after, limit e total (ver _parametros_listagem)
     """
     try:
-        tipo = request.args.get('tipo')
-        incluir_inativos = request.args.get('incluir_inativos', 'false').lower() == 'true'
-
-        classificacoes = Classificacao.listar_todos(tipo=tipo, incluir_inativos=incluir_inativos)
+        classificacoes, proximo_cursor, total = Classificacao.listar_pagina(
+            busca=request.args.get('busca', '').strip() or None,
+            **_parametros_listagem()
+        )
 
+        return _resposta_listagem([{
+            'id': c.id,
+            'tipo': c.tipo,
+            'descricao': c.descricao,
+            'status': c.status,
+            'data_cadastro': c.data_cadastro.isoformat() if c.data_cadastro else None
+        } for c in classificacoes], proximo_cursor, total)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': [{
-                'id': c.id,
-                'tipo': c.tipo,
-                'descricao': c.descricao,
-                'status': c.status,
-                'data_cadastro': c.data_cadastro.isoformat() if c.data_cadastro else None
-            } for c in classificacoes]
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -797,31 +1180,26 @@ def excluir_classificacao(classificacao_id):
 @api_bp.route('/movimentos', methods=['GET'])
 def listar_movimentos():
     """
-    Lista todos os movimentos contábeis (filtro opcional por tipo).
-    Query params: tipo (APAGAR, ARECEBER), incluir_inativos (true/false)
+    Lista os movimentos contábeis em páginas, dos mais recentes para os mais antigos.
+    Query params: tipo (APAGAR, ARECEBER), fornecedor_cliente_id, faturado_id,
+    id_min, incluir_inativos (true/false), after, limit e total (ver _parametros_listagem)
     """
     try:
-        tipo = request.args.get('tipo')
-        incluir_inativos = request.args.get('incluir_inativos', 'false').lower() == 'true'
-
-        movimentos = MovimentoContas.listar_todos(tipo=tipo, incluir_inativos=incluir_inativos)
+        movimentos, proximo_cursor, total = MovimentoContas.listar_para_exibicao(
+            fornecedor_cliente_id=request.args.get('fornecedor_cliente_id', type=int),
+            faturado_id=request.args.get('faturado_id', type=int),
+            id_min=request.args.get('id_min', type=int),
+            **_parametros_listagem()
+        )
+        for m in movimentos:
+            m['data_movimento'] = m['data_movimento'].isoformat() if m['data_movimento'] else None
 
+        return _resposta_listagem(movimentos, proximo_cursor, total)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': [{
-                'id': m.id,
-                'tipo': m.tipo,
-                'parcela_id': m.parcela_id,
-                'fornecedor_cliente_id': m.fornecedor_cliente_id,
-                'fornecedor_cliente_nome': m.fornecedor_cliente.razao_social if m.fornecedor_cliente else None,
-                'faturado_id': m.faturado_id,
-                'faturado_nome': m.faturado.razao_social if m.faturado else None,
-                'valor': m.valor,
-                'status': m.status,
-                'data_movimento': m.data_movimento.isoformat() if m.data_movimento else None,
-                'classificacoes': [{'id': c.id, 'descricao': c.descricao, 'tipo': c.tipo} for c in m.classificacoes]
-            } for m in movimentos]
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
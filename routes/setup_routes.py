@@ -3,11 +3,12 @@ Rotas para configuração inicial do sistema.
 Solicita e valida a chave API do Google Gemini via interface web.
 """
 from flask import Blueprint, render_template, request, jsonify
-import google.generativeai as genai
 import os
 from pathlib import Path
 from dotenv import set_key
 
+from agents.cliente_llm import get_cliente_llm, reconfigurar_cliente_llm
+
 setup_bp = Blueprint('setup', __name__, url_prefix='/setup')
 
 ENV_FILE = Path(__file__).parent.parent / '.env'
@@ -19,14 +20,8 @@ def test_gemini_key(api_key):
     Retorna (True, mensagem_sucesso) ou (False, mensagem_erro)
     """
     try:
-        # Configurar API temporariamente
-        genai.configure(api_key=api_key)
-
-        # Tentar criar um modelo e fazer uma requisição simples
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content("Diga apenas 'OK' se você está funcionando.")
-
-        if response and response.text:
+        # Requisição simples com a chave informada, sem trocar a chave em uso
+        if get_cliente_llm().testar_chave(api_key, 'gemini-2.0-flash'):
             return True, "Chave validada com sucesso!"
         else:
             return False, "A API respondeu mas sem conteúdo esperado"
@@ -100,8 +95,8 @@ def validate_and_save():
             # Atualizar variável de ambiente na sessão atual
             os.environ['GEMINI_API_KEY'] = api_key
 
-            # Reconfigurar a API globalmente
-            genai.configure(api_key=api_key)
+            # Recriar o cliente LLM com a nova chave
+            reconfigurar_cliente_llm()
 
             return jsonify({
                 'success': True,
@@ -130,9 +125,10 @@ def check_configuration():
     api_key = os.environ.get('GEMINI_API_KEY')
 
     is_configured = bool(api_key and api_key not in ['sua_chave_api_aqui', '', 'YOUR_API_KEY_HERE'])
+    backend_local = os.environ.get('LLM_BACKEND', 'gemini').lower() == 'local'
 
     return jsonify({
-        'configured': is_configured,
+        'configured': is_configured or backend_local,
         'key_present': bool(api_key),
         'key_preview': f"{api_key[:8]}...{api_key[-4:]}" if is_configured else None
     })
@@ -3,75 +3,272 @@ Rotas web da aplicação para páginas HTML.
 """
 import os
 import json
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, current_app
-from PyPDF2 import PdfReader
+import time
+import uuid
+import shutil
+import tempfile
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, current_app, abort
 from datetime import datetime
+from werkzeug.utils import secure_filename
 
 from models import db
 from models.nota_fiscal import NotaFiscal
-from agents import ProcessadorDeNotaFiscalTool, AgenteProcessador
+from models.processamento_job import ProcessamentoJob
+from agents import ProcessadorDeNotaFiscalTool, AgenteProcessador, FilaProcessamento
+from agents.extrator_pdf import extract_text_from_pdf
+from agents.ingestao_lote import IngestaoLote
+from agents.cache_extracao import CacheExtracao
+from agents.cliente_llm import get_cliente_llm
+from rag_system import DatabaseRetriever
+from formatacao import formatar_brl
 
 web_bp = Blueprint('web', __name__)
 
+# Pool de processamento assíncrono (criado no primeiro upload)
+fila_processamento = None
 
-def extract_text_from_pdf(pdf_file_path):
-    """Extrai o texto de um arquivo PDF local."""
-    try:
-        with open(pdf_file_path, 'rb') as pdf_file:
-            pdf_reader = PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        raise Exception(f"Erro ao extrair texto do PDF: {e}")
+
+def montar_nota_fiscal(resultado):
+    """Monta a NotaFiscal (com seus produtos) a partir do JSON extraído, sem gravar."""
+    from models.nota_fiscal import ProdutoNotaFiscal
+
+    # Converter string de data para objeto date
+    data_emissao = None
+    if resultado.get('Data Emissao'):
+        data_emissao = datetime.strptime(resultado.get('Data Emissao', ''), '%Y-%m-%d').date()
+
+    data_validade = None
+    if resultado.get('Data de Validade'):
+        data_validade = datetime.strptime(resultado.get('Data de Validade', ''), '%Y-%m-%d').date()
+
+    nova_nota = NotaFiscal(
+        razao_social_fornecedor=resultado.get('Fornecedor', {}).get('Razao Social'),
+        cnpj_fornecedor=resultado.get('Fornecedor', {}).get('CNPJ'),
+        nome_faturado=resultado.get('Faturado', {}).get('Nome'),
+        cpf_faturado=resultado.get('Faturado', {}).get('CPF'),
+        numero_nota=resultado.get('Nota Fiscal'),
+        data_emissao=data_emissao,
+        data_validade=data_validade,
+        valor_total=float(resultado.get('Valor Total', 0)),
+        quantidade_parcelas=int(resultado.get('Quantidade de Parcelas', 0)),
+        classificacao_despesa=resultado.get('Classificacao_Despesa')
+    )
+
+    # Adicionar produtos
+    nova_nota.produtos = [
+        ProdutoNotaFiscal(descricao=produto)
+        for produto in resultado.get('Descricao Produtos', [])
+    ]
+
+    return nova_nota
 
 
 def salvar_nota_fiscal_no_banco(resultado):
-    """Salva os dados da nota fiscal no banco de dados."""
+    """
+    Salva os dados da nota fiscal no banco de dados.
+    Retorna o id da nota fiscal criada, ou None em caso de erro.
+    """
     try:
-        # Converter string de data para objeto date
-        data_emissao = None
-        if resultado.get('Data Emissao'):
-            data_emissao = datetime.strptime(resultado.get('Data Emissao', ''), '%Y-%m-%d').date()
-
-        data_validade = None
-        if resultado.get('Data de Validade'):
-            data_validade = datetime.strptime(resultado.get('Data de Validade', ''), '%Y-%m-%d').date()
-
-        # Criar nova nota fiscal
-        from models.nota_fiscal import NotaFiscal, ProdutoNotaFiscal
-        nova_nota = NotaFiscal(
-            razao_social_fornecedor=resultado.get('Fornecedor', {}).get('Razao Social'),
-            cnpj_fornecedor=resultado.get('Fornecedor', {}).get('CNPJ'),
-            nome_faturado=resultado.get('Faturado', {}).get('Nome'),
-            cpf_faturado=resultado.get('Faturado', {}).get('CPF'),
-            numero_nota=resultado.get('Nota Fiscal'),
-            data_emissao=data_emissao,
-            data_validade=data_validade,
-            valor_total=float(resultado.get('Valor Total', 0)),
-            quantidade_parcelas=int(resultado.get('Quantidade de Parcelas', 0)),
-            classificacao_despesa=resultado.get('Classificacao_Despesa')
-        )
+        nova_nota = montar_nota_fiscal(resultado)
 
         db.session.add(nova_nota)
         db.session.flush()  # Para obter o ID da nota fiscal
 
-        # Adicionar produtos
-        for produto in resultado.get('Descricao Produtos', []):
-            produto_nf = ProdutoNotaFiscal(
-                nota_fiscal_id=nova_nota.id,
-                descricao=produto
-            )
-            db.session.add(produto_nf)
-
+        nota_fiscal_id = nova_nota.id
         db.session.commit()
         print("Nota fiscal salva no banco de dados com sucesso!")
-        return True
+
+        # Indexação para busca semântica em segundo plano
+        from routes.api_routes import agendar_indexacao
+        agendar_indexacao(nota_fiscal_id)
+
+        return nota_fiscal_id
     except Exception as e:
         db.session.rollback()
         print(f"Erro ao salvar no banco de dados: {e}")
-        return False
+        return None
+
+
+def salvar_notas_fiscais_em_lote(resultados):
+    """
+    Salva várias notas fiscais em uma única transação.
+    Se o lote falhar, grava nota a nota para isolar as que têm erro.
+    Retorna a lista de ids na mesma ordem dos resultados (None para as que falharam).
+    """
+    from routes.api_routes import agendar_indexacao
+
+    try:
+        notas = [montar_nota_fiscal(resultado) for resultado in resultados]
+        db.session.add_all(notas)
+        db.session.flush()
+
+        ids = [nota.id for nota in notas]
+        db.session.commit()
+        print(f"{len(ids)} notas fiscais salvas no banco de dados em lote!")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao salvar lote ({e}); gravando nota a nota...")
+        return [salvar_nota_fiscal_no_banco(resultado) for resultado in resultados]
+
+    for nota_fiscal_id in ids:
+        agendar_indexacao(nota_fiscal_id)
+
+    return ids
+
+
+def executar_job_processamento(job_id, arquivo=None):
+    """
+    Executa o pipeline de um job de upload:
+    extração do texto do PDF -> extração dos dados com o Gemini -> gravação no banco.
+    PDFs (ou textos) já processados são servidos pelo cache de extração.
+    Registra a duração de cada etapa no job.
+
+    Jobs de lote são executados por executar_job_lote.
+
+    Args:
+        job_id: Id do ProcessamentoJob
+        arquivo: Arquivo temporário com o PDF enviado (se omitido, lê job.caminho_arquivo)
+    """
+    job = ProcessamentoJob.query.get(job_id)
+    if not job:
+        print(f"Job {job_id} não encontrado")
+        if arquivo is not None:
+            arquivo.close()
+        return
+
+    if job.tipo == 'LOTE':
+        return executar_job_lote(job)
+
+    pdf = arquivo if arquivo is not None else job.caminho_arquivo
+
+    inicio_total = time.perf_counter()
+    try:
+        modelo = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash')
+        cache = CacheExtracao(modelo)
+
+        # Cache nível 1: mesmo PDF já processado
+        job.iniciar_etapa('extracao_texto')
+        inicio = time.perf_counter()
+        chave_pdf = CacheExtracao.hash_arquivo(pdf)
+        resultado = cache.buscar_pdf(chave_pdf)
+        origem = 'cache_pdf'
+        invoice_text = None
+
+        if resultado is None:
+            # Extração paralela só quando configurada: o job roda em uma thread do
+            # worker web e cada upload grande criaria o seu próprio pool de processos
+            invoice_text = extract_text_from_pdf(pdf, processos=int(os.environ.get('PDF_PROCESSOS', '1')))
+            # Cache nível 2: mesmo conteúdo em um PDF diferente
+            resultado = cache.buscar_texto(invoice_text)
+            origem = 'cache_texto'
+        job.registrar_tempo('extracao_texto', time.perf_counter() - inicio)
+
+        if resultado is None:
+            job.iniciar_etapa('extracao_dados')
+            inicio = time.perf_counter()
+            model = get_cliente_llm().modelo(modelo)
+
+            processador_nf_tool = ProcessadorDeNotaFiscalTool(invoice_text, model)
+            agente = AgenteProcessador({"processador_nf": processador_nf_tool})
+            resultado = agente.executar_tarefa("Processar nota fiscal", invoice_text)
+            origem = 'llm'
+            job.registrar_tempo('extracao_dados', time.perf_counter() - inicio)
+
+            if not resultado:
+                job.falhar('O agente falhou ao processar a nota fiscal.')
+                return
+
+            cache.salvar(resultado, chave_pdf=chave_pdf, texto=invoice_text)
+        elif origem == 'cache_texto':
+            # Registrar também o hash deste PDF para o próximo reenvio
+            cache.salvar(resultado, chave_pdf=chave_pdf)
+
+        job.iniciar_etapa('gravacao_banco')
+        inicio = time.perf_counter()
+        nota_fiscal_id = salvar_nota_fiscal_no_banco(resultado)
+        job.registrar_tempo('gravacao_banco', time.perf_counter() - inicio)
+
+        job.registrar_tempo('total', time.perf_counter() - inicio_total)
+        if nota_fiscal_id is None:
+            job.falhar('Erro ao salvar a nota fiscal no banco de dados.')
+            return
+        job.concluir(resultado, nota_fiscal_id, origem)
+
+    except Exception as e:
+        db.session.rollback()
+        job.registrar_tempo('total', time.perf_counter() - inicio_total)
+        job.falhar(str(e))
+
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+        if job.caminho_arquivo and os.path.exists(job.caminho_arquivo):
+            os.remove(job.caminho_arquivo)
+
+
+def executar_job_lote(job):
+    """
+    Executa a ingestão de um lote de PDFs (ou .zip) gravados em job.caminho_arquivo.
+    O texto é extraído na própria thread do job (sem pool de processos, que
+    fica restrito a scripts/ingerir_lote.py); o relatório por arquivo fica em
+    job.resultado.
+    """
+    from routes.api_routes import validar_notas_fiscais
+
+    diretorio = job.caminho_arquivo
+    try:
+        with open(os.path.join(diretorio, 'arquivos.json'), encoding='utf-8') as manifesto:
+            arquivos = [(nome, os.path.join(diretorio, arquivo)) for nome, arquivo in json.load(manifesto)]
+
+        modelo = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash')
+        model = get_cliente_llm().modelo(modelo)
+        ingestao = IngestaoLote(model, salvar_notas_fiscais_em_lote, max_processos=1,
+                                cache=CacheExtracao(modelo), validar_em_lote=validar_notas_fiscais)
+        relatorio = ingestao.processar(arquivos, ao_iniciar_etapa=job.iniciar_etapa)
+
+        job.tempos = relatorio['tempos']
+        job.concluir(relatorio)
+
+    except Exception as e:
+        db.session.rollback()
+        job.falhar(f'Erro ao processar lote: {str(e)}')
+
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def falhar_jobs_interrompidos():
+    """
+    Marca como ERRO os jobs que ficaram PENDENTE/PROCESSANDO em um processo
+    que não existe mais: encerrado, neste host, ou sem sinalizar os seus jobs
+    há mais de PROCESSAMENTO_JOB_TIMEOUT_MINUTOS (padrão: 5). O upload fica
+    apenas na memória (ou no arquivo temporário) do processo que recebeu o
+    job; se ele foi reiniciado, não há mais de onde reprocessar. Os arquivos
+    de lotes interrompidos são removidos.
+    """
+    minutos = int(os.environ.get('PROCESSAMENTO_JOB_TIMEOUT_MINUTOS', '5'))
+    jobs = ProcessamentoJob.falhar_interrompidos(minutos)
+    for job in jobs:
+        if job.caminho_arquivo and os.path.isdir(job.caminho_arquivo):
+            shutil.rmtree(job.caminho_arquivo, ignore_errors=True)
+        elif job.caminho_arquivo and os.path.exists(job.caminho_arquivo):
+            os.remove(job.caminho_arquivo)
+    if jobs:
+        print(f"⚠️  {len(jobs)} job(s) de processamento interrompido(s) marcado(s) como erro")
+    return len(jobs)
+
+
+def get_fila_processamento():
+    """Retorna o pool de processamento, criando-o na primeira chamada."""
+    global fila_processamento
+    if fila_processamento is None:
+        fila_processamento = FilaProcessamento(current_app._get_current_object(), executar_job_processamento,
+                                               sinalizar=ProcessamentoJob.sinalizar)
+    return fila_processamento
+
+
+# Filtro de template: {{ valor | brl }}
+web_bp.add_app_template_filter(formatar_brl, 'brl')
 
 
 @web_bp.route('/')
@@ -83,8 +280,15 @@ def index():
 @web_bp.route('/consultas')
 def consultas():
     """Página de consultas ao banco de dados."""
-    notas_fiscais = NotaFiscal.query.all()
-    return render_template('consultas.html', title="Consultas / Banco de Dados", notas_fiscais=notas_fiscais)
+    resumo = DatabaseRetriever(db).get_resumo_financeiro()
+    return render_template('consultas.html', title="Consultas / Banco de Dados", resumo=resumo)
+
+
+@web_bp.route('/dashboard')
+def dashboard():
+    """Dashboard com o resumo financeiro e os totais por classificação e fornecedor."""
+    agregados = DatabaseRetriever(db).get_agregados()
+    return render_template('dashboard.html', title="Dashboard Financeiro", agregados=agregados)
 
 
 @web_bp.route('/rag')
@@ -113,7 +317,12 @@ def contas():
 
 @web_bp.route('/processar', methods=['POST'])
 def processar():
-    """Processa o PDF da nota fiscal e extrai os dados."""
+    """
+    Recebe o PDF da nota fiscal e agenda o processamento em segundo plano.
+
+    Responde imediatamente com o id do job: JSON (202) para clientes de API
+    ou redirecionamento para a página de acompanhamento no navegador.
+    """
     if 'file' not in request.files:
         return redirect(url_for('web.index'))
 
@@ -121,34 +330,92 @@ def processar():
     if file.filename == '':
         return redirect(url_for('web.index'))
 
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename)
-    file.save(filepath)
+    # O PDF fica em memória e só vai para o disco (diretório temporário do
+    # sistema) acima de UPLOAD_SPOOL_MAX_BYTES; é descartado ao fim do job
+    arquivo = tempfile.SpooledTemporaryFile(
+        max_size=int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 10 * 1024 * 1024))
+    )
+    shutil.copyfileobj(file.stream, arquivo)
+    arquivo.seek(0)
 
+    job_id = str(uuid.uuid4())
     try:
-        invoice_text = extract_text_from_pdf(filepath)
-
-        # Obter o modelo Gemini do app context
-        import google.generativeai as genai
-        model = genai.GenerativeModel(current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash'))
-
-        processador_nf_tool = ProcessadorDeNotaFiscalTool(invoice_text, model)
-        agente = AgenteProcessador({"processador_nf": processador_nf_tool})
-        resultado = agente.executar_tarefa("Processar nota fiscal", invoice_text)
-
-        if resultado:
-            resultado_json_str = json.dumps(resultado, indent=2, ensure_ascii=False)
-
-            salvar_nota_fiscal_no_banco(resultado)
-
-            return render_template('resultado.html', title="Resultado",
-                                  resultado=resultado, resultado_json=resultado_json_str)
-        else:
-            return jsonify({'status': 'error',
-                           'message': 'O agente falhou ao processar a nota fiscal.'}), 500
-
+        job = ProcessamentoJob.criar_novo(file.filename, None, job_id=job_id)
+        get_fila_processamento().enviar(job.id, arquivo)
     except Exception as e:
+        db.session.rollback()
+        arquivo.close()
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-    finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'status': 'accepted',
+            'job_id': job_id,
+            'status_url': url_for('api.obter_job', job_id=job_id)
+        }), 202
+
+    return redirect(url_for('web.acompanhar_processamento', job_id=job_id))
+
+
+@web_bp.route('/processar/lote', methods=['POST'])
+def processar_lote():
+    """
+    Recebe vários PDFs de notas fiscais (ou arquivos .zip com PDFs) e agenda o
+    processamento do lote em segundo plano.
+    Form-data: files (múltiplos arquivos)
+    Responde (202) com o id do job; o relatório com o resultado de cada
+    arquivo fica em 'resultado' de GET /api/jobs/<id>.
+    """
+    files = [file for file in request.files.getlist('files') if file and file.filename]
+    if not files:
+        return jsonify({'success': False, 'error': 'Nenhum arquivo enviado'}), 400
+
+    # Os arquivos vão direto para o disco (sem ler o lote inteiro em memória)
+    # e são removidos ao fim do job
+    job_id = str(uuid.uuid4())
+    diretorio = os.path.join(current_app.config['UPLOAD_FOLDER'], f'lote_{job_id}')
+    try:
+        os.makedirs(diretorio)
+        manifesto = []
+        for i, file in enumerate(files):
+            arquivo = f"{i:05d}_{secure_filename(file.filename) or 'arquivo'}"
+            file.save(os.path.join(diretorio, arquivo))
+            manifesto.append([file.filename, arquivo])
+        with open(os.path.join(diretorio, 'arquivos.json'), 'w', encoding='utf-8') as destino:
+            json.dump(manifesto, destino)
+
+        job = ProcessamentoJob.criar_novo(f'{len(files)} arquivo(s)', diretorio, job_id=job_id, tipo='LOTE')
+        get_fila_processamento().enviar(job.id)
+    except Exception as e:
+        db.session.rollback()
+        shutil.rmtree(diretorio, ignore_errors=True)
+        return jsonify({'success': False, 'error': f'Erro ao agendar lote: {str(e)}'}), 500
+
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job_id,
+        'status_url': url_for('api.obter_job', job_id=job_id)
+    }), 202
+
+
+@web_bp.route('/processar/<job_id>')
+def acompanhar_processamento(job_id):
+    """Página de acompanhamento de um job de processamento."""
+    job = ProcessamentoJob.query.get(job_id)
+    if not job:
+        abort(404)
+    return render_template('processando.html', title="Processando Nota Fiscal", job=job)
+
+
+@web_bp.route('/resultado/<job_id>')
+def resultado_processamento(job_id):
+    """Exibe o resultado de um job de processamento concluído."""
+    job = ProcessamentoJob.query.get(job_id)
+    if not job:
+        abort(404)
+    if job.status != 'CONCLUIDO':
+        return redirect(url_for('web.acompanhar_processamento', job_id=job_id))
+
+    resultado_json_str = json.dumps(job.resultado, indent=2, ensure_ascii=False)
+    return render_template('resultado.html', title="Resultado",
+                           resultado=job.resultado, resultado_json=resultado_json_str)
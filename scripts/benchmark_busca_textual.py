@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark da busca textual (rag_system.text_search) contra o LIKE sem índice.
+
+Gera notas e produtos sintéticos em tabelas próprias (benchmark_busca_notas e
+benchmark_busca_produtos, removidas ao final), cria os índices de cada backend
+e mede a latência das buscas por fornecedor e por produto. As tabelas da
+aplicação não são alteradas.
+
+Uso:
+    python scripts/benchmark_busca_textual.py
+    python scripts/benchmark_busca_textual.py --linhas 100000 --repeticoes 10 --manter
+
+O backend trigram só é medido se a extensão pg_trgm estiver instalada.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+TABELA_NOTAS = 'benchmark_busca_notas'
+TABELA_PRODUTOS = 'benchmark_busca_produtos'
+
+SQL_CRIAR = f"""
+    DROP TABLE IF EXISTS {TABELA_PRODUTOS};
+    DROP TABLE IF EXISTS {TABELA_NOTAS};
+    CREATE TABLE {TABELA_NOTAS} (
+        id SERIAL PRIMARY KEY,
+        razao_social_fornecedor VARCHAR(255),
+        cnpj_fornecedor VARCHAR(20),
+        numero_nota VARCHAR(50),
+        data_emissao DATE,
+        valor_total FLOAT,
+        classificacao_despesa VARCHAR(50)
+    );
+    CREATE TABLE {TABELA_PRODUTOS} (
+        id SERIAL PRIMARY KEY,
+        nota_fiscal_id INTEGER,
+        descricao VARCHAR(255)
+    );
+"""
+
+# Nomes com acentos e sem, como nas notas reais; ~8 mil fornecedores distintos
+SQL_POPULAR = f"""
+    INSERT INTO {TABELA_NOTAS}
+        (razao_social_fornecedor, cnpj_fornecedor, numero_nota, data_emissao, valor_total, classificacao_despesa)
+    SELECT
+        (ARRAY['Comercial', 'Distribuidora', 'Agropecuária', 'Indústria', 'Transportes',
+               'Mecânica', 'Auto Peças', 'Posto'])[1 + i % 8]
+        || ' ' || (ARRAY['São João', 'Araújo', 'Conceição', 'Pereira', 'Boa Vista', 'Irmãos Silva',
+                         'Santa Luzia', 'Guimarães', 'Nova Esperança', 'Paraná', 'Souza', 'Três Lagoas'])[1 + (i / 8) % 12]
+        || ' ' || (i % 83)
+        || ' ' || (ARRAY['Ltda', 'ME', 'S.A.', 'EIRELI'])[1 + (i / 96) % 4],
+        lpad((i % 7963)::text, 14, '0'),
+        i::text,
+        DATE '2024-01-01' + (i % 730),
+        round((random() * 10000)::numeric, 2),
+        (ARRAY['INSUMOS AGRICOLAS', 'MANUTENCAO E OPERACAO', 'ADMINISTRATIVAS'])[1 + i % 3]
+    FROM generate_series(1, :linhas) AS i;
+
+    INSERT INTO {TABELA_PRODUTOS} (nota_fiscal_id, descricao)
+    SELECT
+        i,
+        (ARRAY['Óleo diesel S10', 'Filtro de ar', 'Pneu 295/80', 'Fertilizante NPK 04-14-08',
+               'Semente de milho híbrido', 'Adubo foliar', 'Peça de reposição', 'Herbicida glifosato',
+               'Ração bovina', 'Lubrificante hidráulico'])[1 + (i * 7) % 10]
+        || ' lote ' || (i % 500)
+    FROM generate_series(1, :linhas) AS i;
+"""
+
+TERMOS_FORNECEDOR = ['araujo', 'Agropecuária Conceição', 'sao joao 17', 'irmaos silva 42 eireli']
+TERMOS_PRODUTO = ['oleo diesel', 'semente milho', 'lote 123']
+
+
+def medir(funcao, termo, repeticoes):
+    """Executa a busca `repeticoes` vezes; retorna (mediana, máximo em ms, resultados)."""
+    latencias = []
+    resultados = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = funcao(termo)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    latencias.sort()
+    return latencias[len(latencias) // 2], latencias[-1], len(resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da busca textual contra LIKE')
+    parser.add_argument('--linhas', type=int, default=1000000, help='Notas (e produtos) gerados')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada busca')
+    parser.add_argument('--limite', type=int, default=20, help='Resultados por busca')
+    parser.add_argument('--manter', action='store_true', help='Não remove as tabelas ao final')
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+    from sqlalchemy import text
+    from rag_system.text_search import TextSearch
+
+    with app.app_context():
+        print(f"Gerando {args.linhas:,} notas e produtos...")
+        inicio = time.perf_counter()
+        db.session.execute(text(SQL_CRIAR))
+        db.session.execute(text(SQL_POPULAR), {'linhas': args.linhas})
+        db.session.commit()
+        print(f"   {time.perf_counter() - inicio:.1f}s")
+
+        trigram = db.session.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+        )).scalar()
+        backends = ['like', 'fulltext'] + (['trigram'] if trigram else [])
+
+        try:
+            for backend in backends:
+                busca = TextSearch(db, backend=backend, notas_table=TABELA_NOTAS, produtos_table=TABELA_PRODUTOS)
+                inicio = time.perf_counter()
+                busca.criar_indices()
+                db.session.execute(text(f"ANALYZE {TABELA_NOTAS}; ANALYZE {TABELA_PRODUTOS}"))
+                db.session.commit()
+                print(f"\n=== {backend} (índices: {time.perf_counter() - inicio:.1f}s) ===")
+
+                buscas = [
+                    ('notas', lambda t: busca.buscar_notas_por_fornecedor(t, args.limite), TERMOS_FORNECEDOR),
+                    ('fornecedores', lambda t: busca.buscar_fornecedores(t, args.limite), TERMOS_FORNECEDOR),
+                    ('produtos', lambda t: busca.buscar_produtos(t, args.limite), TERMOS_PRODUTO),
+                ]
+                for nome, funcao, termos in buscas:
+                    for termo in termos:
+                        mediana, maximo, quantidade = medir(funcao, termo, args.repeticoes)
+                        print(f"   {nome:<13} {termo!r:<26} mediana {mediana:9.1f} ms   "
+                              f"máx {maximo:9.1f} ms   {quantidade:3d} resultados")
+        finally:
+            if not args.manter:
+                db.session.rollback()
+                db.session.execute(text(f"DROP TABLE IF EXISTS {TABELA_PRODUTOS}; DROP TABLE IF EXISTS {TABELA_NOTAS}"))
+                db.session.commit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark offline da extração de notas e do RAG, usando o backend LLM local.
+
+Uso:
+    python scripts/benchmark_llm_local.py
+    python scripts/benchmark_llm_local.py --iteracoes 200 --concorrencia 8 --latencia-ms 800 --jitter-ms 400
+
+Nenhuma chamada é feita ao Gemini: o backend local (LLM_BACKEND=local) responde
+de forma determinística, com a latência artificial informada.
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+TEXTO_NOTA = """RECEBEMOS DE FORNECEDOR {i} LTDA OS PRODUTOS CONSTANTES DA NOTA FISCAL
+NF-e Nº {i:09d}
+CNPJ 12.345.678/0001-90
+DESTINATÁRIO / REMETENTE
+CNPJ / CPF 123.456.789-00 DATA DA EMISSÃO 15/03/2026
+CÁLCULO DO IMPOSTO
+VALOR TOTAL DA NOTA 1.234,56
+"""
+
+PERGUNTAS = [
+    'Qual o total gasto por fornecedor?',
+    'Quais as despesas por classificação?',
+    'Quanto gastamos nos últimos 30 dias?',
+    'Quais notas de manutenção foram lançadas?',
+]
+
+
+def medir(nome, funcao, iteracoes, concorrencia):
+    """Executa `funcao(i)` em paralelo e imprime vazão e latências."""
+    latencias = []
+
+    def executar(i):
+        inicio = time.perf_counter()
+        funcao(i)
+        latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(executar, range(iteracoes)))
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    p = lambda q: latencias[min(len(latencias) - 1, int(q * len(latencias)))] * 1000
+    print(f"{nome:<24} {iteracoes / total:8.1f}/s   p50 {p(0.5):8.1f} ms   p95 {p(0.95):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline com o backend LLM local')
+    parser.add_argument('--iteracoes', type=int, default=100)
+    parser.add_argument('--concorrencia', type=int, default=4)
+    parser.add_argument('--latencia-ms', type=float, default=None, help='Latência artificial média')
+    parser.add_argument('--jitter-ms', type=float, default=None, help='Variação da latência artificial')
+    args = parser.parse_args()
+
+    os.environ['LLM_BACKEND'] = 'local'
+    if args.latencia_ms is not None:
+        os.environ['LLM_LOCAL_LATENCIA_MS'] = str(args.latencia_ms)
+    if args.jitter_ms is not None:
+        os.environ['LLM_LOCAL_JITTER_MS'] = str(args.jitter_ms)
+    # Sem indexação automática durante o benchmark
+    os.environ['RAG_AUTO_INDEX'] = 'false'
+
+    from app import app
+    from models import db
+    from agents import ProcessadorDeNotaFiscalTool
+    from agents.cliente_llm import get_cliente_llm
+    from rag_system import RAGSimple, RAGEmbeddings
+
+    print("=" * 70)
+    print(f"⏱️  BENCHMARK OFFLINE: {args.iteracoes} iterações, concorrência {args.concorrencia}")
+    print("=" * 70)
+
+    def extrair(i):
+        texto = TEXTO_NOTA.format(i=i)
+        ProcessadorDeNotaFiscalTool(texto, get_cliente_llm().modelo()).executar()
+
+    medir('Extração (prompt)', extrair, args.iteracoes, args.concorrencia)
+
+    with app.app_context():
+        rag_simple = RAGSimple(db)
+        rag_embeddings = RAGEmbeddings(db)
+        rag_embeddings.index_all_notas_fiscais()
+
+    def perguntar(rag):
+        def executar(i):
+            with app.app_context():
+                rag.answer_question(PERGUNTAS[i % len(PERGUNTAS)])
+        return executar
+
+    medir('RAG simples', perguntar(rag_simple), args.iteracoes, args.concorrencia)
+    medir('RAG embeddings', perguntar(rag_embeddings), args.iteracoes, args.concorrencia)
+
+    print()
+    for operacao, dados in get_cliente_llm().get_status()['operacoes'].items():
+        print(f"LLM {operacao}: {dados}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
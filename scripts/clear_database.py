@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import text
 from models import db
+from models.versao_dados import VersaoDados, TABELAS_VERSIONADAS
 
 
 def clear_all_data():
@@ -65,6 +66,8 @@ def clear_all_data():
             db.session.execute(text("SET session_replication_role = 'origin';"))
 
             db.session.commit()
+            # SQL direto não passa pelos eventos da sessão: invalidar os caches manualmente
+            VersaoDados.incrementar(TABELAS_VERSIONADAS)
             print()
             print("=" * 70)
             print("✅ BANCO DE DADOS LIMPO COM SUCESSO!")
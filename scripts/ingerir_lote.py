@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para ingerir um lote de notas fiscais (PDFs ou .zip com PDFs).
+
+Uso:
+    python scripts/ingerir_lote.py notas/*.pdf
+    python scripts/ingerir_lote.py fechamento_outubro.zip
+    python scripts/ingerir_lote.py notas/ --processos 8 --concorrencia 6 --relatorio relatorio.json
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def coletar_arquivos(caminhos):
+    """Lista os PDFs/zips informados (diretórios são percorridos recursivamente)."""
+    arquivos = []
+    for caminho in map(Path, caminhos):
+        if caminho.is_dir():
+            encontrados = sorted(p for p in caminho.rglob('*') if p.suffix.lower() in ('.pdf', '.zip'))
+        else:
+            encontrados = [caminho]
+        for arquivo in encontrados:
+            arquivos.append((arquivo.name, str(arquivo)))
+    return arquivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestão em lote de notas fiscais')
+    parser.add_argument('caminhos', nargs='+', help='PDFs, arquivos .zip ou diretórios')
+    parser.add_argument('--processos', type=int, default=None, help='Processos para extração de texto')
+    parser.add_argument('--concorrencia', type=int, default=None, help='Chamadas simultâneas ao Gemini')
+    parser.add_argument('--relatorio', default=None, help='Arquivo JSON para salvar o relatório')
+    parser.add_argument('--sem-cache', action='store_true', help='Ignorar o cache de extração')
+    args = parser.parse_args()
+
+    from app import app
+    from agents.ingestao_lote import IngestaoLote
+    from agents.cache_extracao import CacheExtracao
+    from routes.web_routes import salvar_notas_fiscais_em_lote
+    from routes.api_routes import validar_notas_fiscais
+    from agents.cliente_llm import get_cliente_llm
+
+    arquivos = coletar_arquivos(args.caminhos)
+    if not arquivos:
+        print("❌ Nenhum arquivo PDF/zip encontrado.")
+        return 1
+
+    print("=" * 70)
+    print(f"📦 INGESTÃO EM LOTE: {len(arquivos)} arquivo(s)")
+    print("=" * 70)
+
+    with app.app_context():
+        modelo = app.config.get('GEMINI_MODEL', 'gemini-2.0-flash')
+        model = get_cliente_llm().modelo(modelo)
+        ingestao = IngestaoLote(
+            model,
+            salvar_notas_fiscais_em_lote,
+            max_processos=args.processos,
+            max_concorrencia_llm=args.concorrencia,
+            cache=None if args.sem_cache else CacheExtracao(modelo),
+            validar_em_lote=validar_notas_fiscais
+        )
+        relatorio = ingestao.processar(arquivos)
+
+    for item in relatorio['arquivos']:
+        if item['success']:
+            origem = f", {item['origem']}" if item['origem'] != 'llm' else ''
+            validacao = item['validacao'] or {}
+            if 'error' in validacao:
+                cadastro = f" - cadastros não verificados: {validacao['error']}"
+            else:
+                pendentes = [campo for campo, situacao in validacao.items() if not situacao['existe']]
+                cadastro = f" - sem cadastro: {', '.join(pendentes)}" if pendentes else ''
+            print(f"   ✓ {item['arquivo']} (nota fiscal {item['nota_fiscal_id']}{origem}){cadastro}")
+        else:
+            print(f"   ✗ {item['arquivo']}: {item['error']}")
+
+    print()
+    print(f"✅ {relatorio['processados']}/{relatorio['total']} notas processadas "
+          f"({relatorio['falhas']} falhas, {relatorio['cache_hits']} do cache)")
+    print(f"⏱️  Tempos: {relatorio['tempos']}")
+
+    if args.relatorio:
+        with open(args.relatorio, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"📝 Relatório salvo em {args.relatorio}")
+
+    return 0 if relatorio['falhas'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,7 +5,8 @@ Script para inicializar o banco de dados do Sistema Administrativo-Financeiro.
 
 Este script:
 1. Cria todas as tabelas do banco de dados
-2. Opcionalmente popula com dados de teste
+2. Aplica as migrações pendentes (ver scripts/migrar.py)
+3. Opcionalmente popula com dados de teste
 
 Uso:
     python scripts/init_database.py
@@ -44,7 +45,10 @@ def create_tables():
             # Criar todas as tabelas
             db.create_all()
             print("✅ Tabelas criadas com sucesso!")
-            return True
+
+            from migrar import aplicar_pendentes
+            print("🔧 Aplicando migrações...")
+            return aplicar_pendentes()
         except Exception as e:
             print(f"❌ Erro ao criar tabelas: {e}")
             return False
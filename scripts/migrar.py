@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Aplica as migrações SQL do banco de dados em ordem de versão.
+
+As tabelas novas são criadas pelo db.create_all() da aplicação; as alterações
+de estrutura de bancos existentes (colunas, índices, funções, extensões) ficam
+nos scripts/migration_*.sql, registrados em MIGRACOES. Cada migração é
+executada em uma transação, junto com o seu registro na tabela
+schema_migracoes, e só é aplicada uma vez por banco.
+
+Uso:
+    python scripts/migrar.py                     # Aplica as migrações pendentes
+    python scripts/migrar.py --status            # Lista aplicadas e pendentes
+    python scripts/migrar.py --marcar-aplicadas  # Registra todas sem executar
+
+--marcar-aplicadas serve para bancos em que os scripts já foram executados
+manualmente com psql. Para uma nova alteração de estrutura, crie o
+scripts/migration_<nome>.sql no formato dos demais e acrescente-o ao final
+de MIGRACOES com a próxima versão (nunca altere uma migração já aplicada).
+"""
+
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# (versão, arquivo, extensão exigida ou None), em ordem de aplicação.
+# Migrações cuja extensão não está disponível no servidor são puladas e
+# ficam pendentes até que ela seja instalada.
+MIGRACOES = [
+    ('0001', 'migration_add_status.sql', None),
+    ('0002', 'migration_pgvector.sql', 'vector'),
+    ('0003', 'migration_add_content_hash.sql', None),
+    ('0004', 'migration_extracao_cache.sql', None),
+    ('0005', 'migration_rag_resposta_cache.sql', None),
+    ('0006', 'migration_resumo_mensal.sql', None),
+    ('0007', 'migration_nota_fiscal_indices.sql', None),
+    ('0008', 'migration_busca_textual.sql', None),
+    ('0009', 'migration_listagens_indices.sql', None),
+    ('0010', 'migration_indices_consultas_frequentes.sql', None),
+    ('0011', 'migration_processamento_job_atualizacao.sql', None),
+    ('0012', 'migration_processamento_job_tipo.sql', None),
+    ('0013', 'migration_processamento_job_processo.sql', None),
+]
+
+
+def checksum(arquivo):
+    """SHA-256 do conteúdo do arquivo de migração."""
+    return hashlib.sha256((SCRIPTS_DIR / arquivo).read_bytes()).hexdigest()
+
+
+def extensao_disponivel(cursor, extensao, instalada=False):
+    """Se a extensão pode ser instalada no servidor (ou, com instalada, se já está no banco)."""
+    if instalada:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (extensao,))
+    else:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = %s", (extensao,))
+    return cursor.fetchone() is not None
+
+
+def registrar(cursor, versao, arquivo, executada):
+    cursor.execute(
+        "INSERT INTO schema_migracoes (versao, arquivo, checksum, executada, aplicada_em) "
+        "VALUES (%s, %s, %s, %s, NOW())",
+        (versao, arquivo, checksum(arquivo), executada)
+    )
+
+
+def aplicar_pendentes(marcar_apenas=False):
+    """
+    Aplica (ou, com marcar_apenas, apenas registra) as migrações pendentes.
+
+    Deve ser chamada dentro do contexto da aplicação.
+
+    Returns:
+        True se nenhuma migração falhou
+    """
+    from models import db
+    from models.migracao import MigracaoAplicada
+
+    aplicadas = MigracaoAplicada.aplicadas()
+    db.session.commit()
+
+    for versao, arquivo, _ in MIGRACOES:
+        registro = aplicadas.get(versao)
+        if registro and registro.checksum != checksum(arquivo):
+            print(f"⚠️  {versao} {arquivo}: arquivo alterado depois de aplicado (não será reexecutado)")
+
+    pendentes = [migracao for migracao in MIGRACOES if migracao[0] not in aplicadas]
+    if not pendentes:
+        print("✅ Nenhuma migração pendente")
+        return True
+
+    conexao = db.engine.raw_connection()
+    try:
+        for versao, arquivo, extensao in pendentes:
+            cursor = conexao.cursor()
+            try:
+                # Ao marcar, só conta como aplicada se a extensão já estiver instalada no banco
+                if extensao and not extensao_disponivel(cursor, extensao, instalada=marcar_apenas):
+                    print(f"⏭️  {versao} {arquivo}: extensão '{extensao}' "
+                          f"{'não instalada no banco' if marcar_apenas else 'indisponível no servidor'} (pendente)")
+                    continue
+
+                print(f"🔧 {versao} {arquivo}...")
+                if not marcar_apenas:
+                    cursor.execute((SCRIPTS_DIR / arquivo).read_text(encoding='utf-8'))
+                registrar(cursor, versao, arquivo, executada=not marcar_apenas)
+                conexao.commit()
+                for aviso in conexao.notices:
+                    print(f"      {aviso.strip()}")
+                print(f"   ✅ {'marcada como aplicada' if marcar_apenas else 'aplicada'}")
+            except Exception as e:
+                conexao.rollback()
+                print(f"   ❌ Erro: {e}")
+                return False
+            finally:
+                del conexao.notices[:]
+                cursor.close()
+    finally:
+        conexao.close()
+    return True
+
+
+def mostrar_status():
+    from models.migracao import MigracaoAplicada
+
+    aplicadas = MigracaoAplicada.aplicadas()
+    for versao, arquivo, extensao in MIGRACOES:
+        registro = aplicadas.get(versao)
+        if registro is None:
+            situacao = 'pendente' + (f" (requer a extensão '{extensao}')" if extensao else '')
+        else:
+            situacao = f"{'aplicada' if registro.executada else 'marcada'} em {registro.aplicada_em:%d/%m/%Y %H:%M}"
+            if registro.checksum != checksum(arquivo):
+                situacao += ' ⚠️  arquivo alterado depois de aplicado'
+        print(f"   {versao} {arquivo:<45} {situacao}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aplicar as migrações SQL do banco de dados')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--status', action='store_true', help='Lista as migrações aplicadas e pendentes')
+    grupo.add_argument('--marcar-aplicadas', action='store_true',
+                       help='Registra as pendentes como aplicadas sem executá-las')
+    args = parser.parse_args()
+
+    # A importação da aplicação cria as tabelas que ainda não existem (inclusive schema_migracoes)
+    from app import app
+
+    with app.app_context():
+        if args.status:
+            mostrar_status()
+            return 0
+        return 0 if aplicar_pendentes(marcar_apenas=args.marcar_aplicadas) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Adicionar campo CONTENT_HASH à tabela DOCUMENT_EMBEDDINGS
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente
+-- sem o campo CONTENT_HASH na tabela document_embeddings.
+--
+-- O campo guarda o SHA-256 do texto indexado e permite que /api/rag/index
+-- reindexe apenas as notas fiscais novas ou alteradas.
+-- Registros existentes ficam com CONTENT_HASH nulo e serão reindexados
+-- uma única vez na próxima indexação.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. Adicionar campo CONTENT_HASH na tabela DOCUMENT_EMBEDDINGS
+-- ============================================================================
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'document_embeddings' AND column_name = 'content_hash'
+    ) THEN
+        ALTER TABLE document_embeddings ADD COLUMN content_hash VARCHAR(64);
+        RAISE NOTICE 'Campo CONTENT_HASH adicionado à tabela DOCUMENT_EMBEDDINGS';
+    ELSE
+        RAISE NOTICE 'Campo CONTENT_HASH já existe na tabela DOCUMENT_EMBEDDINGS';
+    END IF;
+END $$;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- ALTER TABLE document_embeddings DROP COLUMN IF EXISTS content_hash;
+-- ============================================================================
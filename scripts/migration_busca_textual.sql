@@ -0,0 +1,99 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Busca textual por fornecedor e produto
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente.
+--
+-- Cria a função BUSCA_NORMALIZAR (minúsculas e sem acentos, IMMUTABLE para
+-- poder ser indexada) e, para NOTA_FISCAL.RAZAO_SOCIAL_FORNECEDOR e
+-- PRODUTO_NOTA_FISCAL.DESCRICAO:
+--   - sempre: colunas tsvector geradas (BUSCA_FORNECEDOR e BUSCA_DESCRICAO,
+--     configuração 'portuguese') com índices GIN, para a busca full-text;
+--   - com a extensão pg_trgm (se disponível no servidor): índices de
+--     trigramas, usados na busca aproximada (tolera erros de digitação).
+--
+-- A inclusão das colunas geradas reescreve as duas tabelas (bloqueadas
+-- durante a execução).
+--
+-- A aplicação escolhe a busca pelo que encontrar no banco
+-- (BUSCA_TEXTUAL_BACKEND=auto); sem esta migração ela usa LIKE sem índice.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. Habilitar a extensão pg_trgm (opcional)
+-- ============================================================================
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    RAISE NOTICE 'Extensão pg_trgm habilitada';
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'Extensão pg_trgm indisponível (%); será usada a busca full-text', SQLERRM;
+END $$;
+
+-- ============================================================================
+-- 2. Função de normalização (minúsculas, sem acentos)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION busca_normalizar(texto text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT lower(translate(coalesce(texto, ''),
+        'ÁÀÂÃÄÅáàâãäåÉÈÊËéèêëÍÌÎÏíìîïÓÒÔÕÖóòôõöÚÙÛÜúùûüÇçÑñ',
+        'AAAAAAaaaaaaEEEEeeeeIIIIiiiiOOOOOoooooUUUUuuuuCcNn'))
+$$;
+
+-- ============================================================================
+-- 3. Colunas tsvector e índices full-text
+-- ============================================================================
+ALTER TABLE nota_fiscal ADD COLUMN IF NOT EXISTS busca_fornecedor tsvector
+    GENERATED ALWAYS AS (to_tsvector('portuguese', busca_normalizar(razao_social_fornecedor))) STORED;
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_busca_fornecedor
+    ON nota_fiscal USING gin (busca_fornecedor);
+
+ALTER TABLE produto_nota_fiscal ADD COLUMN IF NOT EXISTS busca_descricao tsvector
+    GENERATED ALWAYS AS (to_tsvector('portuguese', busca_normalizar(descricao))) STORED;
+CREATE INDEX IF NOT EXISTS idx_produto_nota_fiscal_busca_descricao
+    ON produto_nota_fiscal USING gin (busca_descricao);
+
+-- ============================================================================
+-- 4. Índices de trigramas (apenas com pg_trgm)
+-- ============================================================================
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS idx_nota_fiscal_razao_social_fornecedor_trgm
+            ON nota_fiscal USING gin (busca_normalizar(razao_social_fornecedor) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_produto_nota_fiscal_descricao_trgm
+            ON produto_nota_fiscal USING gin (busca_normalizar(descricao) gin_trgm_ops);
+        RAISE NOTICE 'Índices de trigramas criados';
+    END IF;
+END $$;
+
+ANALYZE nota_fiscal;
+ANALYZE produto_nota_fiscal;
+
+-- ============================================================================
+-- 5. Verificar índices criados
+-- ============================================================================
+SELECT indexname, tablename
+FROM pg_indexes
+WHERE indexname LIKE 'idx\_%\_busca\_%' OR indexname LIKE '%\_trgm'
+ORDER BY tablename, indexname;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP INDEX IF EXISTS idx_nota_fiscal_razao_social_fornecedor_trgm;
+-- DROP INDEX IF EXISTS idx_produto_nota_fiscal_descricao_trgm;
+-- ALTER TABLE nota_fiscal DROP COLUMN IF EXISTS busca_fornecedor;
+-- ALTER TABLE produto_nota_fiscal DROP COLUMN IF EXISTS busca_descricao;
+-- DROP FUNCTION IF EXISTS busca_normalizar(text);
+-- ============================================================================
@@ -0,0 +1,69 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Cache de extração de notas fiscais
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente.
+--
+-- Cria a tabela EXTRACAO_CACHE, que guarda o JSON extraído de cada nota
+-- fiscal endereçado pelo SHA-256 do PDF (nivel PDF) ou do texto extraído
+-- normalizado (nivel TEXTO), junto com o modelo e a versão do prompt.
+-- Também adiciona o campo ORIGEM (llm, cache_pdf, cache_texto) à tabela
+-- PROCESSAMENTO_JOB.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. Criar tabela EXTRACAO_CACHE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS extracao_cache (
+    id SERIAL PRIMARY KEY,
+    nivel VARCHAR(10) NOT NULL,
+    chave VARCHAR(64) NOT NULL,
+    modelo VARCHAR(100) NOT NULL,
+    versao_prompt VARCHAR(20) NOT NULL,
+    resultado JSON NOT NULL,
+    tamanho INTEGER DEFAULT 0,
+    acessos INTEGER NOT NULL DEFAULT 0,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ultimo_acesso TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_extracao_cache_chave UNIQUE (nivel, chave, modelo, versao_prompt)
+);
+
+CREATE INDEX IF NOT EXISTS idx_extracao_cache_ultimo_acesso ON extracao_cache (ultimo_acesso);
+
+-- ============================================================================
+-- 2. Adicionar campo ORIGEM na tabela PROCESSAMENTO_JOB
+-- ============================================================================
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.tables
+        WHERE table_name = 'processamento_job'
+    ) AND NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'processamento_job' AND column_name = 'origem'
+    ) THEN
+        ALTER TABLE processamento_job ADD COLUMN origem VARCHAR(20);
+        RAISE NOTICE 'Campo ORIGEM adicionado à tabela PROCESSAMENTO_JOB';
+    ELSE
+        RAISE NOTICE 'Campo ORIGEM já existe (ou tabela PROCESSAMENTO_JOB ainda não criada)';
+    END IF;
+END $$;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP TABLE IF EXISTS extracao_cache;
+-- ALTER TABLE processamento_job DROP COLUMN IF EXISTS origem;
+-- ============================================================================
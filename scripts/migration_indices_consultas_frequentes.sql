@@ -0,0 +1,64 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Índices das consultas mais frequentes
+-- ============================================================================
+-- Execute com: python scripts/migrar.py
+--
+-- Completa os índices das consultas de uso constante que ainda percorriam a
+-- tabela inteira (as demais já são atendidas pelos índices de paginação e
+-- pela unicidade de pessoas.cpf_cnpj; ver scripts/verificar_indices.py):
+-- - Classificacao.verificar_existencia (tipo, descrição, ATIVO), chamada na
+--   validação de cada nota
+-- - movimentos de um fornecedor/cliente ou faturado em /api/movimentos
+-- - produtos das notas (selectinload em nota_fiscal_id) na indexação do RAG
+--
+-- Os índices parciais (WHERE status = 'ATIVO') contêm apenas os registros
+-- ativos, que são os consultados por padrão.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. CLASSIFICACAO
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_classificacao_tipo_descricao_ativo
+    ON classificacao (tipo, descricao)
+    WHERE status = 'ATIVO';
+
+-- ============================================================================
+-- 2. MOVIMENTO_CONTAS
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_movimento_contas_fornecedor_cliente_ativo
+    ON movimento_contas (fornecedor_cliente_id, data_movimento, id)
+    WHERE status = 'ATIVO';
+CREATE INDEX IF NOT EXISTS idx_movimento_contas_faturado_ativo
+    ON movimento_contas (faturado_id, data_movimento, id)
+    WHERE status = 'ATIVO';
+
+-- ============================================================================
+-- 3. PRODUTO_NOTA_FISCAL
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_produto_nota_fiscal_nota_fiscal_id
+    ON produto_nota_fiscal (nota_fiscal_id);
+
+ANALYZE classificacao;
+ANALYZE movimento_contas;
+ANALYZE produto_nota_fiscal;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP INDEX IF EXISTS idx_classificacao_tipo_descricao_ativo;
+-- DROP INDEX IF EXISTS idx_movimento_contas_fornecedor_cliente_ativo;
+-- DROP INDEX IF EXISTS idx_movimento_contas_faturado_ativo;
+-- DROP INDEX IF EXISTS idx_produto_nota_fiscal_nota_fiscal_id;
+-- DELETE FROM schema_migracoes WHERE arquivo = 'migration_indices_consultas_frequentes.sql';
+-- ============================================================================
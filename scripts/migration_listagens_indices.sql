@@ -0,0 +1,56 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Índices das listagens paginadas
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente.
+--
+-- Cria os índices usados pela paginação por cursor de /api/pessoas,
+-- /api/classificacoes e /api/movimentos: cada página é lida na ordem
+-- (data, id) decrescente a partir do cursor, com o filtro de status e,
+-- opcionalmente, de tipo, sem ordenar a tabela inteira.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. PESSOAS
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_pessoas_status_data_cadastro_id
+    ON pessoas (status, data_cadastro, id);
+CREATE INDEX IF NOT EXISTS idx_pessoas_status_tipo_data_cadastro_id
+    ON pessoas (status, tipo, data_cadastro, id);
+
+-- ============================================================================
+-- 2. CLASSIFICACAO
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_classificacao_status_data_cadastro_id
+    ON classificacao (status, data_cadastro, id);
+CREATE INDEX IF NOT EXISTS idx_classificacao_status_tipo_data_cadastro_id
+    ON classificacao (status, tipo, data_cadastro, id);
+
+-- ============================================================================
+-- 3. MOVIMENTO_CONTAS
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_movimento_contas_status_data_movimento_id
+    ON movimento_contas (status, data_movimento, id);
+CREATE INDEX IF NOT EXISTS idx_movimento_contas_status_tipo_data_movimento_id
+    ON movimento_contas (status, tipo, data_movimento, id);
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP INDEX IF EXISTS idx_pessoas_status_data_cadastro_id;
+-- DROP INDEX IF EXISTS idx_pessoas_status_tipo_data_cadastro_id;
+-- DROP INDEX IF EXISTS idx_classificacao_status_data_cadastro_id;
+-- DROP INDEX IF EXISTS idx_classificacao_status_tipo_data_cadastro_id;
+-- DROP INDEX IF EXISTS idx_movimento_contas_status_data_movimento_id;
+-- DROP INDEX IF EXISTS idx_movimento_contas_status_tipo_data_movimento_id;
+-- ============================================================================
@@ -0,0 +1,45 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Índices de busca e paginação de notas fiscais
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente.
+--
+-- Cria os índices compostos usados pela busca de notas fiscais com filtros e
+-- paginação por chave (data_emissao, id) em DatabaseRetriever:
+-- - (data_emissao, id): listagem e filtros por período
+-- - (cnpj_fornecedor, data_emissao, id): filtro por fornecedor
+-- - (classificacao_despesa, data_emissao, id): filtro por classificação
+-- - (valor_total, id) e (razao_social_fornecedor, id): listagem de /consultas
+--   ordenada por valor ou por fornecedor
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_data_emissao_id
+    ON nota_fiscal (data_emissao, id);
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_cnpj_data_emissao_id
+    ON nota_fiscal (cnpj_fornecedor, data_emissao, id);
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_classificacao_data_emissao_id
+    ON nota_fiscal (classificacao_despesa, data_emissao, id);
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_valor_total_id
+    ON nota_fiscal (valor_total, id);
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_razao_social_fornecedor_id
+    ON nota_fiscal (razao_social_fornecedor, id);
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP INDEX IF EXISTS idx_nota_fiscal_data_emissao_id;
+-- DROP INDEX IF EXISTS idx_nota_fiscal_cnpj_data_emissao_id;
+-- DROP INDEX IF EXISTS idx_nota_fiscal_classificacao_data_emissao_id;
+-- DROP INDEX IF EXISTS idx_nota_fiscal_valor_total_id;
+-- DROP INDEX IF EXISTS idx_nota_fiscal_razao_social_fornecedor_id;
+-- ============================================================================
@@ -0,0 +1,108 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Armazenamento pgvector para DOCUMENT_EMBEDDINGS
+-- ============================================================================
+-- Adiciona a coluna EMBEDDING_VEC (vector(768)) à tabela document_embeddings,
+-- copia os vetores já existentes da coluna EMBEDDING (ARRAY de floats),
+-- mantém as duas colunas sincronizadas via trigger e cria um índice HNSW
+-- para busca aproximada por similaridade de cosseno.
+--
+-- Depois de executar, ative no .env:
+--     RAG_VECTOR_BACKEND=pgvector
+--     RAG_VECTOR_SEARCH=approximate   (ou exact)
+--
+-- Requer a extensão pgvector instalada no servidor PostgreSQL.
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando extensão pgvector...' as status;
+
+-- ============================================================================
+-- 1. Habilitar a extensão
+-- ============================================================================
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- ============================================================================
+-- 2. Adicionar coluna EMBEDDING_VEC na tabela DOCUMENT_EMBEDDINGS
+-- ============================================================================
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_name = 'document_embeddings' AND column_name = 'embedding_vec'
+    ) THEN
+        ALTER TABLE document_embeddings ADD COLUMN embedding_vec vector(768);
+        RAISE NOTICE 'Campo EMBEDDING_VEC adicionado à tabela DOCUMENT_EMBEDDINGS';
+    ELSE
+        RAISE NOTICE 'Campo EMBEDDING_VEC já existe na tabela DOCUMENT_EMBEDDINGS';
+    END IF;
+END $$;
+
+-- ============================================================================
+-- 3. Copiar os vetores existentes (ARRAY -> vector)
+-- ============================================================================
+UPDATE document_embeddings
+SET embedding_vec = embedding::vector
+WHERE embedding_vec IS NULL
+  AND embedding_dimension = 768;
+
+-- ============================================================================
+-- 4. Trigger para manter EMBEDDING_VEC sincronizada com EMBEDDING
+-- ============================================================================
+-- A aplicação continua gravando apenas a coluna EMBEDDING; o trigger converte
+-- o vetor para o tipo nativo do pgvector a cada INSERT/UPDATE.
+CREATE OR REPLACE FUNCTION document_embeddings_sync_vec() RETURNS trigger AS $$
+BEGIN
+    IF NEW.embedding IS NOT NULL AND array_length(NEW.embedding, 1) = 768 THEN
+        NEW.embedding_vec := NEW.embedding::vector;
+    ELSE
+        NEW.embedding_vec := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_document_embeddings_sync_vec ON document_embeddings;
+CREATE TRIGGER trg_document_embeddings_sync_vec
+    BEFORE INSERT OR UPDATE OF embedding ON document_embeddings
+    FOR EACH ROW EXECUTE FUNCTION document_embeddings_sync_vec();
+
+-- ============================================================================
+-- 5. Índice ANN (HNSW) para distância de cosseno
+-- ============================================================================
+-- HNSW não precisa de dados para ser criado e tem melhor recall/latência.
+-- Alternativa com IVFFlat (criar depois de popular a tabela):
+--     CREATE INDEX idx_document_embeddings_vec_ivfflat ON document_embeddings
+--         USING ivfflat (embedding_vec vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_document_embeddings_vec_hnsw
+    ON document_embeddings
+    USING hnsw (embedding_vec vector_cosine_ops);
+
+ANALYZE document_embeddings;
+
+-- ============================================================================
+-- 6. Verificação Final
+-- ============================================================================
+SELECT 'Verificando vetores migrados...' as status;
+
+SELECT
+    COUNT(*) as total_registros,
+    COUNT(embedding_vec) as com_vetor_pgvector,
+    COUNT(*) - COUNT(embedding_vec) as sem_vetor_pgvector
+FROM document_embeddings;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP INDEX IF EXISTS idx_document_embeddings_vec_hnsw;
+-- DROP TRIGGER IF EXISTS trg_document_embeddings_sync_vec ON document_embeddings;
+-- DROP FUNCTION IF EXISTS document_embeddings_sync_vec();
+-- ALTER TABLE document_embeddings DROP COLUMN IF EXISTS embedding_vec;
+-- ============================================================================
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Data de atualização dos jobs de processamento
+-- ============================================================================
+-- Execute com: python scripts/migrar.py
+--
+-- Adiciona o campo DATA_ATUALIZACAO à tabela PROCESSAMENTO_JOB. Ele muda a
+-- cada etapa do pipeline; na inicialização, a aplicação marca como ERRO os
+-- jobs PENDENTE/PROCESSANDO parados há mais de PROCESSAMENTO_JOB_TIMEOUT_MINUTOS
+-- (o processo que os executava foi reiniciado e o upload foi perdido).
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. PROCESSAMENTO_JOB
+-- ============================================================================
+ALTER TABLE processamento_job ADD COLUMN IF NOT EXISTS data_atualizacao TIMESTAMP;
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- ALTER TABLE processamento_job DROP COLUMN IF EXISTS data_atualizacao;
+-- DELETE FROM schema_migracoes WHERE arquivo = 'migration_processamento_job_atualizacao.sql';
+-- ============================================================================
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Processo dono dos jobs de processamento
+-- ============================================================================
+-- Execute com: python scripts/migrar.py
+--
+-- Adiciona o campo PROCESSO (host:pid do worker que recebeu o upload e
+-- executa o job) à tabela PROCESSAMENTO_JOB. Na inicialização, a aplicação
+-- só marca como ERRO os jobs PENDENTE/PROCESSANDO cujo processo dono foi
+-- encerrado (ou parou de sinalizar os seus jobs).
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. PROCESSAMENTO_JOB
+-- ============================================================================
+ALTER TABLE processamento_job ADD COLUMN IF NOT EXISTS processo VARCHAR(100);
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- ALTER TABLE processamento_job DROP COLUMN IF EXISTS processo;
+-- DELETE FROM schema_migracoes WHERE arquivo = 'migration_processamento_job_processo.sql';
+-- ============================================================================
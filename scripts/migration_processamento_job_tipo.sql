@@ -0,0 +1,32 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Tipo dos jobs de processamento
+-- ============================================================================
+-- Execute com: python scripts/migrar.py
+--
+-- Adiciona o campo TIPO à tabela PROCESSAMENTO_JOB: NOTA (upload de um PDF
+-- em /processar) ou LOTE (vários PDFs ou .zip em /processar/lote, cujo
+-- relatório por arquivo fica em RESULTADO).
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. PROCESSAMENTO_JOB
+-- ============================================================================
+ALTER TABLE processamento_job ADD COLUMN IF NOT EXISTS tipo VARCHAR(10) NOT NULL DEFAULT 'NOTA';
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- ALTER TABLE processamento_job DROP COLUMN IF EXISTS tipo;
+-- DELETE FROM schema_migracoes WHERE arquivo = 'migration_processamento_job_tipo.sql';
+-- ============================================================================
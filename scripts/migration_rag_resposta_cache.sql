@@ -0,0 +1,52 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Versão dos dados e cache de respostas do RAG
+-- ============================================================================
+-- Execute este script se você já tem um banco de dados existente.
+--
+-- Cria a tabela VERSAO_DADOS, com um contador por tabela incrementado a cada
+-- commit que altera nota_fiscal, produto_nota_fiscal, movimento_contas,
+-- parcelas_contas ou document_embeddings, e a tabela RAG_RESPOSTA_CACHE, que
+-- persiste as respostas do RAG (RAG_CACHE_PERSISTENTE=true) por pergunta
+-- normalizada, método e versão dos dados.
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. Criar tabela VERSAO_DADOS
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS versao_dados (
+    tabela VARCHAR(50) PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================================
+-- 2. Criar tabela RAG_RESPOSTA_CACHE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS rag_resposta_cache (
+    chave VARCHAR(64) PRIMARY KEY,
+    metodo VARCHAR(20) NOT NULL,
+    pergunta TEXT NOT NULL,
+    versao_dados BIGINT NOT NULL,
+    resultado JSON NOT NULL,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_rag_resposta_cache_data_criacao ON rag_resposta_cache (data_criacao);
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP TABLE IF EXISTS rag_resposta_cache;
+-- DROP TABLE IF EXISTS versao_dados;
+-- ============================================================================
@@ -0,0 +1,67 @@
+-- ============================================================================
+-- SCRIPT DE MIGRAÇÃO: Resumo mensal das notas fiscais
+-- ============================================================================
+-- Execute com: python scripts/migrar.py (em uma única transação, exigida
+-- pelo LOCK TABLE; com psql, use psql -1 -f).
+--
+-- Cria a tabela RESUMO_MENSAL_NOTAS, com a quantidade e o total das notas
+-- fiscais por mês de emissão × CNPJ do fornecedor × classificação, e a
+-- preenche a partir de NOTA_FISCAL. Depois disso a aplicação a mantém
+-- atualizada na mesma transação em que grava as notas. Também cria o índice
+-- (data_emissao, id) em NOTA_FISCAL, usado nos filtros por período.
+--
+-- Para reconstruir o resumo depois: python scripts/reconstruir_resumo_mensal.py
+--
+-- ATENÇÃO: Faça backup antes de executar!
+-- ============================================================================
+
+SELECT 'Verificando estrutura atual...' as status;
+
+-- ============================================================================
+-- 1. Criar tabela RESUMO_MENSAL_NOTAS
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS resumo_mensal_notas (
+    mes DATE NOT NULL,
+    cnpj_fornecedor VARCHAR(20) NOT NULL DEFAULT '',
+    classificacao_despesa VARCHAR(50) NOT NULL DEFAULT '',
+    razao_social_fornecedor VARCHAR(255),
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, cnpj_fornecedor, classificacao_despesa)
+);
+
+-- ============================================================================
+-- 2. Preencher a partir de NOTA_FISCAL (notas sem data ficam em 0001-01-01)
+-- ============================================================================
+LOCK TABLE nota_fiscal IN SHARE MODE;
+DELETE FROM resumo_mensal_notas;
+INSERT INTO resumo_mensal_notas
+    (mes, cnpj_fornecedor, classificacao_despesa, razao_social_fornecedor, quantidade, total)
+SELECT
+    COALESCE(DATE_TRUNC('month', data_emissao)::date, DATE '0001-01-01'),
+    COALESCE(cnpj_fornecedor, ''),
+    COALESCE(classificacao_despesa, ''),
+    MAX(razao_social_fornecedor),
+    COUNT(*),
+    COALESCE(SUM(valor_total), 0)
+FROM nota_fiscal
+GROUP BY 1, 2, 3;
+
+-- ============================================================================
+-- 3. Índice para filtros por período em NOTA_FISCAL
+-- ============================================================================
+CREATE INDEX IF NOT EXISTS idx_nota_fiscal_data_emissao_id ON nota_fiscal (data_emissao, id);
+
+-- ============================================================================
+-- Migração Concluída!
+-- ============================================================================
+SELECT '✅ Migração concluída com sucesso!' as resultado;
+
+-- ============================================================================
+-- ROLLBACK (use apenas se necessário)
+-- ============================================================================
+-- ATENÇÃO: Descomente apenas se precisar reverter as mudanças!
+--
+-- DROP TABLE IF EXISTS resumo_mensal_notas;
+-- DROP INDEX IF EXISTS idx_nota_fiscal_data_emissao_id;
+-- ============================================================================
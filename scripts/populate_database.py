@@ -29,6 +29,7 @@ def read_sql_file():
 def clear_database():
     """Limpa todas as tabelas do banco de dados."""
     from models import db
+    from models.versao_dados import VersaoDados, TABELAS_VERSIONADAS
 
     print("🗑️  Limpando banco de dados...")
 
@@ -54,6 +55,8 @@ def clear_database():
             db.session.execute(text("SET session_replication_role = 'origin';"))
 
             db.session.commit()
+            # SQL direto não passa pelos eventos da sessão: invalidar os caches manualmente
+            VersaoDados.incrementar(TABELAS_VERSIONADAS)
             print("✅ Banco de dados limpo com sucesso!\n")
             return True
 
@@ -83,6 +86,7 @@ def populate_database(clear_first=False):
         tuple: (success: bool, message: str, stats: dict)
     """
     from models import db
+    from models.versao_dados import VersaoDados, TABELAS_VERSIONADAS
 
     print("=" * 70)
     print("📊 POPULAÇÃO DO BANCO DE DADOS")
@@ -117,6 +121,7 @@ def populate_database(clear_first=False):
                             print(f"   ⚠️  Aviso no bloco {i}: {e}")
 
             db.session.commit()
+            VersaoDados.incrementar(TABELAS_VERSIONADAS)
 
             # Obter estatísticas
             stats = {}
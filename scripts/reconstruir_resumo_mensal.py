@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Reconstrói a tabela resumo_mensal_notas (totais por mês × fornecedor ×
+classificação) a partir de nota_fiscal.
+
+O resumo é mantido automaticamente quando as notas são gravadas pela
+aplicação; use este script para a carga inicial ou depois de importar ou
+alterar notas por SQL direto.
+
+Uso:
+    python scripts/reconstruir_resumo_mensal.py
+    python scripts/reconstruir_resumo_mensal.py --verificar
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstrói o resumo mensal das notas fiscais')
+    parser.add_argument('--verificar', action='store_true',
+                        help='Apenas compara o resumo com nota_fiscal, sem reconstruir')
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+    from models.nota_fiscal import NotaFiscal
+    from models.resumo_mensal import ResumoMensal
+    from models.versao_dados import VersaoDados
+
+    with app.app_context():
+        if not args.verificar:
+            linhas = ResumoMensal.reconstruir()
+            # Invalida os agregados em cache nos processos da aplicação
+            VersaoDados.incrementar(['nota_fiscal'])
+            print(f"✅ Resumo mensal reconstruído: {linhas} linhas")
+
+        notas = db.session.query(
+            db.func.count(NotaFiscal.id), db.func.coalesce(db.func.sum(NotaFiscal.valor_total), 0)
+        ).one()
+        resumo = db.session.query(
+            db.func.coalesce(db.func.sum(ResumoMensal.quantidade), 0),
+            db.func.coalesce(db.func.sum(ResumoMensal.total), 0)
+        ).one()
+
+        print(f"   nota_fiscal:         {notas[0]} notas, R$ {float(notas[1]):,.2f}")
+        print(f"   resumo_mensal_notas: {resumo[0]} notas, R$ {float(resumo[1]):,.2f}")
+        if notas[0] != resumo[0] or abs(float(notas[1]) - float(resumo[1])) > 0.01:
+            print("⚠️  O resumo está divergente; execute o script sem --verificar")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Verifica quantas instruções SQL cada endpoint de listagem executa.
+
+As listagens devem executar um número fixo de consultas, qualquer que seja a
+quantidade de registros (sem N+1 ao carregar relacionamentos). O script chama
+cada endpoint pelo cliente de testes do Flask, conta as instruções enviadas ao
+banco e falha se alguma passar do limite. A validação em lote também deve
+executar um número fixo de consultas, qualquer que seja a quantidade de notas.
+
+Uso:
+    python scripts/verificar_consultas.py
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Endpoint -> máximo de instruções SQL por requisição
+LIMITES = {
+    '/api/movimentos': 2,  # movimentos com os nomes das pessoas + classificações
+    '/api/movimentos?incluir_inativos=true': 2,
+    '/api/movimentos?total=true': 3,  # + contagem
+    '/api/pessoas': 1,
+    '/api/pessoas?total=true': 2,
+    '/api/classificacoes': 1,
+    '/api/classificacoes?total=true': 2,
+    '/api/notas': 1,
+    '/api/notas?ordem=valor_total&direcao=asc': 1,
+    '/api/notas?total=true': 2,
+}
+
+# Endpoint POST -> (corpo JSON, máximo de instruções SQL por requisição)
+LIMITES_POST = {
+    '/api/validar/lote': ({'notas': [
+        {
+            'Fornecedor': {'CNPJ': f'{i:014d}'},
+            'Faturado': {'CPF': f'{i:011d}'},
+            'Classificacao_Despesa': f'CLASSIFICACAO {i % 20}'
+        }
+        for i in range(200)
+    ]}, 2),  # todos os CPFs/CNPJs + todas as classificações
+}
+
+
+def main():
+    from sqlalchemy import event
+    from app import app
+    from models import db
+
+    instrucoes = []
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        instrucoes.append(statement)
+
+    falhas = 0
+    cliente = app.test_client()
+    requisicoes = [(url, None, limite) for url, limite in LIMITES.items()]
+    requisicoes += [(url, corpo, limite) for url, (corpo, limite) in LIMITES_POST.items()]
+    for url, corpo, limite in requisicoes:
+        instrucoes.clear()
+        resposta = cliente.get(url) if corpo is None else cliente.post(url, json=corpo)
+        dados = resposta.get_json() or {}
+        registros = len(dados.get('data') or dados.get('resultados') or [])
+        ok = resposta.status_code == 200 and len(instrucoes) <= limite
+        falhas += not ok
+        print(f"{'✅' if ok else '❌'} {url}: {len(instrucoes)} instruções para {registros} registros "
+              f"(limite: {limite}, HTTP {resposta.status_code})")
+        if not ok:
+            for statement in instrucoes[:10]:
+                print(f"      {' '.join(statement.split())[:150]}")
+        if registros < 2:
+            print("   ⚠️  Poucos registros para detectar N+1; popule o banco (scripts/populate_database.py)")
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
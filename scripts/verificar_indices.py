@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Verifica se as consultas mais frequentes continuam usando índices.
+
+Cada consulta é executada pelo próprio código da aplicação (validação, busca
+de notas, listagens), as instruções SQL enviadas ao banco são capturadas e o
+script roda EXPLAIN de cada uma com enable_seqscan desligado. Assim o
+PostgreSQL só escolhe um Seq Scan quando nenhum índice atende ao filtro ou à
+ordenação, qualquer que seja o tamanho das tabelas (em bancos pequenos o
+planejador preferiria ler a tabela inteira mesmo com o índice).
+
+Sem Seq Scan, uma consulta sem índice próprio ainda pode percorrer por inteiro
+outro índice que só atende à ordenação (Index Scan com Filter e sem Index
+Cond). O script falha se alguma consulta ler por completo uma das tabelas
+verificadas, por Seq Scan ou por um índice assim, ou se não usar os índices
+esperados para ela.
+
+Uso:
+    python scripts/verificar_indices.py
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def consultas_frequentes():
+    """
+    Lista de (descrição, função que executa a consulta, tabelas que não podem
+    ser lidas por completo, índices que o plano deve usar).
+
+    As buscas de pessoas por CPF/CNPJ não têm índice esperado: em tabelas
+    pequenas o planejador prefere os índices de tipo/status (com o documento
+    em Filter) ao índice único de cpf_cnpj.
+    """
+    from models import db
+    from models.pessoas import Pessoas
+    from models.classificacao import Classificacao
+    from models.movimento_contas import MovimentoContas
+    from models.nota_fiscal import NotaFiscal
+    from sqlalchemy.orm import selectinload
+    from rag_system.database_retriever import DatabaseRetriever
+    from routes.api_routes import validar_notas_fiscais
+
+    retriever = DatabaseRetriever(db)
+    notas = retriever.search_notas_fiscais_page
+    return [
+        ('Pessoas.verificar_existencia (tipo + CPF/CNPJ)',
+         lambda: Pessoas.verificar_existencia(tipo='FORNECEDOR', cpf_cnpj='00000000000191'), {'pessoas'}, set()),
+        ('Pessoas.verificar_existencia (CPF/CNPJ)',
+         lambda: Pessoas.verificar_existencia(cpf_cnpj='00000000000191'), {'pessoas'}, set()),
+        ('Classificacao.verificar_existencia',
+         lambda: Classificacao.verificar_existencia('DESPESA', 'MANUTENCAO E OPERACAO'), {'classificacao'},
+         {'idx_classificacao_tipo_descricao_ativo'}),
+        ('validação em lote (CPFs/CNPJs e classificações)',
+         lambda: validar_notas_fiscais([
+             {'Fornecedor': {'CNPJ': f'{i:014d}'}, 'Faturado': {'CPF': f'{i:011d}'},
+              'Classificacao_Despesa': f'CLASSIFICACAO {i}'}
+             for i in range(50)
+         ]), {'pessoas', 'classificacao'}, {'idx_classificacao_tipo_descricao_ativo'}),
+        ('notas: página inicial', lambda: notas(), {'nota_fiscal'}, {'idx_nota_fiscal_data_emissao_id'}),
+        ('notas: filtro por CNPJ', lambda: notas({'cnpj': '00000000000191'}), {'nota_fiscal'},
+         {'idx_nota_fiscal_cnpj_data_emissao_id'}),
+        ('notas: filtro por classificação', lambda: notas({'classificacao': 'ADMINISTRATIVAS'}), {'nota_fiscal'},
+         {'idx_nota_fiscal_classificacao_data_emissao_id'}),
+        ('notas: filtro por período',
+         lambda: notas({'data_inicio': '2024-01-01', 'data_fim': '2024-12-31'}), {'nota_fiscal'},
+         {'idx_nota_fiscal_data_emissao_id'}),
+        ('notas: ordenadas por valor', lambda: notas(ordem='valor_total', direcao='asc'), {'nota_fiscal'},
+         {'idx_nota_fiscal_valor_total_id'}),
+        ('produtos das notas (selectinload)',
+         lambda: NotaFiscal.query.options(selectinload(NotaFiscal.produtos))
+                           .filter(NotaFiscal.id.in_([1, 2, 3])).all(), {'nota_fiscal', 'produto_nota_fiscal'},
+         {'idx_produto_nota_fiscal_nota_fiscal_id'}),
+        ('pessoas: listagem', lambda: Pessoas.listar_pagina(tipos=['FORNECEDOR']), {'pessoas'}, set()),
+        ('classificações: listagem', lambda: Classificacao.listar_pagina(), {'classificacao'},
+         {'idx_classificacao_status_data_cadastro_id'}),
+        ('movimentos: listagem', lambda: MovimentoContas.listar_para_exibicao(),
+         {'movimento_contas', 'movimento_classificacao'}, {'idx_movimento_contas_status_data_movimento_id'}),
+        ('movimentos: por fornecedor/cliente',
+         lambda: MovimentoContas.listar_para_exibicao(fornecedor_cliente_id=1), {'movimento_contas'},
+         {'idx_movimento_contas_fornecedor_cliente_ativo'}),
+        ('movimentos: por faturado',
+         lambda: MovimentoContas.listar_para_exibicao(faturado_id=1), {'movimento_contas'},
+         {'idx_movimento_contas_faturado_ativo'}),
+    ]
+
+
+def nos_do_plano(no):
+    """Percorre os nós do plano (formato JSON do EXPLAIN)."""
+    yield no
+    for filho in no.get('Plans', []):
+        yield from nos_do_plano(filho)
+
+
+def leitura_completa(no):
+    """Se o nó lê a tabela inteira: Seq Scan ou índice percorrido sem condição, só com Filter."""
+    if no['Node Type'] == 'Seq Scan':
+        return 'Seq Scan'
+    if no['Node Type'] in ('Index Scan', 'Index Only Scan') and 'Filter' in no and 'Index Cond' not in no:
+        return f"{no['Index Name']} sem Index Cond"
+    return None
+
+
+def explicar(conexao, statement, parameters):
+    """Nós do plano da instrução, com enable_seqscan desligado apenas nesta transação."""
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        plano = cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return list(nos_do_plano(plano[0]['Plan']))
+    finally:
+        cursor.close()
+        conexao.rollback()
+
+
+def main():
+    from sqlalchemy import event
+    from app import app
+    from models import db
+
+    instrucoes = []
+
+    with app.app_context():
+        engine = db.engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _capturar(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                instrucoes.append((statement, parameters))
+
+        falhas = 0
+        conexao = engine.raw_connection()
+        try:
+            for descricao, consulta, tabelas, esperados in consultas_frequentes():
+                instrucoes.clear()
+                consulta()
+                db.session.rollback()
+
+                leituras_completas, indices = set(), set()
+                for statement, parameters in instrucoes:
+                    for no in explicar(conexao, statement, parameters):
+                        motivo = leitura_completa(no)
+                        if motivo and no.get('Relation Name') in tabelas:
+                            leituras_completas.add(f"{no['Relation Name']} ({motivo})")
+                        if 'Index Name' in no:
+                            indices.add(no['Index Name'])
+                ausentes = esperados - indices
+
+                ok = bool(instrucoes) and not leituras_completas and not ausentes
+                falhas += not ok
+                print(f"{'✅' if ok else '❌'} {descricao}: {', '.join(sorted(indices)) or 'nenhum índice'}")
+                if leituras_completas:
+                    print(f"      Leitura completa de: {', '.join(sorted(leituras_completas))}")
+                if ausentes:
+                    print(f"      Índices esperados não usados: {', '.join(sorted(ausentes))}")
+                if not instrucoes:
+                    print("      Nenhuma consulta executada")
+        finally:
+            conexao.close()
+            event.remove(engine, 'before_cursor_execute', _capturar)
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())